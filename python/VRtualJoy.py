@@ -3,16 +3,29 @@ import os
 import sys
 import subprocess
 import argparse
+import asyncio
+import importlib
 
 # === CLI Argument Parser ===
 parser = argparse.ArgumentParser(description="Launch VRtualJoy with DS4 or XInput backend.")
 parser.add_argument('--controller', choices=['ds4', 'xinput'], help='Override controller type (ds4 or xinput)')
-args = parser.parse_args()
+parser.add_argument('--bench', action='store_true', help='Run the hot-path benchmarks (extra options go to bench.py)')
+parser.add_argument('--startup-profile', action='store_true', help='Report how long each import and init phase took')
+# Anything else is passed on to the backend (or to bench.py with --bench)
+args, extra_args = parser.parse_known_args()
 
 # === Resolve Paths ===
 base_dir = os.path.dirname(os.path.abspath(__file__))
 vrtualjoy_dir = os.path.join(base_dir, 'vrtualjoy')
 config_path = os.path.join(vrtualjoy_dir, '..', '..', 'main_config.json')
+sys.path.insert(0, vrtualjoy_dir)
+from startup import PROFILE
+
+# === Benchmarks ===
+if args.bench:
+    bench_script = os.path.join(vrtualjoy_dir, 'bench.py')
+    print("[INFO] Running hot-path benchmarks against the simulated runtime")
+    sys.exit(subprocess.run([sys.executable, bench_script] + extra_args).returncode)
 
 # === Load Config File ===
 config = {}
@@ -43,4 +56,20 @@ if not os.path.exists(script_path):
     sys.exit(1)
 
 print(f"[INFO] Launching {target_script} using controller type: {controller_type}")
-subprocess.run([sys.executable, script_path])
+
+# The backend runs in this interpreter instead of a second one. It parses sys.argv when imported.
+sys.argv = [script_path] + extra_args + (['--startup-profile'] if args.startup_profile else [])
+
+# Heavy dependencies are imported one by one so --startup-profile can tell them apart;
+# importing vgamepad also connects to the ViGEm bus on Windows
+with PROFILE.phase("import openvr"):
+    import openvr
+with PROFILE.phase("import vgamepad"):
+    import vgamepad
+with PROFILE.phase("import triad_openvr"):
+    import triad_openvr
+module_name = os.path.splitext(target_script)[0]
+with PROFILE.phase(f"import {module_name}"):
+    backend = importlib.import_module(module_name)
+
+asyncio.run(backend.main())
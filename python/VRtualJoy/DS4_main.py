@@ -13,6 +13,7 @@ import json
 import openvr
 import vgamepad as vg
 import triad_openvr
+from triad_openvr import EMPTY_CONTROLLER_STATE
 
 # === Path setup for local module imports ===
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -24,19 +25,49 @@ sys.path.insert(0, project_root)
 from DS4_controller_input import (
     initialize_gamepad, safe_gamepad_update,  
     poll_controller_inputs, process_triggers_and_buttons,
-    process_left_joystick, extract_input_value,
-    apply_deadzone_axis, remap_float_axis
+    process_left_joystick, compile_button_mappings, input_bit
 )
 from DS4_motion_tracking import (
     load_calibration, handle_calibration,
-    apply_headtracking_to_right_stick, initialize_vr_devices,
-    Smoother
+    apply_headtracking_to_right_stick, initialize_vr_devices
 )
+from axis_mixer import compile_axis_mixer, AXIS_MIXER_PLAN
+from action_input import ActionInput, write_action_manifest, compare_input_cost
+from adaptive_rate import AdaptiveRate
+from button_events import ButtonEdgeTracker
+from config_watcher import ConfigWatcher
+from dynamic_deadzone import create_dynamic_deadzones, DYNAMIC_DEADZONES
+from head_filters import create_head_filter, describe_head_filters
+from head_prediction import create_head_predictor, HeadTraceRecorder
+from input_recording import InputRecorder
+from shared_state import SharedStatePublisher, SHARED_STATE_NAME
+from startup import PROFILE, run_in_parallel
+from stage_timing import (
+    StageTimings, MAIN_LOOP_STAGES, STAGE_INPUT, STAGE_CALIBRATION, STAGE_LEFT_STICK,
+    STAGE_BUTTONS, STAGE_HEADTRACKING, STAGE_SUBMIT
+)
+from stick_pipeline import compile_stick_pipelines, LEFT_STICK_PIPELINE, RIGHT_STICK_PIPELINE
+from gamepad_output import DS4Output
+from tick_scheduler import TickScheduler, VsyncSource, OVERRUN_SKIP, OVERRUN_BURST
 
 # === Argument parsing ===
 parser = argparse.ArgumentParser(description="DS4 VR bridge")
 parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
 parser.add_argument("--hz", type=float, default=72.0, help="Update frequency (Hz)")
+parser.add_argument("--overrun", choices=[OVERRUN_SKIP, OVERRUN_BURST], default=OVERRUN_SKIP, help="What to do when a tick overruns its deadline")
+parser.add_argument("--spin-us", type=float, default=500.0, help="Busy-wait the last N microseconds before each tick deadline")
+parser.add_argument("--vsync", action="store_true", help="Align ticks to the compositor vsync cadence")
+parser.add_argument("--threaded-output", action="store_true", help="Submit gamepad reports from a dedicated writer thread")
+parser.add_argument("--input-backend", choices=["legacy", "actions"], default="legacy", help="Read controllers via getControllerState (legacy) or an IVRInput action manifest")
+parser.add_argument("--bench-input", action="store_true", help="Time legacy vs action input reads per tick, then exit")
+parser.add_argument("--record-head", metavar="PATH", help="Record the HMD pose every tick to a CSV trace for prediction_eval.py")
+parser.add_argument("--record-input", metavar="PATH", help="Record raw poses and controller states every tick for replay.py")
+parser.add_argument("--stage-timing", action="store_true", help="Log per-stage timing histograms (p50/p99/max) for the main loop")
+parser.add_argument("--config-poll-s", type=float, default=1.0, help="How often to check main_config.json for changes (0 disables hot reload)")
+parser.add_argument("--share-state", nargs="?", const=SHARED_STATE_NAME, metavar="NAME", help="Publish poses, controller states and the gamepad report to shared memory every tick (see shared_state.py)")
+parser.add_argument("--idle-hz", type=float, default=0.0, help="Drop to this tick rate while the HMD is off or nothing moves (0 keeps the full rate)")
+parser.add_argument("--idle-after-s", type=float, default=30.0, help="Seconds without input or movement before dropping to --idle-hz")
+parser.add_argument("--startup-profile", action="store_true", help="Log how long each import and init phase took")
 args = parser.parse_args()
 VERBOSE = args.verbose
 HZ = args.hz
@@ -65,15 +96,21 @@ def log_and_print(message, level='info'):
 # === Global Mappings ===
 BUTTON_MAPPINGS = {}
 SHIFT_BUTTON_MAPPINGS = {}
+BUTTON_PLAN = compile_button_mappings({})
+SHIFT_BUTTON_PLAN = compile_button_mappings({})
 
 # === Config Loading ===
-def load_config():
-    global BUTTON_MAPPINGS, SHIFT_BUTTON_MAPPINGS
-
-    config_path = os.path.abspath(os.path.join(current_dir, '..', '..', 'main_config.json'))
+CONFIG_FILE = os.path.abspath(os.path.join(current_dir, '..', '..', 'main_config.json'))
 
-    with open(config_path, 'r') as f:
-        raw = json.load(f)
+def read_config(raw=None):
+    """
+    Reads main_config.json (unless a parsed raw config is given) and compiles its button plans.
+    Returns (raw, button mappings, shift button mappings, button plan, shift button plan) without
+    touching the globals, so a reload can build it off the tick path.
+    """
+    if raw is None:
+        with open(CONFIG_FILE, 'r') as f:
+            raw = json.load(f)
 
     controller_type = raw.get("CONTROLLER_TYPE", "DS4").upper()
     mappings = raw.get("MAPPINGS", {}).get(controller_type, {})
@@ -88,57 +125,211 @@ def load_config():
                 processed[controller][button] = config_item
         return processed
 
-    BUTTON_MAPPINGS.update(process_mapping(mappings.get("BUTTON_MAPPINGS", {})))
-    SHIFT_BUTTON_MAPPINGS.update(process_mapping(mappings.get("SHIFT_BUTTON_MAPPINGS", {})))
+    button_mappings = process_mapping(mappings.get("BUTTON_MAPPINGS", {}))
+    shift_button_mappings = process_mapping(mappings.get("SHIFT_BUTTON_MAPPINGS", {}))
+
+    # Compiled next to the button plans; the raw config is what the tick path reads
+    raw[DYNAMIC_DEADZONES] = create_dynamic_deadzones(raw, HZ)
+    # Remaps with an unknown controller prefix read the right controller, as this bridge always did
+    pipelines = compile_stick_pipelines(raw, raw[DYNAMIC_DEADZONES], other_prefix_side=1)
+    raw.update(pipelines)
+    # This bridge scales the right stick's share of the head blend by the headtracking sensitivity
+    right_stick_gain = (raw.get("HEADTRACKING_SENSITIVITY_YAW", 1.5), raw.get("HEADTRACKING_SENSITIVITY_PITCH", 1.5))
+    raw[AXIS_MIXER_PLAN] = compile_axis_mixer(raw, pipelines, right_stick_gain)
+
+    # Compile both mapping sets into bitmask dispatch plans once, not per tick
+    return (raw, button_mappings, shift_button_mappings,
+            compile_button_mappings(button_mappings), compile_button_mappings(shift_button_mappings))
 
+def install_config(loaded):
+    global BUTTON_MAPPINGS, SHIFT_BUTTON_MAPPINGS, BUTTON_PLAN, SHIFT_BUTTON_PLAN
+    raw, BUTTON_MAPPINGS, SHIFT_BUTTON_MAPPINGS, BUTTON_PLAN, SHIFT_BUTTON_PLAN = loaded
+    log_and_print(f"Button plan: {BUTTON_PLAN.describe()}", level="debug")
+    for key in (LEFT_STICK_PIPELINE, RIGHT_STICK_PIPELINE, AXIS_MIXER_PLAN):
+        log_and_print(raw[key].describe(), level="debug")
+    return raw
+
+def load_config():
+    raw = install_config(read_config())
+    controller_type = raw.get("CONTROLLER_TYPE", "DS4").upper()
     log_and_print(f"{controller_type} config loaded from main_config.json.")
     return raw
 
+def apply_reloaded_config(reloaded, v, output, yaw_smoother, pitch_smoother):
+    loaded, changes = reloaded
+    for change in changes:
+        log_and_print(f"Config changed: {change}")
+    config_data = install_config(loaded)
+    yaw_smoother = create_head_filter(config_data, "yaw", HZ, yaw_smoother)
+    pitch_smoother = create_head_filter(config_data, "pitch", HZ, pitch_smoother)
+    log_and_print(describe_head_filters(yaw_smoother, pitch_smoother), level="debug")
+    output.keepalive_s = config_data.get("GAMEPAD_KEEPALIVE_MS", 0) / 1000.0
+    predictor = create_head_predictor(config_data, v.frame)
+    log_and_print(predictor.describe(), level="debug")
+    return config_data, predictor, yaw_smoother, pitch_smoother
+
+# === Tick scheduling ===
+def create_scheduler(v):
+    vsync = VsyncSource(v.vrsystem) if args.vsync else None
+    scheduler = TickScheduler(HZ, overrun_policy=args.overrun, spin_s=args.spin_us / 1e6, vsync=vsync)
+    if args.vsync and scheduler.vsync is None:
+        log_and_print("Display frequency unavailable, vsync alignment disabled.", level="warning")
+    return scheduler
+
+# === Input backend ===
+def create_action_input():
+    mapping_sets = (BUTTON_MAPPINGS, SHIFT_BUTTON_MAPPINGS)
+    manifest_path = write_action_manifest(os.path.join(current_dir, "actions"), mapping_sets, input_bit)
+    log_and_print(f"Action manifest written to {manifest_path}")
+    return ActionInput(openvr.VRInput(), manifest_path, mapping_sets, input_bit)
+
+def log_input_benchmark(action_input, left_controller, right_controller):
+    results = compare_input_cost(action_input, left_controller, right_controller)
+    log_and_print(f"Input read cost per tick: legacy {results['legacy']:.1f} us, actions {results['actions']:.1f} us")
+
 # === Main loop ===
-async def main_loop(left_controller, right_controller, hmd, gamepad, config_data):
-    yaw_smoother = Smoother(alpha=config_data.get("HEADTRACKING_SMOOTHING_YAW", 0.2))
-    pitch_smoother = Smoother(alpha=config_data.get("HEADTRACKING_SMOOTHING_PITCH", 0.2))
-    left_controller_state_old = {}
-    right_controller_state_old = {}
+async def main_loop(v, left_controller, right_controller, hmd, output, scheduler, config_data, action_input=None):
+    yaw_smoother = create_head_filter(config_data, "yaw", HZ)
+    pitch_smoother = create_head_filter(config_data, "pitch", HZ)
+    left_controller_state_old = EMPTY_CONTROLLER_STATE
+    right_controller_state_old = EMPTY_CONTROLLER_STATE
+    pose_fetches = v.pose_fetch_count
+    button_edges = ButtonEdgeTracker()
+    predictor = create_head_predictor(config_data, v.frame)
+    log_and_print(predictor.describe())
+    log_and_print(describe_head_filters(yaw_smoother, pitch_smoother))
+    head_trace = HeadTraceRecorder(args.record_head) if args.record_head and hmd else None
+    if args.record_head and not hmd:
+        log_and_print("No HMD detected, --record-head ignored.", level="warning")
+    input_recorder = InputRecorder(args.record_input, hmd, left_controller, right_controller, HZ) if args.record_input else None
+    timings = StageTimings(MAIN_LOOP_STAGES, 1.0 / HZ) if args.stage_timing else None
+    config_watcher = ConfigWatcher(CONFIG_FILE, read_config, log_and_print, args.config_poll_s) if args.config_poll_s > 0 else None
+    state_publisher = SharedStatePublisher(args.share_state, hmd, left_controller, right_controller, "ds4") if args.share_state else None
+    adaptive_rate = AdaptiveRate(scheduler, hmd, left_controller, right_controller, HZ, args.idle_hz, args.idle_after_s,
+                                 log_and_print) if args.idle_hz > 0 else None
+    interaction_events = adaptive_rate.interaction_events if adaptive_rate else None
+    stats_sources = (scheduler, output, button_edges) + tuple(
+        source for source in (action_input, head_trace, input_recorder, timings, config_watcher, state_publisher, adaptive_rate) if source
+    )
+    config_data[AXIS_MIXER_PLAN].bind(hmd, left_controller, right_controller)
+    scheduler.start()
 
-    while True:
-        left_controller_state, right_controller_state = await poll_controller_inputs(left_controller, right_controller)
-        shift_active = left_controller_state.get("grip_button", False)
+    try:
+        while True:
+            # Swap in a reloaded config between ticks; it was validated and built off the tick path
+            if config_watcher:
+                reloaded = config_watcher.take()
+                if reloaded:
+                    config_data, predictor, yaw_smoother, pitch_smoother = apply_reloaded_config(reloaded, v, output, yaw_smoother, pitch_smoother)
+                    config_data[AXIS_MIXER_PLAN].bind(hmd, left_controller, right_controller)
+            if timings:
+                timings.begin()
+            # One pose snapshot per tick, shared by calibration and headtracking
+            v.update_frame()
+            if head_trace:
+                head_trace.record(hmd, v.frame.timestamp)
+            # Drain button events so taps shorter than a tick still reach the mapping stage
+            v.poll_vr_events(button_edges.edges, interaction_events)
+            if action_input is not None:
+                # Button events carry legacy bits per device index, so edges only apply to the legacy path
+                left_controller_state, right_controller_state = action_input.read()
+            else:
+                left_controller_state, right_controller_state = await poll_controller_inputs(left_controller, right_controller)
+                button_edges.apply(left_controller, left_controller_state)
+                button_edges.apply(right_controller, right_controller_state)
+            button_edges.end_tick()
+            if input_recorder:
+                input_recorder.record(v.frame, left_controller_state, right_controller_state)
+            if adaptive_rate:
+                adaptive_rate.update(v.frame, left_controller_state, right_controller_state)
+            if timings:
+                timings.lap(STAGE_INPUT)
+            shift_active = left_controller_state.grip_button
 
-        await handle_calibration(left_controller, right_controller, hmd, shift_active)
+            await handle_calibration(left_controller, right_controller, hmd, shift_active)
+            if timings:
+                timings.lap(STAGE_CALIBRATION)
 
-        if shift_active != getattr(main_loop, '_last_shift', None):
-            log_and_print(f"Shift mode: {'ON' if shift_active else 'OFF'}", level="debug")
-            main_loop._last_shift = shift_active
+            if shift_active != getattr(main_loop, '_last_shift', None):
+                log_and_print(f"Shift mode: {'ON' if shift_active else 'OFF'}", level="debug")
+                main_loop._last_shift = shift_active
 
-        await process_left_joystick(left_controller_state, right_controller_state, shift_active, gamepad, config_data)
+            await process_left_joystick(left_controller_state, right_controller_state, shift_active, output, config_data)
+            if timings:
+                timings.lap(STAGE_LEFT_STICK)
 
-        await process_triggers_and_buttons(
-            left_controller_state, right_controller_state,
-            left_controller_state_old, right_controller_state_old,
-            gamepad, shift_active,
-            BUTTON_MAPPINGS, SHIFT_BUTTON_MAPPINGS
-        )
+            await process_triggers_and_buttons(
+                left_controller_state, right_controller_state,
+                left_controller_state_old, right_controller_state_old,
+                output, shift_active,
+                BUTTON_PLAN, SHIFT_BUTTON_PLAN
+            )
+            if timings:
+                timings.lap(STAGE_BUTTONS)
 
-        await apply_headtracking_to_right_stick(
-            hmd, left_controller_state, right_controller_state,
-            gamepad, yaw_smoother, pitch_smoother, config_data
-        )
+            await apply_headtracking_to_right_stick(
+                hmd, left_controller_state, right_controller_state,
+                output, yaw_smoother, pitch_smoother, config_data, v.frame.get(), predictor
+            )
+            if timings:
+                timings.lap(STAGE_HEADTRACKING)
+
+            output.submit()
+            if state_publisher:
+                state_publisher.publish(v.frame, left_controller_state, right_controller_state, output.report)
+            if timings:
+                timings.lap(STAGE_SUBMIT)
+                timings.end()
+            left_controller_state_old = left_controller_state
+            right_controller_state_old = right_controller_state
 
-        gamepad = safe_gamepad_update(gamepad)
-        left_controller_state_old = left_controller_state
-        right_controller_state_old = right_controller_state
-        await asyncio.sleep(1 / HZ)
+            tick_fetches = v.pose_fetch_count - pose_fetches
+            pose_fetches = v.pose_fetch_count
+            if tick_fetches != 1:
+                log_and_print(f"Expected 1 pose fetch per tick, got {tick_fetches}", level="warning")
+
+            if scheduler.report_due():
+                for source in stats_sources:
+                    logger.info(source.summary())
+            await scheduler.wait()
+    finally:
+        for source in stats_sources:
+            log_and_print(source.summary())
+        if config_data.get(DYNAMIC_DEADZONES):
+            log_and_print(config_data[DYNAMIC_DEADZONES].describe())
+        output.close()
+        if head_trace:
+            head_trace.close()
+        if input_recorder:
+            input_recorder.close()
+        if config_watcher:
+            config_watcher.close()
+        if state_publisher:
+            state_publisher.close()
 
 # === Entry point ===
 async def main():
     try:
         log_and_print("Starting VRtualJoy DS4 Mode...", level="info")
-        config_data = load_config()
-        load_calibration()
-        _, left_controller, right_controller, hmd = initialize_vr_devices()
-        gamepad = initialize_gamepad()
-        await main_loop(left_controller, right_controller, hmd, gamepad, config_data)
+        with PROFILE.phase("config"):
+            config_data = load_config()
+        # OpenVR and the virtual gamepad come up on worker threads at the same time
+        (v, left_controller, right_controller, hmd), gamepad = await run_in_parallel(
+            ("openvr init", initialize_vr_devices), ("gamepad init", initialize_gamepad)
+        )
+        with PROFILE.phase("calibration"):
+            load_calibration(hmd.get_serial() if hmd else None)
+        scheduler = create_scheduler(v)
+        if args.startup_profile:
+            log_and_print(PROFILE.report())
+        output = DS4Output(gamepad, safe_gamepad_update, keepalive_s=config_data.get("GAMEPAD_KEEPALIVE_MS", 0) / 1000.0,
+                           threaded=args.threaded_output)
+        action_input = create_action_input() if args.input_backend == "actions" or args.bench_input else None
+        if args.bench_input:
+            log_input_benchmark(action_input, left_controller, right_controller)
+            return
+        await main_loop(v, left_controller, right_controller, hmd, output, scheduler, config_data,
+                        action_input=action_input if args.input_backend == "actions" else None)
     except Exception as e:
         log_and_print(f"Fatal error: {e}", level="error")
         raise
@@ -7,13 +7,18 @@ import logging
 import os
 import sys
 import time
-import json
 import math
 
 # === Third-party imports ===
 import openvr
 import triad_openvr
 
+# === Local project imports ===
+from axis_mixer import AXIS_MIXER_PLAN, write_mixed_axes
+from calibration_store import CalibrationStore
+from dynamic_deadzone import apply_axis_deadzone
+from rotation import HeadReference, head_yaw_pitch, matrix_to_quaternion
+
 # === Logger setup ===
 logger = logging.getLogger("DS4")
 
@@ -31,24 +36,13 @@ def log_and_print(message, level='info'):
 # === Globals ===
 HEADTRACKING_DEADZONE_X = 0.1
 HEADTRACKING_DEADZONE_Y = 0.1
-initial_yaw = 0.0
-initial_pitch = 0.0
+head_reference = HeadReference()   # Zero orientation headtracking is measured from
 is_calibrated = False
 last_calibration_time = 0
 
 dname = os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.path.dirname(os.path.realpath(__file__))
 CALIBRATION_FILE = os.path.join(dname, "DS4_calibration.json")
 
-# === Smoother class ===
-class Smoother:
-    def __init__(self, alpha=0.2):
-        self.alpha = alpha
-        self.last = 0.0
-
-    def smooth(self, value):
-        self.last = (self.alpha * value) + ((1 - self.alpha) * self.last)
-        return self.last
-
 # === Calibration I/O ===
 def clamp_and_scale(value, range_degrees):
     if range_degrees == 0:
@@ -56,39 +50,29 @@ def clamp_and_scale(value, range_degrees):
     clamped = max(-range_degrees, min(range_degrees, value))
     return clamped / range_degrees
 
-def apply_deadzone(value, deadzone):
-    if value is None:
-        return 0.0
-    return 0.0 if abs(value) < deadzone else value
-
 def apply_sensitivity(value, sensitivity):
     return value * sensitivity
 
-def remap_float_axis(val):
-    return max(min(val, 1.0), -1.0)
-
-def load_calibration():
-    global initial_yaw, initial_pitch, is_calibrated
-    if os.path.exists(CALIBRATION_FILE):
-        try:
-            with open(CALIBRATION_FILE, 'r') as f:
-                data = json.load(f)
-                initial_yaw = data.get("yaw", 0.0)
-                initial_pitch = data.get("pitch", 0.0)
-                is_calibrated = True
-                log_and_print("Calibration loaded from file.")
-        except Exception as e:
-            log_and_print(f"Failed to load calibration file: {e}", level="error")
-
-def save_calibration(yaw, pitch):
-    global initial_yaw, initial_pitch, is_calibrated
-    initial_yaw = yaw
-    initial_pitch = pitch
-    with open(CALIBRATION_FILE, 'w') as f:
-        json.dump({"yaw": yaw, "pitch": pitch}, f)
+calibration_store = CalibrationStore(CALIBRATION_FILE, log_and_print)
+
+def save_calibration(yaw, pitch, serial=None, quaternion=None):
+    global head_reference, is_calibrated
+    head_reference = HeadReference(yaw, pitch, quaternion)
     is_calibrated = True
+    # Only a memory write here; the store persists it from its writer thread
+    calibration_store.set(serial, yaw, pitch, quaternion)
     log_and_print("Calibration complete and saved.")
 
+def load_calibration(serial=None):
+    global head_reference, is_calibrated
+    calibration = calibration_store.get(serial)
+    if calibration is not None:
+        yaw, pitch, quaternion = calibration
+        # Older files only have the angles
+        head_reference = HeadReference.from_quaternion(quaternion) if quaternion else HeadReference(yaw, pitch)
+        is_calibrated = True
+        log_and_print(f"Calibration loaded from file for HMD {serial or 'default'}.")
+
 # === Gesture-based calibration ===
 def check_calibration_gesture(hmd, left_controller, right_controller):
     try:
@@ -120,12 +104,12 @@ async def handle_calibration(left_controller, right_controller, hmd, left_grip):
     cooldown_seconds = 1.0
     if left_grip and now - last_calibration_time >= cooldown_seconds:
         if check_calibration_gesture(hmd, left_controller, right_controller):
-            pose = hmd.get_pose_euler()
-            if pose:
-                save_calibration(pose[4], pose[5])
+            pose_mat = hmd.get_pose_matrix()
+            if pose_mat is not None:
+                yaw, pitch = head_yaw_pitch(pose_mat)
+                save_calibration(yaw, pitch, hmd.get_serial(), matrix_to_quaternion(pose_mat))
                 asyncio.create_task(give_haptic_feedback(left_controller, right_controller))
                 last_calibration_time = now
-                await asyncio.sleep(0.1)
 
 # === VR device detection ===
 def get_controller_role_index(device_index):
@@ -137,13 +121,12 @@ def get_controller_role_index(device_index):
     return "unknown"
 
 def initialize_vr_devices():
+    # triad_openvr calls openvr.init itself
     try:
-        openvr.init(openvr.VRApplication_Other)
+        v = triad_openvr.triad_openvr()
     except Exception as e:
         log_and_print(f"OpenVR initialization failed: {e}", level="error")
         sys.exit(1)
-
-    v = triad_openvr.triad_openvr()
     left_controller, right_controller, hmd = None, None, None
 
     for dev in v.devices.values():
@@ -160,41 +143,35 @@ def initialize_vr_devices():
     return v, left_controller, right_controller, hmd
 
 # === Main headtracking application ===
-async def apply_headtracking_to_right_stick(hmd, left_controller_state, right_controller_state, gamepad, yaw_smoother, pitch_smoother, config):
-    raw_r_x = remap_float_axis(right_controller_state.get("trackpad_x", 0.0) if right_controller_state else 0.0)
-    raw_r_y = remap_float_axis(right_controller_state.get("trackpad_y", 0.0) if right_controller_state else 0.0)
-
-    processed_r_x = apply_sensitivity(
-        apply_deadzone(raw_r_x, config.get("RIGHT_X_DEADZONE", 0.1)),
-        config.get("HEADTRACKING_SENSITIVITY_YAW", 1.5)
-    )
-    processed_r_y = apply_sensitivity(
-        apply_deadzone(raw_r_y, config.get("RIGHT_Y_DEADZONE", 0.1)),
-        config.get("HEADTRACKING_SENSITIVITY_PITCH", 1.5)
-    )
-
+def headtracking_axes(hmd, yaw_smoother, pitch_smoother, config, predictor=None):
+    # Head yaw and pitch as -1..1 stick values; 0 while headtracking is off or without an HMD
+    hmd_x, hmd_y = 0.0, 0.0
     if config.get("HEADTRACKING_ENABLED", True) and hmd:
-        pose = hmd.get_pose_euler()
-        hmd_x, hmd_y = 0.0, 0.0
-        if pose:
-            raw_yaw = pose[4] - initial_yaw
-            raw_pitch = pose[5] - initial_pitch
+        # The predictor compensates for the delay between pose sampling and the game reading the stick
+        pose_mat = predictor.pose_matrix(hmd) if predictor else hmd.get_pose_matrix()
+        if pose_mat is not None:
+            raw_yaw, raw_pitch = head_reference.relative(pose_mat)
+            # Time-based filters step by the pose snapshot's time, not by when they happen to be called
+            t = hmd.frame.timestamp
             if config.get("HEADTRACKING_YAW_ENABLED", True):
                 yaw = apply_sensitivity(
-                    apply_deadzone(raw_yaw, config.get("HEADTRACKING_DEADZONE_X", 0.1)),
+                    apply_axis_deadzone(config, "HEADTRACKING_DEADZONE_X", raw_yaw),
                     config.get("HEADTRACKING_SENSITIVITY_YAW", 1.5)
                 )
-                hmd_x = clamp_and_scale(yaw_smoother.smooth(yaw), config.get("HEADTRACKING_RANGE_DEGREES", 45.0))
+                hmd_x = clamp_and_scale(yaw_smoother.smooth(yaw, t), config.get("HEADTRACKING_RANGE_DEGREES", 45.0))
             if config.get("HEADTRACKING_PITCH_ENABLED", True):
                 pitch = apply_sensitivity(
-                    apply_deadzone(raw_pitch, config.get("HEADTRACKING_DEADZONE_Y", 0.1)),
+                    apply_axis_deadzone(config, "HEADTRACKING_DEADZONE_Y", raw_pitch),
                     config.get("HEADTRACKING_SENSITIVITY_PITCH", 1.5)
                 )
-                hmd_y = clamp_and_scale(pitch_smoother.smooth(pitch), config.get("HEADTRACKING_RANGE_DEGREES", 45.0))
-        right_x = max(min(config.get("JOYSTICK_BLEND_HMD", 0.7) * hmd_x + config.get("JOYSTICK_BLEND_CONTROLLER", 0.3) * processed_r_x, 1.0), -1.0)
-        right_y = max(min(config.get("JOYSTICK_BLEND_HMD", 0.7) * hmd_y + config.get("JOYSTICK_BLEND_CONTROLLER", 0.3) * processed_r_y, 1.0), -1.0)
-    else:
-        right_x = raw_r_x
-        right_y = raw_r_y
-
-    gamepad.right_joystick_float(x_value_float=right_x, y_value_float=-right_y)
+                hmd_y = clamp_and_scale(pitch_smoother.smooth(pitch, t), config.get("HEADTRACKING_RANGE_DEGREES", 45.0))
+    return hmd_x, hmd_y
+
+async def apply_headtracking_to_right_stick(hmd, left_controller_state, right_controller_state, gamepad, yaw_smoother, pitch_smoother, config, poses, predictor=None):
+    # The axis mixer blends the head with the right stick, plus any other configured rows. poses is
+    # the tick's shared pose snapshot; controller sources read it with or without an HMD
+    hmd_x, hmd_y = headtracking_axes(hmd, yaw_smoother, pitch_smoother, config, predictor)
+    mixer = config[AXIS_MIXER_PLAN]
+    mixer.run(left_controller_state, right_controller_state, hmd_x, hmd_y, poses)
+    # Shift (left grip) turns the left stick into a d-pad; the DS4 report's Y axes point down
+    write_mixed_axes(mixer, gamepad, left_stick_free=not left_controller_state.grip_button, invert_y=True)
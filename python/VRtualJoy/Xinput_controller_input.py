@@ -11,6 +11,10 @@ import json
 
 # === Third-party imports ===
 import vgamepad as vg
+from triad_openvr import EMPTY_CONTROLLER_STATE
+from button_dispatch import compile_button_plan, run_button_plan, GRIP_BUTTON_BIT
+from gamepad_output import XInputOutput
+from stick_pipeline import LEFT_STICK_PIPELINE
 
 # === Logger setup ===
 logger = logging.getLogger("Xinput")
@@ -42,39 +46,16 @@ BUTTON_NAME_MAP = {
     "right_trigger": "right_trigger"
 }
 
-# === Input helpers ===
-def extract_input_value(left_controller_state, right_controller_state, remap_key):
-    if ':' in remap_key:
-        controller, input_key = remap_key.split(':', 1)
-        if controller == "left_controller":
-            return left_controller_state.get(input_key, 0.0)
-        elif controller == "right_controller":
-            return right_controller_state.get(input_key, 0.0)
-        return 0.0
-    return left_controller_state.get(remap_key, right_controller_state.get(remap_key, 0.0))
-
-def apply_deadzone_axis(value, threshold):
-    return 0.0 if abs(value) < threshold else value
-
-def remap_float_axis(val):
-    return max(min(val, 1.0), -1.0)
-
 # === Controller polling ===
 async def poll_controller_inputs(left_controller, right_controller):
     return (
-        left_controller.get_controller_inputs() if left_controller else {},
-        right_controller.get_controller_inputs() if right_controller else {}
+        left_controller.read_controller_state() if left_controller else EMPTY_CONTROLLER_STATE,
+        right_controller.read_controller_state() if right_controller else EMPTY_CONTROLLER_STATE
     )
 
 # === Left joystick + D-pad handling ===
 async def process_left_joystick(left_controller_state, right_controller_state, left_grip, gamepad, config):
-    l_joystick_x = apply_deadzone_axis(
-        extract_input_value(left_controller_state, right_controller_state, config["LEFT_X_REMAP"]), config["LEFT_X_DEADZONE"]
-    ) if config["LEFT_X_ENABLED"] else 0.0
-
-    l_joystick_y = apply_deadzone_axis(
-        extract_input_value(left_controller_state, right_controller_state, config["LEFT_Y_REMAP"]), config["LEFT_Y_DEADZONE"]
-    ) if config["LEFT_Y_ENABLED"] else 0.0
+    l_joystick_x, l_joystick_y = config[LEFT_STICK_PIPELINE].evaluate(left_controller_state, right_controller_state)
 
     if left_grip:
         gamepad.press_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_RIGHT) if l_joystick_x > 0.7 else gamepad.release_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_RIGHT)
@@ -90,57 +71,31 @@ async def process_left_joystick(left_controller_state, right_controller_state, l
         gamepad.release_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_DOWN)
 
 # === Trigger and button handling ===
-async def process_triggers_and_buttons(left_controller_state, right_controller_state, left_controller_state_old, right_controller_state_old, gamepad, shift_active, config):
-    mappings_set = config["SHIFT_BUTTON_MAPPINGS"] if shift_active else config["BUTTON_MAPPINGS"]
-
-    for side, state, state_old in [
-        ("left_controller", left_controller_state, left_controller_state_old),
-        ("right_controller", right_controller_state, right_controller_state_old)
-    ]:
-        mappings = mappings_set.get(side, {})
-        for input_name, conf in mappings.items():
-            if not conf.get("enabled", True):
-                continue
+BITMASK_BUTTON_BITS = {"Y": 1 << 1, "X": 1 << 7, "B": 1 << 1, "A": 1 << 7}
+TRIGGER_SETTERS = {"right_trigger": "right_trigger", "left_trigger": "left_trigger"}
+
+def resolve_trigger(target):
+    setter_name = TRIGGER_SETTERS.get(target)
+    return (setter_name, round) if setter_name else None
+
+def input_bit(input_name):
+    # ulButtonPressed bit read for a mapped input; 0 if the input has none
+    if input_name == "grip_button":
+        return GRIP_BUTTON_BIT
+    if input_name.startswith("ButtonPressed_"):
+        return BITMASK_BUTTON_BITS.get(input_name.split("_")[-1], 0)
+    # joystick_pressed has no ControllerState field, so it never changes
+    return 0
+
+def resolve_button(input_name, target):
+    button = BUTTON_NAME_MAP.get(target)
+    bit = input_bit(input_name)
+    return (bit, button) if bit and isinstance(button, int) else None
+
+def compile_button_mappings(mapping_set):
+    return compile_button_plan(mapping_set, resolve_trigger, resolve_button, XInputOutput)
 
-            target = conf.get("target")
-            button = BUTTON_NAME_MAP.get(target)
-
-            # Analog trigger
-            if input_name == "trigger":
-                val = state.get("trigger", 0.0)
-                if target == "right_trigger":
-                    gamepad.right_trigger_float(value_float=val)
-                elif target == "left_trigger":
-                    gamepad.left_trigger_float(value_float=val)
-
-            # Digital grip
-            elif input_name == "grip_button":
-                was_pressed = state_old.get("grip_button", False)
-                is_pressed = state.get("grip_button", False)
-                if is_pressed != was_pressed and isinstance(button, int):
-                    if is_pressed:
-                        gamepad.press_button(button=button)
-                    else:
-                        gamepad.release_button(button=button)
-
-            # Joystick click (formerly "trackpad_pressed")
-            elif input_name == "joystick_pressed":
-                was_pressed = state_old.get("joystick_pressed", False)
-                is_pressed = state.get("joystick_pressed", False)
-                if is_pressed != was_pressed and isinstance(button, int):
-                    if is_pressed:
-                        gamepad.press_button(button=button)
-                    else:
-                        gamepad.release_button(button=button)
-
-            # Bitmask buttons
-            elif input_name.startswith("ButtonPressed_"):
-                bit_name = input_name.split("_")[-1]
-                bit = {"Y": 1 << 1, "X": 1 << 7, "B": 1 << 1, "A": 1 << 7}.get(bit_name, 0)
-                was = state_old.get("ulButtonPressed", 0)
-                now = state.get("ulButtonPressed", 0)
-                if (now & bit) != (was & bit) and isinstance(button, int):
-                    if now & bit:
-                        gamepad.press_button(button=button)
-                    else:
-                        gamepad.release_button(button=button)
+async def process_triggers_and_buttons(left_controller_state, right_controller_state, left_controller_state_old, right_controller_state_old, gamepad, shift_active, config):
+    plan = config["SHIFT_BUTTON_PLAN"] if shift_active else config["BUTTON_PLAN"]
+    run_button_plan(plan, left_controller_state, right_controller_state,
+                    left_controller_state_old, right_controller_state_old, gamepad)
@@ -13,6 +13,7 @@ import json
 import openvr
 import vgamepad as vg
 import triad_openvr
+from triad_openvr import EMPTY_CONTROLLER_STATE
 
 # Base directory is now the parent of this script's folder
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -21,18 +22,50 @@ sys.path.insert(0, VRTUALJOY_DIR)
 
 # Import from vrtualjoy
 from Xinput_motion_tracking import (
-    load_calibration, handle_calibration, apply_headtracking_to_right_stick,
-    Smoother
+    load_calibration, handle_calibration, apply_headtracking_to_right_stick
 )
 from Xinput_controller_input import (
     poll_controller_inputs, process_left_joystick,
-    process_triggers_and_buttons, extract_input_value, apply_deadzone_axis
+    process_triggers_and_buttons,
+    compile_button_mappings, input_bit
 )
+from axis_mixer import compile_axis_mixer, AXIS_MIXER_PLAN
+from action_input import ActionInput, write_action_manifest, compare_input_cost
+from adaptive_rate import AdaptiveRate
+from button_events import ButtonEdgeTracker
+from config_watcher import ConfigWatcher
+from dynamic_deadzone import create_dynamic_deadzones, DYNAMIC_DEADZONES
+from head_filters import create_head_filter, describe_head_filters
+from head_prediction import create_head_predictor, HeadTraceRecorder
+from input_recording import InputRecorder
+from shared_state import SharedStatePublisher, SHARED_STATE_NAME
+from startup import PROFILE, run_in_parallel, wait_for_gamepad_ready, ANNOUNCE_HOLD_S
+from stage_timing import (
+    StageTimings, MAIN_LOOP_STAGES, STAGE_INPUT, STAGE_CALIBRATION, STAGE_LEFT_STICK,
+    STAGE_BUTTONS, STAGE_HEADTRACKING, STAGE_SUBMIT
+)
+from stick_pipeline import compile_stick_pipelines, LEFT_STICK_PIPELINE, RIGHT_STICK_PIPELINE
+from gamepad_output import XInputOutput
+from tick_scheduler import TickScheduler, VsyncSource, OVERRUN_SKIP, OVERRUN_BURST
 
 # Argument parsing
 parser = argparse.ArgumentParser(description="XInput VR bridge")
 parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
 parser.add_argument("--hz", type=float, default=70.0, help="Update frequency (Hz)")
+parser.add_argument("--overrun", choices=[OVERRUN_SKIP, OVERRUN_BURST], default=OVERRUN_SKIP, help="What to do when a tick overruns its deadline")
+parser.add_argument("--spin-us", type=float, default=500.0, help="Busy-wait the last N microseconds before each tick deadline")
+parser.add_argument("--vsync", action="store_true", help="Align ticks to the compositor vsync cadence")
+parser.add_argument("--threaded-output", action="store_true", help="Submit gamepad reports from a dedicated writer thread")
+parser.add_argument("--input-backend", choices=["legacy", "actions"], default="legacy", help="Read controllers via getControllerState (legacy) or an IVRInput action manifest")
+parser.add_argument("--bench-input", action="store_true", help="Time legacy vs action input reads per tick, then exit")
+parser.add_argument("--record-head", metavar="PATH", help="Record the HMD pose every tick to a CSV trace for prediction_eval.py")
+parser.add_argument("--record-input", metavar="PATH", help="Record raw poses and controller states every tick for replay.py")
+parser.add_argument("--stage-timing", action="store_true", help="Log per-stage timing histograms (p50/p99/max) for the main loop")
+parser.add_argument("--config-poll-s", type=float, default=1.0, help="How often to check main_config.json for changes (0 disables hot reload)")
+parser.add_argument("--share-state", nargs="?", const=SHARED_STATE_NAME, metavar="NAME", help="Publish poses, controller states and the gamepad report to shared memory every tick (see shared_state.py)")
+parser.add_argument("--idle-hz", type=float, default=0.0, help="Drop to this tick rate while the HMD is off or nothing moves (0 keeps the full rate)")
+parser.add_argument("--idle-after-s", type=float, default=30.0, help="Seconds without input or movement before dropping to --idle-hz")
+parser.add_argument("--startup-profile", action="store_true", help="Log how long each import and init phase took")
 args = parser.parse_args()
 VERBOSE = args.verbose
 HZ = args.hz
@@ -60,35 +93,48 @@ def log_and_print(message, level='info'):
 
 CONFIG_FILE = os.path.abspath(os.path.join(VRTUALJOY_DIR, '..', '..', 'main_config.json'))
 
+def build_config(full_config):
+    # Turns a parsed main_config.json into the bridge config: base keys plus compiled XINPUT mappings
+    mappings = full_config.get("MAPPINGS", {}).get("XINPUT", {})
+
+    # Add "enabled" flag automatically based on "target"
+    def process_mapping_set(mapping_set):
+        processed = {}
+        for controller, buttons in mapping_set.items():
+            processed[controller] = {}
+            for button_name, config in buttons.items():
+                config["enabled"] = bool(config.get("target"))
+                processed[controller][button_name] = config
+        return processed
+
+    mappings["BUTTON_MAPPINGS"] = process_mapping_set(mappings.get("BUTTON_MAPPINGS", {}))
+    mappings["SHIFT_BUTTON_MAPPINGS"] = process_mapping_set(mappings.get("SHIFT_BUTTON_MAPPINGS", {}))
+
+    # Compile both mapping sets into bitmask dispatch plans once, not per tick
+    mappings["BUTTON_PLAN"] = compile_button_mappings(mappings["BUTTON_MAPPINGS"])
+    mappings["SHIFT_BUTTON_PLAN"] = compile_button_mappings(mappings["SHIFT_BUTTON_MAPPINGS"])
+
+    # Combine base config with processed mappings and the compiled stick pipelines
+    deadzones = create_dynamic_deadzones(full_config, HZ)
+    pipelines = compile_stick_pipelines(full_config, deadzones)
+    return {
+        **{k: v for k, v in full_config.items() if k != "MAPPINGS"},
+        **mappings,
+        DYNAMIC_DEADZONES: deadzones,
+        **pipelines,
+        AXIS_MIXER_PLAN: compile_axis_mixer(full_config, pipelines)
+    }
+
 def load_config():
     if os.path.exists(CONFIG_FILE):
         try:
             with open(CONFIG_FILE, 'r') as f:
                 full_config = json.load(f)
                 log_and_print("Config loaded from main_config.json.")
-
-                # Extract XINPUT mappings only
-                mappings = full_config.get("MAPPINGS", {}).get("XINPUT", {})
-
-                # Add "enabled" flag automatically based on "target"
-                def process_mapping_set(mapping_set):
-                    processed = {}
-                    for controller, buttons in mapping_set.items():
-                        processed[controller] = {}
-                        for button_name, config in buttons.items():
-                            config["enabled"] = bool(config.get("target"))
-                            processed[controller][button_name] = config
-                    return processed
-
-                mappings["BUTTON_MAPPINGS"] = process_mapping_set(mappings.get("BUTTON_MAPPINGS", {}))
-                mappings["SHIFT_BUTTON_MAPPINGS"] = process_mapping_set(mappings.get("SHIFT_BUTTON_MAPPINGS", {}))
-
-                # Combine base config with processed mappings
-                xinput_config = {
-                    **{k: v for k, v in full_config.items() if k != "MAPPINGS"},
-                    **mappings
-                }
-
+                xinput_config = build_config(full_config)
+                log_and_print(f"Button plan: {xinput_config['BUTTON_PLAN'].describe()}", level="debug")
+                for key in (LEFT_STICK_PIPELINE, RIGHT_STICK_PIPELINE, AXIS_MIXER_PLAN):
+                    log_and_print(xinput_config[key].describe(), level="debug")
                 return xinput_config
         except Exception as e:
             log_and_print(f"Failed to load config file: {e}", level="error")
@@ -98,12 +144,14 @@ def load_config():
 def initialize_gamepad():
     try:
         gamepad = vg.VX360Gamepad()
+        if wait_for_gamepad_ready(gamepad) is None:
+            log_and_print("Virtual gamepad not enumerated by XInput yet, continuing anyway.", level="warning")
+        # Tap A so games that switch to the most recently active pad pick this one up
         gamepad.press_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_A)
         gamepad.update()
-        time.sleep(0.5)
+        time.sleep(ANNOUNCE_HOLD_S)
         gamepad.release_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_A)
         gamepad.update()
-        time.sleep(0.5)
         return gamepad
     except Exception as e:
         log_and_print(f"Error initializing gamepad: {e}", level="error")
@@ -121,7 +169,7 @@ def get_controller_role_index(device_index):
     return "left" if role == openvr.TrackedControllerRole_LeftHand else "right" if role == openvr.TrackedControllerRole_RightHand else "unknown"
 
 def initialize_vr_devices():
-    openvr.init(openvr.VRApplication_Other)
+    # triad_openvr calls openvr.init itself
     v = triad_openvr.triad_openvr()
     left_controller = right_controller = hmd = None
 
@@ -154,62 +202,172 @@ def initialize_vr_devices():
 
     return v, left_controller, right_controller, hmd
 
-def validate_interval():
-    return 1 / HZ
-
-async def main_loop(left_controller, right_controller, hmd, gamepad, interval, config):
-    yaw_smoother = Smoother(alpha=config.get("HEADTRACKING_SMOOTHING_YAW", 0.2))
-    pitch_smoother = Smoother(alpha=config.get("HEADTRACKING_SMOOTHING_PITCH", 0.2))
-    left_controller_state_old = {}
-    right_controller_state_old = {}
+def create_scheduler(v):
+    vsync = VsyncSource(v.vrsystem) if args.vsync else None
+    scheduler = TickScheduler(HZ, overrun_policy=args.overrun, spin_s=args.spin_us / 1e6, vsync=vsync)
+    if args.vsync and scheduler.vsync is None:
+        log_and_print("Display frequency unavailable, vsync alignment disabled.", level="warning")
+    return scheduler
+
+def create_action_input(config):
+    mapping_sets = (config.get("BUTTON_MAPPINGS", {}), config.get("SHIFT_BUTTON_MAPPINGS", {}))
+    manifest_path = write_action_manifest(os.path.join(VRTUALJOY_DIR, "actions"), mapping_sets, input_bit)
+    log_and_print(f"Action manifest written to {manifest_path}")
+    return ActionInput(openvr.VRInput(), manifest_path, mapping_sets, input_bit)
+
+def log_input_benchmark(action_input, left_controller, right_controller):
+    results = compare_input_cost(action_input, left_controller, right_controller)
+    log_and_print(f"Input read cost per tick: legacy {results['legacy']:.1f} us, actions {results['actions']:.1f} us")
+
+def apply_reloaded_config(reloaded, v, output, yaw_smoother, pitch_smoother):
+    config, changes = reloaded
+    for change in changes:
+        log_and_print(f"Config changed: {change}")
+    yaw_smoother = create_head_filter(config, "yaw", HZ, yaw_smoother)
+    pitch_smoother = create_head_filter(config, "pitch", HZ, pitch_smoother)
+    log_and_print(describe_head_filters(yaw_smoother, pitch_smoother), level="debug")
+    output.keepalive_s = config.get("GAMEPAD_KEEPALIVE_MS", 0) / 1000.0
+    predictor = create_head_predictor(config, v.frame)
+    log_and_print(predictor.describe(), level="debug")
+    return config, predictor, yaw_smoother, pitch_smoother
+
+async def main_loop(v, left_controller, right_controller, hmd, output, scheduler, config, action_input=None):
+    yaw_smoother = create_head_filter(config, "yaw", HZ)
+    pitch_smoother = create_head_filter(config, "pitch", HZ)
+    left_controller_state_old = EMPTY_CONTROLLER_STATE
+    right_controller_state_old = EMPTY_CONTROLLER_STATE
     last_shift_active = None
+    pose_fetches = v.pose_fetch_count
+    button_edges = ButtonEdgeTracker()
+    predictor = create_head_predictor(config, v.frame)
+    log_and_print(predictor.describe())
+    log_and_print(describe_head_filters(yaw_smoother, pitch_smoother))
+    head_trace = HeadTraceRecorder(args.record_head) if args.record_head and hmd else None
+    if args.record_head and not hmd:
+        log_and_print("No HMD detected, --record-head ignored.", level="warning")
+    input_recorder = InputRecorder(args.record_input, hmd, left_controller, right_controller, HZ) if args.record_input else None
+    timings = StageTimings(MAIN_LOOP_STAGES, 1.0 / HZ) if args.stage_timing else None
+    config_watcher = ConfigWatcher(CONFIG_FILE, build_config, log_and_print, args.config_poll_s) if args.config_poll_s > 0 else None
+    state_publisher = SharedStatePublisher(args.share_state, hmd, left_controller, right_controller, "xinput") if args.share_state else None
+    adaptive_rate = AdaptiveRate(scheduler, hmd, left_controller, right_controller, HZ, args.idle_hz, args.idle_after_s,
+                                 log_and_print) if args.idle_hz > 0 else None
+    interaction_events = adaptive_rate.interaction_events if adaptive_rate else None
+    stats_sources = (scheduler, output, button_edges) + tuple(
+        source for source in (action_input, head_trace, input_recorder, timings, config_watcher, state_publisher, adaptive_rate) if source
+    )
+    config[AXIS_MIXER_PLAN].bind(hmd, left_controller, right_controller)
+    scheduler.start()
 
-    while True:
-        start = time.perf_counter()
-        left_controller_state, right_controller_state = await poll_controller_inputs(left_controller, right_controller)
-        left_grip = left_controller_state.get("grip_button", False)
-        await handle_calibration(left_controller, right_controller, hmd, left_grip)
-        await process_left_joystick(left_controller_state, right_controller_state, left_grip, gamepad, config)
-
-        shift_active = left_grip
-        if shift_active != last_shift_active:
-            log_and_print(f"Shift mode: {'ON' if shift_active else 'OFF'}", level="debug")
-            last_shift_active = shift_active
-
-        await process_triggers_and_buttons(
-            left_controller_state, right_controller_state,
-            left_controller_state_old, right_controller_state_old,
-            gamepad, shift_active, config
-        )
-
-        raw_r_x = apply_deadzone_axis(
-            extract_input_value(left_controller_state, right_controller_state, config["RIGHT_X_REMAP"]),
-            config["RIGHT_X_DEADZONE"]
-        ) if config["RIGHT_X_ENABLED"] else 0.0
-
-        raw_r_y = apply_deadzone_axis(
-            extract_input_value(left_controller_state, right_controller_state, config["RIGHT_Y_REMAP"]),
-            config["RIGHT_Y_DEADZONE"]
-        ) if config["RIGHT_Y_ENABLED"] else 0.0
-
-        apply_headtracking_to_right_stick(hmd, gamepad, raw_r_x, raw_r_y, yaw_smoother, pitch_smoother, config)
-
-        gamepad = safe_gamepad_update(gamepad)
-        left_controller_state_old = left_controller_state
-        right_controller_state_old = right_controller_state
-
-        await asyncio.sleep(max(0, interval - (time.perf_counter() - start)))
+    try:
+        while True:
+            # Swap in a reloaded config between ticks; it was validated and built off the tick path
+            if config_watcher:
+                reloaded = config_watcher.take()
+                if reloaded:
+                    config, predictor, yaw_smoother, pitch_smoother = apply_reloaded_config(reloaded, v, output, yaw_smoother, pitch_smoother)
+                    config[AXIS_MIXER_PLAN].bind(hmd, left_controller, right_controller)
+            if timings:
+                timings.begin()
+            # One pose snapshot per tick, shared by calibration and headtracking
+            v.update_frame()
+            if head_trace:
+                head_trace.record(hmd, v.frame.timestamp)
+            # Drain button events so taps shorter than a tick still reach the mapping stage
+            v.poll_vr_events(button_edges.edges, interaction_events)
+            if action_input is not None:
+                # Button events carry legacy bits per device index, so edges only apply to the legacy path
+                left_controller_state, right_controller_state = action_input.read()
+            else:
+                left_controller_state, right_controller_state = await poll_controller_inputs(left_controller, right_controller)
+                button_edges.apply(left_controller, left_controller_state)
+                button_edges.apply(right_controller, right_controller_state)
+            button_edges.end_tick()
+            if input_recorder:
+                input_recorder.record(v.frame, left_controller_state, right_controller_state)
+            if adaptive_rate:
+                adaptive_rate.update(v.frame, left_controller_state, right_controller_state)
+            if timings:
+                timings.lap(STAGE_INPUT)
+            left_grip = left_controller_state.grip_button
+            await handle_calibration(left_controller, right_controller, hmd, left_grip)
+            if timings:
+                timings.lap(STAGE_CALIBRATION)
+            await process_left_joystick(left_controller_state, right_controller_state, left_grip, output, config)
+            if timings:
+                timings.lap(STAGE_LEFT_STICK)
+
+            shift_active = left_grip
+            if shift_active != last_shift_active:
+                log_and_print(f"Shift mode: {'ON' if shift_active else 'OFF'}", level="debug")
+                last_shift_active = shift_active
+
+            await process_triggers_and_buttons(
+                left_controller_state, right_controller_state,
+                left_controller_state_old, right_controller_state_old,
+                output, shift_active, config
+            )
+            if timings:
+                timings.lap(STAGE_BUTTONS)
+
+            apply_headtracking_to_right_stick(hmd, left_controller_state, right_controller_state, output,
+                                              yaw_smoother, pitch_smoother, config, v.frame.get(), predictor)
+            if timings:
+                timings.lap(STAGE_HEADTRACKING)
+
+            output.submit()
+            if state_publisher:
+                state_publisher.publish(v.frame, left_controller_state, right_controller_state, output.report)
+            if timings:
+                timings.lap(STAGE_SUBMIT)
+                timings.end()
+            left_controller_state_old = left_controller_state
+            right_controller_state_old = right_controller_state
+
+            tick_fetches = v.pose_fetch_count - pose_fetches
+            pose_fetches = v.pose_fetch_count
+            if tick_fetches != 1:
+                log_and_print(f"Expected 1 pose fetch per tick, got {tick_fetches}", level="warning")
+
+            if scheduler.report_due():
+                for source in stats_sources:
+                    logger.info(source.summary())
+            await scheduler.wait()
+    finally:
+        for source in stats_sources:
+            log_and_print(source.summary())
+        if config.get(DYNAMIC_DEADZONES):
+            log_and_print(config[DYNAMIC_DEADZONES].describe())
+        output.close()
+        if head_trace:
+            head_trace.close()
+        if input_recorder:
+            input_recorder.close()
+        if config_watcher:
+            config_watcher.close()
+        if state_publisher:
+            state_publisher.close()
 
 async def main():
     try:
         log_and_print("Starting VRtualJoy Xinput Mode...", level="info")
-        v, left_controller, right_controller, hmd = initialize_vr_devices()
-        gamepad = initialize_gamepad()
-        interval = validate_interval()
-        config = load_config()
-        load_calibration()
-        log_and_print("Calibration loaded from file.")
-        await main_loop(left_controller, right_controller, hmd, gamepad, interval, config)
+        # OpenVR and the virtual gamepad come up on worker threads at the same time
+        (v, left_controller, right_controller, hmd), gamepad = await run_in_parallel(
+            ("openvr init", initialize_vr_devices), ("gamepad init", initialize_gamepad)
+        )
+        scheduler = create_scheduler(v)
+        with PROFILE.phase("config and calibration"):
+            config = load_config()
+            load_calibration(hmd.get_serial())
+        if args.startup_profile:
+            log_and_print(PROFILE.report())
+        output = XInputOutput(gamepad, safe_gamepad_update, keepalive_s=config.get("GAMEPAD_KEEPALIVE_MS", 0) / 1000.0,
+                              threaded=args.threaded_output)
+        action_input = create_action_input(config) if args.input_backend == "actions" or args.bench_input else None
+        if args.bench_input:
+            log_input_benchmark(action_input, left_controller, right_controller)
+            return
+        await main_loop(v, left_controller, right_controller, hmd, output, scheduler, config,
+                        action_input=action_input if args.input_backend == "actions" else None)
     except Exception as e:
         log_and_print(f"Fatal error: {e}", level="error")
         raise
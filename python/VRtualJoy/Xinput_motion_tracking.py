@@ -7,12 +7,17 @@ import logging
 import os
 import sys
 import time
-import json
 
 # === Third-party imports ===
 import openvr
 import triad_openvr
 
+# === Local project imports ===
+from axis_mixer import AXIS_MIXER_PLAN, write_mixed_axes
+from calibration_store import CalibrationStore
+from dynamic_deadzone import apply_axis_deadzone
+from rotation import HeadReference, head_yaw_pitch, matrix_to_quaternion
+
 # === Logger setup ===
 logger = logging.getLogger("Xinput")
 
@@ -28,45 +33,32 @@ def log_and_print(message, level='info'):
         logger.debug(message)
 
 # === Globals ===
-initial_yaw = 0.0
-initial_pitch = 0.0
+head_reference = HeadReference()   # Zero orientation headtracking is measured from
 is_calibrated = False
 last_calibration_time = 0
 
 CALIBRATION_FILE = os.path.join(os.path.dirname(os.path.realpath(__file__)), "xinput_calibration.json")
 
-# === Smoother class ===
-class Smoother:
-    def __init__(self, alpha=0.2):
-        self.alpha = alpha
-        self.last = 0.0
-
-    def smooth(self, value):
-        self.last = (self.alpha * value) + ((1 - self.alpha) * self.last)
-        return self.last
-
 # === Calibration I/O ===
-def save_calibration(yaw, pitch):
-    global initial_yaw, initial_pitch, is_calibrated
-    initial_yaw = yaw
-    initial_pitch = pitch
-    with open(CALIBRATION_FILE, 'w') as f:
-        json.dump({"yaw": yaw, "pitch": pitch}, f)
+calibration_store = CalibrationStore(CALIBRATION_FILE, log_and_print)
+
+def save_calibration(yaw, pitch, serial=None, quaternion=None):
+    global head_reference, is_calibrated
+    head_reference = HeadReference(yaw, pitch, quaternion)
     is_calibrated = True
+    # Only a memory write here; the store persists it from its writer thread
+    calibration_store.set(serial, yaw, pitch, quaternion)
     log_and_print("Calibration complete and saved.")
 
-def load_calibration():
-    global initial_yaw, initial_pitch, is_calibrated
-    if os.path.exists(CALIBRATION_FILE):
-        try:
-            with open(CALIBRATION_FILE, 'r') as f:
-                data = json.load(f)
-                initial_yaw = data.get("yaw", 0.0)
-                initial_pitch = data.get("pitch", 0.0)
-                is_calibrated = True
-                log_and_print("Calibration loaded from file.")
-        except Exception as e:
-            log_and_print(f"Failed to load calibration file: {e}", level="error")
+def load_calibration(serial=None):
+    global head_reference, is_calibrated
+    calibration = calibration_store.get(serial)
+    if calibration is not None:
+        yaw, pitch, quaternion = calibration
+        # Older files only have the angles
+        head_reference = HeadReference.from_quaternion(quaternion) if quaternion else HeadReference(yaw, pitch)
+        is_calibrated = True
+        log_and_print(f"Calibration loaded from file for HMD {serial or 'default'}.")
 
 # === Calibration logic ===
 def check_calibration_gesture(hmd, left_controller, right_controller):
@@ -99,12 +91,12 @@ async def handle_calibration(left_controller, right_controller, hmd, left_grip):
     now = time.time()
     if left_grip and now - last_calibration_time >= 1.0:
         if check_calibration_gesture(hmd, left_controller, right_controller):
-            pose = hmd.get_pose_euler()
-            if pose:
-                save_calibration(pose[4], pose[5])
+            pose_mat = hmd.get_pose_matrix()
+            if pose_mat is not None:
+                yaw, pitch = head_yaw_pitch(pose_mat)
+                save_calibration(yaw, pitch, hmd.get_serial(), matrix_to_quaternion(pose_mat))
                 asyncio.create_task(give_haptic_feedback(left_controller, right_controller))
                 last_calibration_time = now
-                await asyncio.sleep(0.1)
 
 # === VR Headtracking ===
 def clamp_and_scale(value, range_degrees):
@@ -112,39 +104,37 @@ def clamp_and_scale(value, range_degrees):
     clamped = max(-max_range, min(max_range, value))
     return clamped / max_range
 
-def apply_deadzone(value, deadzone):
-    return 0.0 if abs(value) < deadzone else value
-
 def apply_sensitivity(value, sensitivity):
     return value * sensitivity
 
-def apply_headtracking_to_right_stick(hmd, gamepad, raw_r_x, raw_r_y, yaw_smoother, pitch_smoother, config):
+def headtracking_axes(hmd, yaw_smoother, pitch_smoother, config, predictor=None):
+    # Head yaw and pitch as -1..1 stick values; 0 while headtracking is off or uncalibrated
+    hmd_x = hmd_y = 0.0
     if config.get("HEADTRACKING_ENABLED", True):
-        pose = hmd.get_pose_euler()
-        hmd_x = hmd_y = 0.0
+        # The predictor compensates for the delay between pose sampling and the game reading the stick
+        pose_mat = predictor.pose_matrix(hmd) if predictor else hmd.get_pose_matrix()
 
-        if pose and is_calibrated:
-            raw_yaw = pose[4] - initial_yaw
-            raw_pitch = pose[5] - initial_pitch
+        if pose_mat is not None and is_calibrated:
+            raw_yaw, raw_pitch = head_reference.relative(pose_mat)
 
             yaw = apply_sensitivity(raw_yaw, config.get("HEADTRACKING_SENSITIVITY_YAW", 1.5))
             pitch = apply_sensitivity(raw_pitch, config.get("HEADTRACKING_SENSITIVITY_PITCH", 1.5))
 
-            yaw = apply_deadzone(yaw, config.get("HEADTRACKING_DEADZONE_X", 0.1))
-            pitch = apply_deadzone(pitch, config.get("HEADTRACKING_DEADZONE_Y", 0.1))
-
-            hmd_x = clamp_and_scale(yaw_smoother.smooth(yaw), config.get("HEADTRACKING_RANGE_DEGREES", 45.0))
-            hmd_y = clamp_and_scale(pitch_smoother.smooth(pitch), config.get("HEADTRACKING_RANGE_DEGREES", 45.0))
-
-        right_x = max(min(
-            config.get("JOYSTICK_BLEND_HMD", 0.7) * hmd_x +
-            config.get("JOYSTICK_BLEND_CONTROLLER", 0.3) * raw_r_x, 1.0), -1.0)
-        right_y = max(min(
-            config.get("JOYSTICK_BLEND_HMD", 0.7) * hmd_y +
-            config.get("JOYSTICK_BLEND_CONTROLLER", 0.3) * raw_r_y, 1.0), -1.0)
-    else:
-        right_x = raw_r_x
-        right_y = raw_r_y
-
-    gamepad.right_joystick_float(x_value_float=right_x, y_value_float=right_y)
+            yaw = apply_axis_deadzone(config, "HEADTRACKING_DEADZONE_X", yaw)
+            pitch = apply_axis_deadzone(config, "HEADTRACKING_DEADZONE_Y", pitch)
+
+            # Time-based filters step by the pose snapshot's time, not by when they happen to be called
+            t = hmd.frame.timestamp
+            hmd_x = clamp_and_scale(yaw_smoother.smooth(yaw, t), config.get("HEADTRACKING_RANGE_DEGREES", 45.0))
+            hmd_y = clamp_and_scale(pitch_smoother.smooth(pitch, t), config.get("HEADTRACKING_RANGE_DEGREES", 45.0))
+    return hmd_x, hmd_y
+
+def apply_headtracking_to_right_stick(hmd, left_controller_state, right_controller_state, gamepad, yaw_smoother, pitch_smoother, config, poses, predictor=None):
+    # The axis mixer blends the head with the right stick, plus any other configured rows. poses is
+    # the tick's shared pose snapshot; controller sources read it with or without an HMD
+    hmd_x, hmd_y = headtracking_axes(hmd, yaw_smoother, pitch_smoother, config, predictor)
+    mixer = config[AXIS_MIXER_PLAN]
+    mixer.run(left_controller_state, right_controller_state, hmd_x, hmd_y, poses)
+    # Left grip turns the left stick into a d-pad
+    write_mixed_axes(mixer, gamepad, left_stick_free=not left_controller_state.grip_button)
 
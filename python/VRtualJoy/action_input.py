@@ -0,0 +1,207 @@
+# action_input.py
+
+# IVRInput backend: reads controllers through an action manifest generated from
+# main_config.json instead of the deprecated IVRSystem.getControllerState. One
+# updateActionState call per tick refreshes every action; the results are packed into the
+# same ControllerState objects the legacy path produces, so the mapping stage is unchanged.
+
+# === Standard library imports ===
+import ctypes
+import json
+import os
+import time
+
+# === Third-party imports ===
+import openvr
+from triad_openvr import ControllerState
+
+# === Constants ===
+ACTION_SET = "/actions/vrtualjoy"
+HANDS = {"left_controller": "left", "right_controller": "right"}
+
+# Default binding sources per controller type: input name -> (component, mode, input)
+DEFAULT_BINDING_SOURCES = {
+    "knuckles": {
+        "left": {"ButtonPressed_X": ("a", "button", "click"), "ButtonPressed_Y": ("b", "button", "click")},
+        "right": {"ButtonPressed_A": ("a", "button", "click"), "ButtonPressed_B": ("b", "button", "click")},
+        "common": {"grip_button": ("grip", "grab", "grab"), "trigger": ("trigger", "trigger", "pull"),
+                   "stick": ("thumbstick", "joystick", "position")}
+    },
+    "oculus_touch": {
+        "left": {"ButtonPressed_X": ("x", "button", "click"), "ButtonPressed_Y": ("y", "button", "click")},
+        "right": {"ButtonPressed_A": ("a", "button", "click"), "ButtonPressed_B": ("b", "button", "click")},
+        "common": {"grip_button": ("grip", "button", "click"), "trigger": ("trigger", "trigger", "pull"),
+                   "stick": ("joystick", "joystick", "position")}
+    }
+}
+
+
+# === Manifest generation ===
+def action_name(side, input_name):
+    return f"{ACTION_SET}/in/{side}_{input_name}"
+
+def collect_digital_inputs(mapping_sets, input_bit):
+    # Every input with a ulButtonPressed bit in any mapping set, per side, in config order
+    inputs = {side: [] for side in HANDS}
+    for mapping_set in mapping_sets:
+        for side in HANDS:
+            for input_name in mapping_set.get(side, {}):
+                if input_bit(input_name) and input_name not in inputs[side]:
+                    inputs[side].append(input_name)
+    return inputs
+
+def build_action_manifest(mapping_sets, input_bit):
+    digital_inputs = collect_digital_inputs(mapping_sets, input_bit)
+    actions = []
+    localization = {"language_tag": "en_US", ACTION_SET: "VRtualJoy"}
+    for side in HANDS:
+        entries = [("trigger", "vector1"), ("stick", "vector2")] + [(name, "boolean") for name in digital_inputs[side]]
+        for input_name, action_type in entries:
+            name = action_name(side, input_name)
+            actions.append({"name": name, "type": action_type})
+            localization[name] = f"{side.replace('_', ' ')} {input_name}"
+    return {
+        "default_bindings": [
+            {"controller_type": controller_type, "binding_url": f"bindings_{controller_type}.json"}
+            for controller_type in DEFAULT_BINDING_SOURCES
+        ],
+        "actions": actions,
+        "action_sets": [{"name": ACTION_SET, "usage": "leftright"}],
+        "localization": [localization]
+    }
+
+def build_default_binding(controller_type, digital_inputs):
+    table = DEFAULT_BINDING_SOURCES[controller_type]
+    sources = []
+    for side, hand in HANDS.items():
+        for input_name in ["trigger", "stick"] + digital_inputs[side]:
+            source = table[hand].get(input_name) or table["common"].get(input_name)
+            if source is None:
+                continue
+            component, mode, input_key = source
+            sources.append({
+                "path": f"/user/hand/{hand}/input/{component}",
+                "mode": mode,
+                "inputs": {input_key: {"output": action_name(side, input_name)}}
+            })
+    return {"controller_type": controller_type, "bindings": {ACTION_SET: {"sources": sources}}}
+
+def write_action_manifest(directory, mapping_sets, input_bit):
+    """
+    Writes actions.json plus default bindings into directory and returns the manifest path.
+    """
+    os.makedirs(directory, exist_ok=True)
+    digital_inputs = collect_digital_inputs(mapping_sets, input_bit)
+    files = {"actions.json": build_action_manifest(mapping_sets, input_bit)}
+    for controller_type in DEFAULT_BINDING_SOURCES:
+        files[f"bindings_{controller_type}.json"] = build_default_binding(controller_type, digital_inputs)
+    for filename, content in files.items():
+        with open(os.path.join(directory, filename), 'w') as f:
+            json.dump(content, f, indent=2)
+    return os.path.abspath(os.path.join(directory, "actions.json"))
+
+
+# === Runtime ===
+class ActionHand:
+    __slots__ = ("trigger", "stick", "buttons", "states")
+
+    def __init__(self, trigger, stick, buttons):
+        self.trigger = trigger
+        self.stick = stick
+        self.buttons = buttons
+        self.states = [ControllerState(), ControllerState()]
+
+
+class ActionInput:
+    """
+    Reads both hands from IVRInput with a single updateActionState per tick.
+
+    Action handles are resolved once. Digital and analog reads go through the IVRInput function
+    table into preallocated structs, so a tick allocates nothing but the resulting floats.
+    """
+    def __init__(self, vr_input, manifest_path, mapping_sets, input_bit):
+        vr_input.setActionManifestPath(manifest_path)
+        self.action_set = vr_input.getActionSetHandle(ACTION_SET)
+        self.active_sets = (openvr.VRActiveActionSet_t * 1)()
+        self.active_sets[0].ulActionSet = self.action_set
+        self.active_sets_ref = ctypes.byref(self.active_sets[0])
+        self.active_set_size = ctypes.sizeof(openvr.VRActiveActionSet_t)
+
+        functions = vr_input.function_table
+        self._update_action_state = functions.updateActionState
+        self._get_digital = functions.getDigitalActionData
+        self._get_analog = functions.getAnalogActionData
+        self.digital = openvr.InputDigitalActionData_t()
+        self.digital_ref = ctypes.byref(self.digital)
+        self.digital_size = ctypes.sizeof(openvr.InputDigitalActionData_t)
+        self.analog = openvr.InputAnalogActionData_t()
+        self.analog_ref = ctypes.byref(self.analog)
+        self.analog_size = ctypes.sizeof(openvr.InputAnalogActionData_t)
+
+        digital_inputs = collect_digital_inputs(mapping_sets, input_bit)
+        self.hands = []
+        for side in HANDS:
+            buttons = tuple((vr_input.getActionHandle(action_name(side, input_name)), input_bit(input_name))
+                            for input_name in digital_inputs[side])
+            self.hands.append(ActionHand(vr_input.getActionHandle(action_name(side, "trigger")),
+                                         vr_input.getActionHandle(action_name(side, "stick")),
+                                         buttons))
+        self.packet = 0
+        self.errors = 0
+
+    def _read_hand(self, hand):
+        hand.states.reverse()
+        state = hand.states[0]
+        analog = self.analog
+        invalid = openvr.k_ulInvalidInputValueHandle
+        if self._get_analog(hand.trigger, self.analog_ref, self.analog_size, invalid):
+            self.errors += 1
+        state.trigger = analog.x
+        if self._get_analog(hand.stick, self.analog_ref, self.analog_size, invalid):
+            self.errors += 1
+        state.trackpad_x = analog.x
+        state.trackpad_y = analog.y
+        pressed = 0
+        digital = self.digital
+        for handle, bit in hand.buttons:
+            if self._get_digital(handle, self.digital_ref, self.digital_size, invalid):
+                self.errors += 1
+            elif digital.bState:
+                pressed |= bit
+        state.unPacketNum = self.packet
+        state.set_buttons_pressed(pressed)
+        return state
+
+    def read(self):
+        """
+        Returns (left_state, right_state). Each hand double-buffers its ControllerState, so the
+        previous tick's objects stay valid as the "old" states for edge detection.
+        """
+        if self._update_action_state(self.active_sets_ref, self.active_set_size, 1):
+            self.errors += 1
+        self.packet += 1
+        return self._read_hand(self.hands[0]), self._read_hand(self.hands[1])
+
+    def summary(self):
+        return f"Action input: {self.packet} update(s), {self.errors} IVRInput error(s)"
+
+
+# === Benchmark ===
+def compare_input_cost(action_input, left_controller, right_controller, ticks=2000):
+    """
+    Times the legacy getControllerState path against ActionInput.read() on the live runtime.
+    Returns microseconds per tick for each.
+    """
+    def legacy_tick():
+        if left_controller:
+            left_controller.read_controller_state()
+        if right_controller:
+            right_controller.read_controller_state()
+
+    results = {}
+    for name, tick in (("legacy", legacy_tick), ("actions", action_input.read)):
+        start = time.perf_counter()
+        for _ in range(ticks):
+            tick()
+        results[name] = (time.perf_counter() - start) * 1e6 / ticks
+    return results
@@ -0,0 +1,116 @@
+# adaptive_rate.py
+
+# Drops the main loop to a low idle tick rate while nobody is using the headset, and back to the
+# full rate on the first tick that sees activity. Idle means either the HMD proximity sensor
+# reported the headset taken off (VREvent_TrackedDeviceUserInteractionEnded) and no input or
+# movement followed, or no controller input and no HMD or controller movement beyond a small
+# threshold for idle_after_s seconds.
+
+# === Standard library imports ===
+import time
+
+# === Constants ===
+POSE_THRESHOLD = 0.002    # Largest pose matrix element change that still counts as still (~2 mm, ~0.1 deg)
+AXIS_THRESHOLD = 0.02     # Trigger / trackpad change that counts as input
+
+
+class AdaptiveRate:
+    """
+    Called once per tick with update(); switches scheduler between full_hz and idle_hz.
+
+    Movement is measured against the pose at the last activity rather than the previous tick, so
+    slow drift below the threshold per tick still wakes the loop once it adds up.
+    interaction_events is passed to triad_openvr.poll_vr_events to collect proximity events.
+    """
+    def __init__(self, scheduler, hmd, left_controller, right_controller, full_hz, idle_hz, idle_after_s, log):
+        self.scheduler = scheduler
+        self.full_hz = full_hz
+        self.idle_hz = idle_hz
+        self.idle_after_s = idle_after_s
+        self.log = log
+        self.hmd_index = hmd.index if hmd is not None else None
+        self.device_indices = [device.index for device in (hmd, left_controller, right_controller) if device is not None]
+        self.interaction_events = []
+        self.user_present = True
+        self.user_left_at = 0.0
+        self.reference_poses = None
+        self.reference_states = None
+        self.last_activity = time.perf_counter()
+        self.idle = False
+        self.switches = 0
+        self.full_seconds = 0.0
+        self.idle_seconds = 0.0
+        self.last_update = self.last_activity
+
+    def _poses_moved(self, poses):
+        references = self.reference_poses
+        moved = references is None
+        if not moved:
+            for index, reference in zip(self.device_indices, references):
+                m = poses[index].mDeviceToAbsoluteTracking
+                for i in range(3):
+                    row, reference_row = m[i], reference[i]
+                    for j in range(4):
+                        if abs(row[j] - reference_row[j]) > POSE_THRESHOLD:
+                            moved = True
+                            break
+                    if moved:
+                        break
+                if moved:
+                    break
+        if moved:
+            self.reference_poses = [[[m[i][j] for j in range(4)] for i in range(3)]
+                                    for m in (poses[index].mDeviceToAbsoluteTracking for index in self.device_indices)]
+        return moved
+
+    def _input_changed(self, left_state, right_state):
+        states = tuple((state.ulButtonPressed, state.ulButtonTouched, state.trigger, state.trackpad_x, state.trackpad_y)
+                       for state in (left_state, right_state))
+        references = self.reference_states
+        changed = references is None or any(
+            state[0] != reference[0] or state[1] != reference[1] or
+            abs(state[2] - reference[2]) > AXIS_THRESHOLD or abs(state[3] - reference[3]) > AXIS_THRESHOLD or
+            abs(state[4] - reference[4]) > AXIS_THRESHOLD
+            for state, reference in zip(states, references)
+        )
+        if changed:
+            self.reference_states = states
+        return changed
+
+    def _drain_interaction_events(self, now):
+        for device_index, started in self.interaction_events:
+            if device_index == self.hmd_index:
+                self.user_present = started
+                if not started:
+                    self.user_left_at = now
+                self.log(f"HMD {'put on' if started else 'taken off'}", level="debug")
+        self.interaction_events.clear()
+
+    def update(self, frame, left_state, right_state):
+        now = time.perf_counter()
+        if self.idle:
+            self.idle_seconds += now - self.last_update
+        else:
+            self.full_seconds += now - self.last_update
+        self.last_update = now
+        self._drain_interaction_events(now)
+        # Not short-circuited, so both references move on with any activity
+        moved = self._poses_moved(frame.poses)
+        if self._input_changed(left_state, right_state) or moved:
+            self.last_activity = now
+
+        # Activity after the headset came off still wakes the loop before the sensor reports it back on
+        idle = now - self.last_activity >= self.idle_after_s or (not self.user_present and self.last_activity <= self.user_left_at)
+        if idle != self.idle:
+            self.idle = idle
+            self.switches += 1
+            self.scheduler.set_rate(self.idle_hz if idle else self.full_hz)
+            self.log(f"Tick rate {'lowered to' if idle else 'restored to'} {self.scheduler.hz:.1f} Hz", level="debug")
+
+    def summary(self):
+        total = self.full_seconds + self.idle_seconds
+        shares = ", ".join(
+            f"{hz:.1f} Hz for {seconds:.1f} s ({100.0 * seconds / total if total else 0.0:.1f}%)"
+            for hz, seconds in ((self.full_hz, self.full_seconds), (self.idle_hz, self.idle_seconds))
+        )
+        return f"Adaptive rate: {shares}, {self.switches} switch(es), {'idle' if self.idle else 'active'} now"
@@ -0,0 +1,256 @@
+# axis_mixer.py
+
+# Mixes input sources into the gamepad's analog outputs with one sparse matrix-vector product per
+# tick. AXIS_MIXER in main_config.json gives each output a row of source weights; the result is
+# clamped to the output's range and, with AXIS_MIXER_CURVES, shaped by a response curve:
+#
+#   "AXIS_MIXER": {
+#     "right_x": {"head_x": 0.7, "right_stick_x": 0.3},
+#     "right_trigger": {"right_controller_velocity_y": 0.5}
+#   },
+#   "AXIS_MIXER_CURVES": {"right_x": {"type": "exponent", "exponent": 1.5}}
+#
+# Outputs: left_x, left_y, right_x, right_y (-1..1) and left_trigger, right_trigger (0..1).
+# Sources:
+#   left_stick_x/y, right_stick_x/y   the stick pipelines' output (stick_pipeline.py)
+#   left_trigger, right_trigger       controller trigger, 0..1
+#   head_x, head_y                    headtracking yaw and pitch after calibration, deadzone,
+#                                     sensitivity, filtering and HEADTRACKING_RANGE_DEGREES
+#   hmd_roll                          head roll (deg)
+#   <device>_yaw/_pitch/_roll         device orientation in tracking space (deg)
+#   <device>_velocity_x/y/z           linear velocity (m/s)
+#   <device>_angular_velocity_x/y/z   angular velocity (rad/s)
+# with <device> one of hmd, left_controller, right_controller.
+#
+# Without an AXIS_MIXER row the right stick keeps the JOYSTICK_BLEND_HMD / _CONTROLLER blend of
+# head and right stick (just the right stick with headtracking off or no headset bound). The left
+# stick and the triggers are only driven from here when they have a row; otherwise the left stick
+# and the button plan set them as before. left_stick_x/y reuse the value process_left_joystick
+# computed earlier in the tick rather than running the left pipeline again.
+
+# === Local project imports ===
+from input_recording import NO_DEVICE, device_index
+from rotation import head_roll, head_yaw_pitch
+from stick_pipeline import LEFT_STICK_PIPELINE, RIGHT_STICK_PIPELINE, bake_curve, curve_lookup, curve_spec_errors
+
+# === Constants ===
+AXIS_MIXER = "AXIS_MIXER"
+AXIS_MIXER_CURVES = "AXIS_MIXER_CURVES"
+AXIS_MIXER_PLAN = "AXIS_MIXER_PLAN"     # Config key the compiled mixer is stored under
+
+OUTPUTS = ("left_x", "left_y", "right_x", "right_y", "left_trigger", "right_trigger")
+LEFT_X, LEFT_Y, RIGHT_X, RIGHT_Y, LEFT_TRIGGER, RIGHT_TRIGGER = range(len(OUTPUTS))
+OUTPUT_RANGES = ((-1.0, 1.0),) * 4 + ((0.0, 1.0),) * 2
+
+DEVICES = ("hmd", "left_controller", "right_controller")
+POSE_FIELDS = ("yaw", "pitch", "roll", "velocity_x", "velocity_y", "velocity_z",
+               "angular_velocity_x", "angular_velocity_y", "angular_velocity_z")
+SOURCES = (("left_stick_x", "left_stick_y", "right_stick_x", "right_stick_y", "left_trigger", "right_trigger",
+            "head_x", "head_y") + tuple(f"{device}_{field}" for device in DEVICES for field in POSE_FIELDS))
+
+
+# === Default rows ===
+def default_rows(config, right_stick_gain=(1.0, 1.0), headtracking=True):
+    """
+    The rows the bridges used before AXIS_MIXER existed. right_stick_gain scales the controller's
+    share of the blend (the DS4 bridge applies the headtracking sensitivity to it); with
+    headtracking False (no headset) the right stick passes through.
+    """
+    rows = {"left_x": {"left_stick_x": 1.0}, "left_y": {"left_stick_y": 1.0}}
+    if headtracking and config.get("HEADTRACKING_ENABLED", True):
+        hmd_weight = config.get("JOYSTICK_BLEND_HMD", 0.7)
+        controller_weight = config.get("JOYSTICK_BLEND_CONTROLLER", 0.3)
+        rows["right_x"] = {"head_x": hmd_weight, "right_stick_x": controller_weight * right_stick_gain[0]}
+        rows["right_y"] = {"head_y": hmd_weight, "right_stick_y": controller_weight * right_stick_gain[1]}
+    else:
+        rows["right_x"] = {"right_stick_x": 1.0}
+        rows["right_y"] = {"right_stick_y": 1.0}
+    return rows
+
+
+# === Source gathering ===
+def _stick_filler(pipeline, x_slot, y_slot, reuse):
+    # reuse: read the pipeline's result from earlier in the tick instead of evaluating it again,
+    # which would also feed its dynamic deadzones the same sample twice
+    def fill(values, left_state, right_state, poses, indices):
+        x, y = pipeline.last if reuse else pipeline.evaluate(left_state, right_state)
+        if x_slot is not None:
+            values[x_slot] = x
+        if y_slot is not None:
+            values[y_slot] = y
+    return fill
+
+def _trigger_filler(side, slot):
+    def fill(values, left_state, right_state, poses, indices):
+        values[slot] = (right_state if side else left_state).trigger
+    return fill
+
+def _pose_filler(device, slots):
+    # slots: POSE_FIELDS order, None for fields nothing reads
+    yaw_slot, pitch_slot, roll_slot = slots[:3]
+    orientation = yaw_slot is not None or pitch_slot is not None
+    motion = tuple((i, slot) for i, slot in enumerate(slots[3:]) if slot is not None)
+
+    def fill(values, left_state, right_state, poses, indices):
+        index = indices[device]
+        if poses is None or index == NO_DEVICE or not poses[index].bPoseIsValid:
+            # Hold the last valid value rather than snapping to zero on a tracking dropout
+            return
+        pose = poses[index]
+        m = pose.mDeviceToAbsoluteTracking
+        if orientation:
+            yaw, pitch = head_yaw_pitch(m)
+            if yaw_slot is not None:
+                values[yaw_slot] = yaw
+            if pitch_slot is not None:
+                values[pitch_slot] = pitch
+        if roll_slot is not None:
+            values[roll_slot] = head_roll(m)
+        for i, slot in motion:
+            vector = pose.vVelocity if i < 3 else pose.vAngularVelocity
+            values[slot] = vector[i % 3]
+    return fill
+
+
+# === Mixer ===
+class AxisMixer:
+    """
+    run() gathers the sources the rows use into a flat list and evaluates every row; outputs then
+    holds one value per OUTPUTS entry. mixed[i] is False for outputs without a row, which keep
+    whatever the rest of the tick wrote. bind() sets the devices the pose sources read; without a
+    headset it switches to headless_rows, when given, for the outputs they cover.
+    """
+    def __init__(self, rows, curves, pipelines, headless_rows=None):
+        all_rows = (rows, headless_rows or {})
+        used = sorted({source for row_set in all_rows for row in row_set.values() for source in row},
+                      key=SOURCES.index)
+        slots = {source: slot for slot, source in enumerate(used)}
+        self.sources = tuple(used)
+        self.values = [0.0] * len(used)
+        self.head_slots = (slots.get("head_x"), slots.get("head_y"))
+        self.outputs = [0.0] * len(OUTPUTS)
+        self.mixed = tuple(name in rows for name in OUTPUTS)
+        self.device_indices = (NO_DEVICE,) * len(DEVICES)
+
+        def compile_rows(rows):
+            return tuple(
+                (output, tuple((slots[source], float(weight)) for source, weight in rows[name].items() if weight),
+                 OUTPUT_RANGES[output][0], OUTPUT_RANGES[output][1], bake_curve(curves.get(name, "linear")))
+                for output, name in enumerate(OUTPUTS) if name in rows
+            )
+        self.rows = self.hmd_rows = compile_rows(rows)
+        self.headless_rows = compile_rows({**rows, **headless_rows}) if headless_rows else self.hmd_rows
+
+        fillers = []
+        for side, pipeline_key in enumerate((LEFT_STICK_PIPELINE, RIGHT_STICK_PIPELINE)):
+            prefix = ("left", "right")[side]
+            x_slot, y_slot = slots.get(f"{prefix}_stick_x"), slots.get(f"{prefix}_stick_y")
+            if x_slot is not None or y_slot is not None:
+                # process_left_joystick evaluates the left pipeline before the mixer runs
+                fillers.append(_stick_filler(pipelines[pipeline_key], x_slot, y_slot, reuse=side == 0))
+            if f"{prefix}_trigger" in slots:
+                fillers.append(_trigger_filler(side, slots[f"{prefix}_trigger"]))
+        for device_slot, device in enumerate(DEVICES):
+            pose_slots = tuple(slots.get(f"{device}_{field}") for field in POSE_FIELDS)
+            if any(slot is not None for slot in pose_slots):
+                fillers.append(_pose_filler(device_slot, pose_slots))
+        self.fillers = tuple(fillers)
+
+    def bind(self, hmd, left_controller, right_controller):
+        self.device_indices = (device_index(hmd), device_index(left_controller), device_index(right_controller))
+        self.rows = self.hmd_rows if hmd else self.headless_rows
+
+    def run(self, left_state, right_state, head_x, head_y, poses):
+        values = self.values
+        x_slot, y_slot = self.head_slots
+        if x_slot is not None:
+            values[x_slot] = head_x
+        if y_slot is not None:
+            values[y_slot] = head_y
+        indices = self.device_indices
+        for fill in self.fillers:
+            fill(values, left_state, right_state, poses, indices)
+
+        outputs = self.outputs
+        for output, terms, low, high, lut in self.rows:
+            total = 0.0
+            for slot, weight in terms:
+                total += weight * values[slot]
+            total = high if total > high else low if total < low else total
+            if lut is not None:
+                total = curve_lookup(lut, total) if total >= 0.0 else -curve_lookup(lut, -total)
+            outputs[output] = total
+        return outputs
+
+    def describe(self):
+        rows = "; ".join(
+            f"{OUTPUTS[output]} = " + " + ".join(f"{weight:g}*{self.sources[slot]}" for slot, weight in terms)
+            + (" (curve)" if lut else "")
+            for output, terms, _low, _high, lut in self.rows
+        )
+        return f"Axis mixer: {rows}"
+
+
+def compile_axis_mixer(config, pipelines, right_stick_gain=(1.0, 1.0)):
+    """
+    Builds the AxisMixer for a config: the AXIS_MIXER rows over the default ones. pipelines holds
+    the compiled LEFT_STICK_PIPELINE / RIGHT_STICK_PIPELINE.
+    """
+    rows = default_rows(config, right_stick_gain)
+    configured = config.get(AXIS_MIXER, {})
+    # The left stick is only taken over when configured; otherwise process_left_joystick drives it
+    if "left_x" not in configured and "left_y" not in configured:
+        del rows["left_x"], rows["left_y"]
+    rows.update(configured)
+    # Default right stick rows fall back to the plain stick when bound without a headset
+    headless = default_rows(config, right_stick_gain, headtracking=False)
+    headless_rows = {name: headless[name] for name in ("right_x", "right_y") if name not in configured}
+    return AxisMixer(rows, config.get(AXIS_MIXER_CURVES, {}), pipelines, headless_rows)
+
+
+def write_mixed_axes(mixer, gamepad, left_stick_free=True, invert_y=False):
+    """
+    Sends the mixer's outputs to the gamepad. left_stick_free is False while the left stick acts
+    as a d-pad; invert_y flips both stick Y axes for the DS4 report.
+    """
+    outputs, mixed = mixer.outputs, mixer.mixed
+    sign = -1.0 if invert_y else 1.0
+    if mixed[LEFT_X] and left_stick_free:
+        gamepad.left_joystick_float(x_value_float=outputs[LEFT_X], y_value_float=sign * outputs[LEFT_Y])
+    if mixed[RIGHT_X]:
+        gamepad.right_joystick_float(x_value_float=outputs[RIGHT_X], y_value_float=sign * outputs[RIGHT_Y])
+    if mixed[LEFT_TRIGGER]:
+        gamepad.left_trigger_float(value_float=outputs[LEFT_TRIGGER])
+    if mixed[RIGHT_TRIGGER]:
+        gamepad.right_trigger_float(value_float=outputs[RIGHT_TRIGGER])
+
+
+# === Validation ===
+def mixer_config_errors(raw):
+    """
+    Problems with AXIS_MIXER / AXIS_MIXER_CURVES in a parsed config, for config validation.
+    """
+    errors = []
+    rows = raw.get(AXIS_MIXER, {})
+    if not isinstance(rows, dict):
+        return [f"{AXIS_MIXER} must be an object"]
+    for name, row in rows.items():
+        if name not in OUTPUTS:
+            errors.append(f"{AXIS_MIXER}: unknown output '{name}' (outputs: {', '.join(OUTPUTS)})")
+        elif not isinstance(row, dict):
+            errors.append(f"{AXIS_MIXER}.{name} must be an object of source weights")
+        else:
+            for source, weight in row.items():
+                if source not in SOURCES:
+                    errors.append(f"{AXIS_MIXER}.{name}: unknown source '{source}'")
+                elif not isinstance(weight, (int, float)) or isinstance(weight, bool):
+                    errors.append(f"{AXIS_MIXER}.{name}.{source} must be a number")
+    curves = raw.get(AXIS_MIXER_CURVES, {})
+    if not isinstance(curves, dict):
+        return errors + [f"{AXIS_MIXER_CURVES} must be an object"]
+    for name, spec in curves.items():
+        if name not in OUTPUTS:
+            errors.append(f"{AXIS_MIXER_CURVES}: unknown output '{name}'")
+        else:
+            errors.extend(curve_spec_errors(f"{AXIS_MIXER_CURVES}.{name}", spec))
+    return errors
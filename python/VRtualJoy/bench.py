@@ -0,0 +1,388 @@
+# bench.py
+
+# Hot-path benchmarks for both bridges, run against the simulated runtime (sim_runtime.py) and
+# null gamepad targets (null_gamepad.py), so results do not depend on SteamVR or a driver.
+#
+#   python bench.py                          # run, write bench_results.json, compare to baseline
+#   python bench.py --save-baseline          # run and store the results as the new baseline
+#   python VRtualJoy.py --bench [options]    # same, through the launcher
+#
+# Function benchmarks time batches of calls and report calls per second plus per-call p50/p99.
+# Loop benchmarks run the bridge's main_loop unpaced and report ticks per second plus per-tick
+# p50/p99. A benchmark regresses when its p50 grows by more than --tolerance over the baseline.
+
+# === Standard library imports ===
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+from time import perf_counter_ns
+
+VRTUALJOY_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, VRTUALJOY_DIR)
+sys.path.insert(0, os.path.abspath(os.path.join(VRTUALJOY_DIR, "..")))
+
+# === Third-party imports ===
+import openvr
+import triad_openvr
+
+# === Local project imports ===
+from action_input import ActionInput, write_action_manifest
+from axis_mixer import AXIS_MIXER_PLAN
+from head_filters import KalmanFilter, OneEuroFilter, Smoother
+from null_gamepad import install_null_vgamepad, NullVX360Gamepad, NullVDS4Gamepad
+from rotation import HeadReference, head_yaw_pitch
+from shared_state import SharedStatePublisher, SharedStateReader
+from sim_runtime import SimulatedVRSystem, install_simulated_runtime
+from stage_timing import LogHistogram
+
+# === Constants ===
+RESULTS_VERSION = 1
+DEFAULT_RESULTS = os.path.join(VRTUALJOY_DIR, "bench_results.json")
+DEFAULT_BASELINE = os.path.join(VRTUALJOY_DIR, "bench_baseline.json")
+BATCH_CALLS = 50          # Calls per timed batch; one perf_counter_ns pair per batch
+LOOP_TICKS = 5000         # Ticks per main_loop benchmark
+
+
+# === Measurement ===
+def run_coroutine(coro):
+    # The per-tick coroutines never suspend, so driving them by hand avoids timing the event loop
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("Benchmarked coroutine suspended")
+
+
+def time_calls(fn, calls):
+    """
+    Calls fn() in batches of BATCH_CALLS. Returns a result dict with calls per second and
+    per-call p50/p99 in microseconds (each batch contributes its mean per-call time).
+    """
+    histogram = LogHistogram()
+    for _ in range(BATCH_CALLS):
+        fn()  # Warm up caches and specialization before timing
+    batches = max(1, calls // BATCH_CALLS)
+    total_ns = 0
+    for _ in range(batches):
+        start = perf_counter_ns()
+        for _ in range(BATCH_CALLS):
+            fn()
+        elapsed = perf_counter_ns() - start
+        total_ns += elapsed
+        histogram.record(elapsed // BATCH_CALLS)
+    return summarize(histogram, batches * BATCH_CALLS, total_ns)
+
+
+def summarize(histogram, count, total_ns):
+    return {
+        "count": count,
+        "per_second": round(count * 1e9 / total_ns, 1) if total_ns else 0.0,
+        "p50_us": round(histogram.percentile(0.5) / 1000.0, 3),
+        "p99_us": round(histogram.percentile(0.99) / 1000.0, 3),
+    }
+
+
+class BenchFinished(Exception):
+    pass
+
+
+class BenchScheduler:
+    """
+    TickScheduler stand-in that never sleeps. wait() records the time since the previous wait()
+    returned, which is the work of one tick, and stops the loop after the requested ticks.
+    """
+    def __init__(self, ticks):
+        self.ticks = ticks
+        self.histogram = LogHistogram()
+        self.total_ns = 0
+        self.last = 0
+
+    def start(self):
+        self.last = perf_counter_ns()
+
+    def report_due(self):
+        return False
+
+    async def wait(self):
+        now = perf_counter_ns()
+        elapsed = now - self.last
+        self.histogram.record(elapsed)
+        self.total_ns += elapsed
+        if self.histogram.count >= self.ticks:
+            raise BenchFinished()
+        self.last = perf_counter_ns()
+
+    def summary(self):
+        return f"Bench: {self.histogram.count} tick(s)"
+
+    def result(self):
+        return summarize(self.histogram, self.histogram.count, self.total_ns)
+
+
+# === Fixtures ===
+class BridgeFixture:
+    """
+    One bridge (XInput or DS4) wired to the simulated runtime: its devices, config, a null gamepad
+    behind the bridge's GamepadOutput, and two controller states that differ in every mapped
+    button so the button stage does real work when they alternate.
+    """
+    def __init__(self, name, bridge, tracking_module, output_type, gamepad_type):
+        self.name = name
+        self.bridge = bridge
+        self.tracking_module = tracking_module
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.config = bridge.load_config()
+            self.v, self.left, self.right, self.hmd = bridge.initialize_vr_devices()
+        self.output = output_type(gamepad_type(), bridge.safe_gamepad_update)
+        self.v.update_frame()
+        self.states = []
+        for pressed, trigger, x, y in ((0, 0.0, 0.0, 0.0), (~0 & 0xFFFFFFFFFFFFFFFF, 1.0, 0.9, -0.9)):
+            state = triad_openvr.ControllerState()
+            state.set_buttons_pressed(pressed)
+            state.trigger, state.trackpad_x, state.trackpad_y = trigger, x, y
+            self.states.append(state)
+        # Headtracking only reads the pose once calibrated; calibrate at the origin
+        tracking_module.head_reference = HeadReference()
+        tracking_module.is_calibrated = True
+
+
+def load_fixtures():
+    # The bridges parse sys.argv and import vgamepad at import time
+    saved_argv = sys.argv
+    sys.argv = [saved_argv[0]]
+    try:
+        install_null_vgamepad()
+        install_simulated_runtime(SimulatedVRSystem())
+        import Xinput_main, Xinput_motion_tracking
+        import DS4_main, DS4_motion_tracking
+    finally:
+        sys.argv = saved_argv
+    return (
+        BridgeFixture("xinput", Xinput_main, Xinput_motion_tracking,
+                      Xinput_main.XInputOutput, NullVX360Gamepad),
+        BridgeFixture("ds4", DS4_main, DS4_motion_tracking,
+                      DS4_main.DS4Output, NullVDS4Gamepad),
+    )
+
+
+# === Benchmarks ===
+def bench_shared(fixture, calls):
+    pose_mat = fixture.hmd.get_pose_matrix()
+    state_struct = openvr.VRControllerState_t()
+    state_struct.ulButtonPressed = 0b110
+    reference = HeadReference(170.0, 5.0)
+    history = triad_openvr.pose_sample_buffer(1024)
+    filters = (Smoother(0.2), OneEuroFilter(), KalmanFilter())
+    return {
+        "convert_to_euler": time_calls(lambda: triad_openvr.convert_to_euler(pose_mat), calls),
+        "head_yaw_pitch": time_calls(lambda: head_yaw_pitch(pose_mat), calls),
+        "head_reference.relative": time_calls(lambda: reference.relative(pose_mat), calls),
+        "convert_to_quaternion": time_calls(lambda: triad_openvr.convert_to_quaternion(pose_mat), calls),
+        "pose_sample_buffer.append": time_calls(lambda: history.append(pose_mat, 0.0), calls),
+        "controller_state_to_dict": time_calls(lambda: fixture.hmd.controller_state_to_dict(state_struct), calls),
+        "ema.smooth": time_calls(lambda: filters[0].smooth(3.0), calls),
+        "one_euro.smooth": time_calls(lambda: filters[1].smooth(3.0), calls),
+        "kalman.smooth": time_calls(lambda: filters[2].smooth(3.0), calls),
+    }
+
+
+def bench_shared_state(fixture, calls):
+    publisher = SharedStatePublisher(f"VRtualJoy.bench.{os.getpid()}", fixture.hmd, fixture.left, fixture.right, fixture.name)
+    reader = SharedStateReader(publisher.name)
+    idle, active = fixture.states
+    frame, report = fixture.v.frame, fixture.output.report
+    try:
+        return {
+            "shared_state.publish": time_calls(lambda: publisher.publish(frame, idle, active, report), calls),
+            "shared_state.read": time_calls(reader.read, calls),
+        }
+    finally:
+        reader.close()
+        publisher.close()
+
+
+def bench_input(fixture, calls):
+    # Legacy getControllerState reads against one IVRInput action update, both hands, on the
+    # simulated runtime; the same comparison as --bench-input on a live one
+    config = fixture.config
+    mapping_sets = (config.get("BUTTON_MAPPINGS", {}), config.get("SHIFT_BUTTON_MAPPINGS", {}))
+    input_bit = fixture.bridge.input_bit
+    left, right = fixture.left, fixture.right
+    with tempfile.TemporaryDirectory() as directory:
+        manifest_path = write_action_manifest(directory, mapping_sets, input_bit)
+        action_input = ActionInput(openvr.VRInput(), manifest_path, mapping_sets, input_bit)
+
+    def legacy():
+        left.read_controller_state()
+        right.read_controller_state()
+
+    return {
+        "input.legacy": time_calls(legacy, calls),
+        "input.actions": time_calls(action_input.read, calls),
+    }
+
+
+def bench_bridge(fixture, calls):
+    bridge, config, output, hmd = fixture.bridge, fixture.config, fixture.output, fixture.hmd
+    idle, active = fixture.states
+    smoothers = (Smoother(0.2), Smoother(0.2))
+    mixer, poses = config[AXIS_MIXER_PLAN], hmd.current_pose()
+    flip = [idle, active]
+
+    def next_states():
+        # Alternate idle/active so every mapped button and trigger changes on each call
+        flip.reverse()
+        return flip[0], flip[1]
+
+    if fixture.name == "xinput":
+        def buttons():
+            new, old = next_states()
+            run_coroutine(bridge.process_triggers_and_buttons(new, idle, old, idle, output, False, config))
+
+        def left_stick():
+            run_coroutine(bridge.process_left_joystick(active, idle, False, output, config))
+
+        def headtracking():
+            bridge.apply_headtracking_to_right_stick(hmd, idle, active, output, smoothers[0], smoothers[1], config, poses)
+    else:
+        def buttons():
+            new, old = next_states()
+            run_coroutine(bridge.process_triggers_and_buttons(new, idle, old, idle, output, False,
+                                                              bridge.BUTTON_PLAN, bridge.SHIFT_BUTTON_PLAN))
+
+        def left_stick():
+            run_coroutine(bridge.process_left_joystick(active, idle, False, output, config))
+
+        def headtracking():
+            run_coroutine(bridge.apply_headtracking_to_right_stick(hmd, idle, active, output,
+                                                                  smoothers[0], smoothers[1], config, poses))
+
+    prefix = fixture.name + "."
+    return {
+        prefix + "process_triggers_and_buttons": time_calls(buttons, calls),
+        prefix + "process_left_joystick": time_calls(left_stick, calls),
+        prefix + "apply_headtracking_to_right_stick": time_calls(headtracking, calls),
+        prefix + "axis_mixer.run": time_calls(lambda: mixer.run(idle, active, 0.2, -0.2, poses), calls),
+    }
+
+
+def bench_loop(fixture, ticks):
+    scheduler = BenchScheduler(ticks)
+
+    async def run():
+        try:
+            await fixture.bridge.main_loop(fixture.v, fixture.left, fixture.right, fixture.hmd,
+                                           fixture.output, scheduler, fixture.config)
+        except BenchFinished:
+            pass
+
+    # main_loop logs its summaries on exit; keep them out of the benchmark report
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(run())
+    return {fixture.name + ".main_loop_tick": scheduler.result()}
+
+
+def run_benchmarks(calls, ticks):
+    fixtures = load_fixtures()
+    results = bench_shared(fixtures[0], calls)
+    results.update(bench_shared_state(fixtures[0], calls))
+    results.update(bench_input(fixtures[0], calls))
+    for fixture in fixtures:
+        results.update(bench_bridge(fixture, calls))
+    for fixture in fixtures:
+        results.update(bench_loop(fixture, ticks))
+    return {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+# === Baselines ===
+def compare(results, baseline, tolerance):
+    """
+    Returns (rows, regressions). Each row is (name, baseline p50, current p50, change) with
+    change as a fraction (+0.10 = 10% slower); names missing from either side get None.
+    """
+    rows = []
+    regressions = []
+    current = results["results"]
+    stored = baseline.get("results", {}) if baseline else {}
+    for name in sorted(set(current) | set(stored)):
+        now = current.get(name, {}).get("p50_us")
+        before = stored.get(name, {}).get("p50_us")
+        change = (now - before) / before if now is not None and before else None
+        rows.append((name, before, now, change))
+        if change is not None and change > tolerance:
+            regressions.append(name)
+    return rows, regressions
+
+
+def format_report(results, rows, regressions, tolerance):
+    lines = [f"{'benchmark':<46}{'per second':>14}{'p50 us':>10}{'p99 us':>10}{'baseline':>10}{'change':>9}"]
+    current = results["results"]
+    for name, before, now, change in rows:
+        entry = current.get(name)
+        if entry is None:
+            lines.append(f"{name:<46}{'missing':>14}{'':>10}{'':>10}{before:>10.3f}{'':>9}")
+            continue
+        baseline_text = f"{before:>10.3f}" if before is not None else f"{'-':>10}"
+        change_text = f"{change * 100:>+8.1f}%" if change is not None else f"{'-':>9}"
+        flag = "  REGRESSION" if name in regressions else ""
+        lines.append(f"{name:<46}{entry['per_second']:>14.1f}{entry['p50_us']:>10.3f}{entry['p99_us']:>10.3f}"
+                     f"{baseline_text}{change_text}{flag}")
+    if regressions:
+        lines.append(f"{len(regressions)} benchmark(s) slower than the baseline by more than {tolerance * 100:.0f}%")
+    return "\n".join(lines)
+
+
+def load_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def write_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the VRtualJoy hot path against a simulated runtime")
+    parser.add_argument("--output", default=DEFAULT_RESULTS, help="Where to write the results JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed p50 slowdown before a benchmark counts as a regression")
+    parser.add_argument("--calls", type=int, default=20000, help="Calls per function benchmark")
+    parser.add_argument("--ticks", type=int, default=LOOP_TICKS, help="Ticks per main_loop benchmark")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.calls, args.ticks)
+    write_json(args.output, results)
+    if args.save_baseline:
+        write_json(args.baseline, results)
+        rows, regressions = compare(results, None, args.tolerance)
+        print(format_report(results, rows, regressions, args.tolerance))
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    baseline = load_json(args.baseline)
+    rows, regressions = compare(results, baseline, args.tolerance)
+    print(format_report(results, rows, regressions, args.tolerance))
+    print(f"Results written to {args.output}")
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# button_dispatch.py
+
+# Mapping sets from main_config.json are compiled once at config load into a ButtonPlan.
+# Per tick the plan only looks at ulButtonPressed bits that changed, instead of walking the
+# mapping dicts and parsing input names. Backend modules (DS4/Xinput) decide which bit and
+# which virtual button each input maps to; the plan layout and dispatch are shared.
+
+# === Constants ===
+SIDES = ("left_controller", "right_controller")
+
+# grip_button in ControllerState is bit 2 of ulButtonPressed
+GRIP_BUTTON_BIT = 1 << 2
+
+
+# === Plan ===
+class ButtonPlan:
+    __slots__ = ("triggers", "left_mask", "left_buttons", "right_mask", "right_buttons", "press", "release")
+
+    def __init__(self, triggers, left_buttons, right_buttons, press, release):
+        # triggers: ((side_index, setter, round_fn), ...) applied in mapping order
+        # *_buttons: ((bit, button), ...) applied in mapping order when bit changed
+        # setter, press and release are the output class' methods, called with the gamepad first
+        self.triggers = tuple(triggers)
+        self.press = press
+        self.release = release
+        self.left_buttons = tuple(left_buttons)
+        self.right_buttons = tuple(right_buttons)
+        self.left_mask = _combined_mask(self.left_buttons)
+        self.right_mask = _combined_mask(self.right_buttons)
+
+    def describe(self):
+        return (f"{len(self.triggers)} trigger(s), {len(self.left_buttons)} left and "
+                f"{len(self.right_buttons)} right button(s)")
+
+
+def _combined_mask(entries):
+    mask = 0
+    for bit, _button in entries:
+        mask |= bit
+    return mask
+
+
+def compile_button_plan(mapping_set, resolve_trigger, resolve_button, output_class):
+    """
+    Builds a ButtonPlan from one BUTTON_MAPPINGS / SHIFT_BUTTON_MAPPINGS set.
+
+    resolve_trigger(target) -> (setter_name, round_fn) or None
+    resolve_button(input_name, target) -> (bit, button) or None
+    Inputs that resolve to None can never change the output and are left out of the plan.
+    The setters are looked up on output_class (the backend's GamepadOutput) here, so running the
+    plan does no attribute lookups by name.
+    """
+    triggers = []
+    buttons = ([], [])
+    for side_index, side in enumerate(SIDES):
+        for input_name, conf in mapping_set.get(side, {}).items():
+            if not conf.get("enabled", True):
+                continue
+            target = conf.get("target")
+            if input_name == "trigger":
+                resolved = resolve_trigger(target)
+                if resolved is not None:
+                    setter_name, round_fn = resolved
+                    triggers.append((side_index, getattr(output_class, setter_name), round_fn))
+            else:
+                resolved = resolve_button(input_name, target)
+                if resolved is not None and resolved[0]:
+                    buttons[side_index].append(resolved)
+    return ButtonPlan(triggers, buttons[0], buttons[1], output_class.press_button, output_class.release_button)
+
+
+# === Dispatch ===
+def _dispatch_buttons(entries, now, changed, gamepad, press, release):
+    for bit, button in entries:
+        if changed & bit:
+            if now & bit:
+                press(gamepad, button)
+            else:
+                release(gamepad, button)
+
+
+def run_button_plan(plan, left_state, right_state, left_state_old, right_state_old, gamepad):
+    if plan.triggers:
+        states = (left_state, right_state)
+        for side_index, setter, round_fn in plan.triggers:
+            setter(gamepad, round_fn(states[side_index].trigger * 255))
+
+    left_now = left_state.ulButtonPressed
+    left_changed = (left_now ^ left_state_old.ulButtonPressed) & plan.left_mask
+    right_now = right_state.ulButtonPressed
+    right_changed = (right_now ^ right_state_old.ulButtonPressed) & plan.right_mask
+    if left_changed or right_changed:
+        press, release = plan.press, plan.release
+        if left_changed:
+            _dispatch_buttons(plan.left_buttons, left_now, left_changed, gamepad, press, release)
+        if right_changed:
+            _dispatch_buttons(plan.right_buttons, right_now, right_changed, gamepad, press, release)
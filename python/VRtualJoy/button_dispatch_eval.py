@@ -0,0 +1,259 @@
+# button_dispatch_eval.py
+
+# Randomized equivalence check for button_dispatch.py against the per-mapping interpreter it
+# replaced, for both backends.
+#
+#   python button_dispatch_eval.py
+#   python button_dispatch_eval.py --cases 2000 --ticks 50 --seed 7
+#
+# Each case draws a random BUTTON_MAPPINGS / SHIFT_BUTTON_MAPPINGS pair (valid, unknown and empty
+# targets, disabled entries, inputs with no ControllerState field) and a random sequence of
+# controller states and shift flags. The reference interpreter drives a null vgamepad target
+# directly, as before; the compiled plan drives the backend's GamepadOutput over another null
+# target. After every tick the XUSB_REPORT / DS4_REPORT bytes of the two must be identical.
+# Exits with status 1 on the first mismatch.
+
+# === Standard library imports ===
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# === Local project imports ===
+from null_gamepad import install_null_vgamepad, NullVX360Gamepad, NullVDS4Gamepad
+
+# The backends import vgamepad at import time
+vg = install_null_vgamepad()
+
+# === Third-party imports ===
+from triad_openvr import ControllerState
+
+# === Local project imports ===
+import DS4_controller_input
+import Xinput_controller_input
+from button_dispatch import run_button_plan
+from gamepad_output import DS4Output, XInputOutput
+
+# === Constants ===
+INPUTS = ("trigger", "grip_button", "ButtonPressed_A", "ButtonPressed_B", "ButtonPressed_X", "ButtonPressed_Y",
+          "ButtonPressed_Z", "joystick_pressed", "button_cross", "button_triangle")
+XINPUT_TARGETS = tuple(Xinput_controller_input.BUTTON_NAME_MAP) + ("right_trigger", "left_trigger", "bogus", "")
+DS4_TARGETS = ("right_shoulder", "left_shoulder", "triangle", "circle", "cross", "square", "right_thumb", "share",
+               "right_trigger", "left_trigger", "bogus", "")
+# ulButtonPressed bits the mappings read, plus a few they do not
+BUTTON_BITS = (1 << 1, 1 << 2, 1 << 7, 1 << 0, 1 << 32, 1 << 33)
+TRIGGER_VALUES = (0.0, 1.0, 0.5, 0.5 / 255, 1.5 / 255, 254.5 / 255)
+
+
+# === Reference interpreters ===
+# The per-tick mapping walk from before button_dispatch.py, unchanged apart from being synchronous
+def reference_xinput(left_controller_state, right_controller_state, left_controller_state_old, right_controller_state_old, gamepad, shift_active, config):
+    BUTTON_NAME_MAP = Xinput_controller_input.BUTTON_NAME_MAP
+    mappings_set = config["SHIFT_BUTTON_MAPPINGS"] if shift_active else config["BUTTON_MAPPINGS"]
+
+    for side, state, state_old in [
+        ("left_controller", left_controller_state, left_controller_state_old),
+        ("right_controller", right_controller_state, right_controller_state_old)
+    ]:
+        mappings = mappings_set.get(side, {})
+        for input_name, conf in mappings.items():
+            if not conf.get("enabled", True):
+                continue
+
+            target = conf.get("target")
+            button = BUTTON_NAME_MAP.get(target)
+
+            # Analog trigger
+            if input_name == "trigger":
+                val = state.trigger
+                if target == "right_trigger":
+                    gamepad.right_trigger_float(value_float=val)
+                elif target == "left_trigger":
+                    gamepad.left_trigger_float(value_float=val)
+
+            # Digital grip
+            elif input_name == "grip_button":
+                was_pressed = state_old.grip_button
+                is_pressed = state.grip_button
+                if is_pressed != was_pressed and isinstance(button, int):
+                    if is_pressed:
+                        gamepad.press_button(button=button)
+                    else:
+                        gamepad.release_button(button=button)
+
+            # Joystick click (formerly "trackpad_pressed")
+            elif input_name == "joystick_pressed":
+                was_pressed = state_old.get("joystick_pressed", False)
+                is_pressed = state.get("joystick_pressed", False)
+                if is_pressed != was_pressed and isinstance(button, int):
+                    if is_pressed:
+                        gamepad.press_button(button=button)
+                    else:
+                        gamepad.release_button(button=button)
+
+            # Bitmask buttons
+            elif input_name.startswith("ButtonPressed_"):
+                bit_name = input_name.split("_")[-1]
+                bit = {"Y": 1 << 1, "X": 1 << 7, "B": 1 << 1, "A": 1 << 7}.get(bit_name, 0)
+                was = state_old.ulButtonPressed
+                now = state.ulButtonPressed
+                if (now & bit) != (was & bit) and isinstance(button, int):
+                    if now & bit:
+                        gamepad.press_button(button=button)
+                    else:
+                        gamepad.release_button(button=button)
+
+
+def reference_ds4(left_controller_state, right_controller_state, left_controller_state_old, right_controller_state_old, gamepad, shift_active, button_mappings, shift_button_mappings):
+    mappings_set = shift_button_mappings if shift_active else button_mappings
+
+    for side, state, state_old in [("left_controller", left_controller_state, left_controller_state_old), ("right_controller", right_controller_state, right_controller_state_old)]:
+        for input_name, conf in mappings_set.get(side, {}).items():
+            if not conf.get("enabled", True): continue
+            target = conf["target"]
+
+            if input_name == "trigger":
+                val = state.trigger
+                (gamepad.right_trigger if target == "right_trigger" else gamepad.left_trigger)(value=int(val * 255))
+
+            elif input_name == "grip_button":
+                if (pressed := state.grip_button) != state_old.grip_button:
+                    btn = {"right_shoulder": vg.DS4_BUTTONS.DS4_BUTTON_SHOULDER_RIGHT,
+                           "left_shoulder": vg.DS4_BUTTONS.DS4_BUTTON_SHOULDER_LEFT}.get(target)
+                    if btn: (gamepad.press_button if pressed else gamepad.release_button)(button=btn)
+
+            elif input_name.startswith("ButtonPressed_"):
+                bit = {"A": 1 << 1, "B": 1 << 7, "X": 1 << 1, "Y": 1 << 7}.get(input_name[-1].upper(), 0)
+                now, was = state.ulButtonPressed, state_old.ulButtonPressed
+                if (now & bit) != (was & bit):
+                    btn = {"A": vg.DS4_BUTTONS.DS4_BUTTON_CROSS,
+                           "B": vg.DS4_BUTTONS.DS4_BUTTON_CIRCLE,
+                           "X": vg.DS4_BUTTONS.DS4_BUTTON_SQUARE,
+                           "Y": vg.DS4_BUTTONS.DS4_BUTTON_TRIANGLE}.get(input_name[-1].upper())
+                    if btn: (gamepad.press_button if now & bit else gamepad.release_button)(button=btn)
+
+            elif input_name.startswith("button_"):
+                if (pressed := state.get(input_name, False)) != state_old.get(input_name, False):
+                    btn = {"triangle": vg.DS4_BUTTONS.DS4_BUTTON_TRIANGLE,
+                           "circle": vg.DS4_BUTTONS.DS4_BUTTON_CIRCLE,
+                           "cross": vg.DS4_BUTTONS.DS4_BUTTON_CROSS,
+                           "square": vg.DS4_BUTTONS.DS4_BUTTON_SQUARE}.get(target)
+                    if btn: (gamepad.press_button if pressed else gamepad.release_button)(button=btn)
+
+            elif input_name == "joystick_pressed":
+                if (pressed := state.get("joystick_pressed", False)) != state_old.get("joystick_pressed", False):
+                    btn = {"right_thumb": vg.DS4_BUTTONS.DS4_BUTTON_THUMB_RIGHT,
+                           "left_thumb": vg.DS4_BUTTONS.DS4_BUTTON_THUMB_LEFT,
+                           "share": vg.DS4_BUTTONS.DS4_BUTTON_SHARE,
+                           "options": vg.DS4_BUTTONS.DS4_BUTTON_OPTIONS}.get(target)
+                    if btn: (gamepad.press_button if pressed else gamepad.release_button)(button=btn)
+
+
+# === Backends ===
+class Backend:
+    def __init__(self, name, module, targets, null_class, output_class):
+        self.name = name
+        self.module = module
+        self.targets = targets
+        self.null_class = null_class
+        self.output_class = output_class
+
+    def create(self, button_mappings, shift_button_mappings):
+        """
+        Returns (reference pad, output, run(new states, old states, shift)) for one mapping pair.
+        """
+        reference = self.null_class()
+        output = self.output_class(self.null_class(), lambda gamepad: gamepad)
+        plans = (self.module.compile_button_mappings(button_mappings),
+                 self.module.compile_button_mappings(shift_button_mappings))
+        if self.name == "xinput":
+            config = {"BUTTON_MAPPINGS": button_mappings, "SHIFT_BUTTON_MAPPINGS": shift_button_mappings}
+            def run_reference(new, old, shift):
+                reference_xinput(new[0], new[1], old[0], old[1], reference, shift, config)
+        else:
+            def run_reference(new, old, shift):
+                reference_ds4(new[0], new[1], old[0], old[1], reference, shift, button_mappings, shift_button_mappings)
+
+        def run(new, old, shift):
+            run_reference(new, old, shift)
+            run_button_plan(plans[1] if shift else plans[0], new[0], new[1], old[0], old[1], output)
+        return reference, output, run
+
+
+BACKENDS = (
+    Backend("xinput", Xinput_controller_input, XINPUT_TARGETS, NullVX360Gamepad, XInputOutput),
+    Backend("ds4", DS4_controller_input, DS4_TARGETS, NullVDS4Gamepad, DS4Output),
+)
+
+
+# === Random inputs ===
+def random_mapping_set(rng, targets):
+    # Same shape as the bridges' processed mappings: "enabled" follows "target"
+    mapping_set = {}
+    for side in ("left_controller", "right_controller"):
+        inputs = rng.sample(INPUTS, rng.randint(0, len(INPUTS)))
+        mapping_set[side] = {}
+        for input_name in inputs:
+            target = rng.choice(targets)
+            mapping_set[side][input_name] = {"target": target, "enabled": bool(target)}
+    return mapping_set
+
+def random_state(rng):
+    state = ControllerState()
+    pressed = 0
+    for bit in BUTTON_BITS:
+        if rng.random() < 0.4:
+            pressed |= bit
+    state.set_buttons_pressed(pressed)
+    state.trigger = rng.choice(TRIGGER_VALUES) if rng.random() < 0.3 else rng.random()
+    return state
+
+
+# === Check ===
+def check_backend(backend, rng, cases, ticks):
+    """
+    Returns (ticks compared, first mismatch or None).
+    """
+    compared = 0
+    for case in range(cases):
+        button_mappings = random_mapping_set(rng, backend.targets)
+        shift_button_mappings = random_mapping_set(rng, backend.targets)
+        reference, output, run = backend.create(button_mappings, shift_button_mappings)
+        old = (ControllerState(), ControllerState())
+        for tick in range(ticks):
+            new = (random_state(rng), random_state(rng))
+            shift = rng.random() < 0.3
+            run(new, old, shift)
+            compared += 1
+            expected, actual = bytes(reference.report), bytes(output.report)
+            if expected != actual:
+                return compared, (f"case {case} tick {tick} shift {shift}: reference {expected.hex()}, "
+                                  f"plan {actual.hex()}\n  BUTTON_MAPPINGS {button_mappings}\n"
+                                  f"  SHIFT_BUTTON_MAPPINGS {shift_button_mappings}")
+            old = new
+    return compared, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Randomized equivalence check for button_dispatch.py")
+    parser.add_argument("--cases", type=int, default=500, help="Random mapping pairs per backend")
+    parser.add_argument("--ticks", type=int, default=30, help="Ticks per mapping pair")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failed = False
+    for backend in BACKENDS:
+        compared, mismatch = check_backend(backend, rng, args.cases, args.ticks)
+        print(f"{backend.name:<7} {compared} tick(s) compared {'ok' if mismatch is None else 'FAIL'}")
+        if mismatch is not None:
+            print(f"  {mismatch}")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
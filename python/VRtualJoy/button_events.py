@@ -0,0 +1,84 @@
+# button_events.py
+
+# === Standard library imports ===
+import time
+
+# A 64-bit ulButtonPressed mask covering every EVRButtonId
+ALL_BUTTONS = (1 << 64) - 1
+
+
+# === Edge tracker ===
+class ButtonEdgeTracker:
+    """
+    Merges VREvent_ButtonPress / VREvent_ButtonUnpress edges into the polled controller state.
+
+    triad_openvr.poll_vr_events() appends timestamped edges to self.edges. apply() then rewrites
+    a ControllerState's ulButtonPressed so that every edge lasts for at least one output frame:
+    a tap that was pressed and released between two polls shows up as pressed for one tick and
+    released on the next. A button only switches once per tick; further edges for it wait for
+    the following tick. Buttons without pending edges follow the polled state, so a missed event
+    can never leave a button stuck.
+    """
+    def __init__(self):
+        self.edges = []
+        self.pending = {}
+        self.effective = {}
+        self.recovered = 0
+        self.deferred = 0
+        self.max_edge_age_s = 0.0
+
+    def apply(self, controller, state):
+        if controller is None:
+            return state
+        index = controller.index
+        queue = self.pending.get(index)
+        if self.edges:
+            incoming = [edge for edge in self.edges if edge[0] == index]
+            if incoming:
+                queue = (queue or []) + incoming
+        if not queue:
+            self.effective[index] = state.ulButtonPressed
+            return state
+
+        now = time.perf_counter()
+        effective = self.effective.get(index, state.ulButtonPressed)
+        toggled = 0
+        waiting = []
+        waiting_mask = 0
+        for edge in queue:
+            _index, mask, pressed, timestamp = edge
+            if (toggled | waiting_mask) & mask:
+                waiting.append(edge)
+                waiting_mask |= mask
+                continue
+            updated = (effective | mask) if pressed else (effective & ~mask)
+            if updated != effective:
+                toggled |= mask
+                effective = updated
+                age = now - timestamp
+                if age > self.max_edge_age_s:
+                    self.max_edge_age_s = age
+        if waiting:
+            self.deferred += len(waiting)
+            self.pending[index] = waiting
+        else:
+            self.pending.pop(index, None)
+
+        polled = state.ulButtonPressed
+        follow_poll = ALL_BUTTONS & ~(toggled | waiting_mask)
+        effective = (effective & ~follow_poll) | (polled & follow_poll)
+        if effective != polled:
+            if (effective & ~polled) & toggled:
+                # A press the poll alone would have missed
+                self.recovered += 1
+            state.set_buttons_pressed(effective)
+        self.effective[index] = effective
+        return state
+
+    def end_tick(self):
+        self.edges.clear()
+
+    def summary(self):
+        return (f"Button events: {self.recovered} press(es) recovered between polls, "
+                f"{self.deferred} edge(s) deferred to a later frame, "
+                f"max edge age {1000.0 * self.max_edge_age_s:.1f} ms")
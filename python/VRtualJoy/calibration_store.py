@@ -0,0 +1,122 @@
+# calibration_store.py
+
+# In-memory calibration state with write-behind persistence. Calibrations are keyed by HMD
+# serial, so one file holds a separate zero point per headset. set() only updates memory and
+# wakes a writer thread, which waits briefly to coalesce rapid recalibrations and then replaces
+# the file atomically (temp file + fsync + rename), so a crash never leaves it half written.
+#
+# File layout: {"version": 2, "calibrations": {"<serial>": {"yaw": ..., "pitch": ..., "quaternion": [w, x, y, z]}}}
+# The original single-calibration layout ({"yaw": ..., "pitch": ...}) loads as the default entry.
+
+# === Standard library imports ===
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+
+# === Constants ===
+STORE_VERSION = 2
+DEFAULT_KEY = "default"   # Used without a serial, and for headsets that have no entry of their own
+COALESCE_S = 0.5          # Writes within this window of a set() are merged into one
+RETRY_S = 5.0             # Wait before retrying a failed write
+
+
+class CalibrationStore:
+    """
+    Holds (yaw, pitch, quaternion) per HMD serial. The file is read once, on first use; get() and set() never
+    touch the disk. log is the owning module's log_and_print.
+    """
+    def __init__(self, path, log):
+        self.path = path
+        self.log = log
+        self.entries = None
+        self.dirty = threading.Event()
+        self.write_lock = threading.Lock()
+        self.writer = None
+        self.writes = 0
+
+    def _load(self):
+        self.entries = {}
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.log(f"Failed to load calibration file: {e}", level="error")
+            return
+        if "calibrations" in data:
+            self.entries = {str(key): value for key, value in data["calibrations"].items()}
+        elif "yaw" in data:
+            self.entries[DEFAULT_KEY] = {"yaw": data.get("yaw", 0.0), "pitch": data.get("pitch", 0.0)}
+
+    def get(self, serial=None):
+        """
+        Returns (yaw, pitch, quaternion) for the headset, falling back to the default entry, or
+        None. quaternion is None for entries saved before it was stored.
+        """
+        if self.entries is None:
+            self._load()
+        entry = self.entries.get(serial or DEFAULT_KEY) or self.entries.get(DEFAULT_KEY)
+        if entry is None:
+            return None
+        quaternion = entry.get("quaternion")
+        return entry.get("yaw", 0.0), entry.get("pitch", 0.0), tuple(quaternion) if quaternion else None
+
+    def set(self, serial, yaw, pitch, quaternion=None):
+        if self.entries is None:
+            self._load()
+        entry = {"yaw": yaw, "pitch": pitch}
+        if quaternion is not None:
+            entry["quaternion"] = list(quaternion)
+        self.entries[serial or DEFAULT_KEY] = entry
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._write_behind, name="CalibrationWriter", daemon=True)
+            self.writer.start()
+            # Daemon threads do not outlive the interpreter, so persist anything still pending at exit
+            atexit.register(self.flush)
+        self.dirty.set()
+
+    def _write_behind(self):
+        while True:
+            self.dirty.wait()
+            # Let a burst of recalibrations settle into a single write
+            time.sleep(COALESCE_S)
+            if not self.flush():
+                time.sleep(RETRY_S)
+
+    def flush(self):
+        """
+        Writes pending changes. Returns False if the write failed; the changes stay pending.
+        """
+        with self.write_lock:
+            if not self.dirty.is_set():
+                return True
+            # Cleared before the snapshot, so a set() during the write schedules another one
+            self.dirty.clear()
+            snapshot = {"version": STORE_VERSION, "calibrations": dict(self.entries)}
+            try:
+                self._replace_file(snapshot)
+                self.writes += 1
+                return True
+            except OSError as e:
+                self.log(f"Failed to save calibration file: {e}", level="error")
+                # Still unsaved, so the writer thread tries again
+                self.dirty.set()
+                return False
+
+    def _replace_file(self, data):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix=".calibration-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
@@ -0,0 +1,227 @@
+# config_watcher.py
+
+# Hot reload of main_config.json. A background thread checks the file's mtime at low frequency;
+# on a change it parses and validates the file and builds the bridge's runtime config (button
+# plans included) off the tick path. The main loop picks the result up with take() between
+# ticks, so a swap never lands in the middle of a tick. An invalid file is reported and ignored.
+
+# === Standard library imports ===
+import copy
+import json
+import os
+import threading
+
+# === Local project imports ===
+from axis_mixer import mixer_config_errors
+from head_filters import FILTER_KEYS, filter_spec_errors
+from head_prediction import PREDICTION_MODES
+from stick_pipeline import DEADZONE_SHAPES, STICK_PREFIXES, curve_spec_errors
+from triad_openvr import ControllerState
+
+# === Constants ===
+DEFAULT_POLL_S = 1.0
+
+NUMBER_KEYS = (
+    "HEADTRACKING_SENSITIVITY_YAW", "HEADTRACKING_SENSITIVITY_PITCH", "HEADTRACKING_RANGE_DEGREES",
+    "HEADTRACKING_LOOKAHEAD_MS", "DYNAMIC_DEADZONE_WINDOW", "JOYSTICK_BLEND_HMD",
+    "JOYSTICK_BLEND_CONTROLLER", "GAMEPAD_KEEPALIVE_MS",
+)
+UNIT_INTERVAL_KEYS = (   # Numbers that only make sense in [0, 1]
+    "HEADTRACKING_DEADZONE_X", "HEADTRACKING_DEADZONE_Y",
+    "HEADTRACKING_SMOOTHING_YAW", "HEADTRACKING_SMOOTHING_PITCH",
+    "LEFT_X_DEADZONE", "LEFT_Y_DEADZONE", "RIGHT_X_DEADZONE", "RIGHT_Y_DEADZONE",
+    "LEFT_RADIAL_DEADZONE", "RIGHT_RADIAL_DEADZONE",
+)
+BOOL_KEYS = (
+    "HEADTRACKING_ENABLED", "HEADTRACKING_YAW_ENABLED", "HEADTRACKING_PITCH_ENABLED",
+    "DYNAMIC_DEADZONE_ENABLED", "LEFT_X_ENABLED", "LEFT_Y_ENABLED", "RIGHT_X_ENABLED", "RIGHT_Y_ENABLED",
+)
+REMAP_KEYS = ("LEFT_X_REMAP", "LEFT_Y_REMAP", "RIGHT_X_REMAP", "RIGHT_Y_REMAP")
+REMAP_CONTROLLERS = ("left_controller", "right_controller")
+RESTART_KEYS = ("CONTROLLER_TYPE",)   # Only read at startup
+
+
+# === Validation ===
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def validate_config(raw):
+    """
+    Returns a list of problems with a parsed main_config.json; empty if it is usable. Missing keys
+    are fine (the bridges fall back to defaults); present keys must have the right type and range.
+    """
+    if not isinstance(raw, dict):
+        return ["top level is not a JSON object"]
+    errors = []
+    for key in NUMBER_KEYS:
+        if key in raw and not _is_number(raw[key]):
+            errors.append(f"{key} must be a number")
+    for key in UNIT_INTERVAL_KEYS:
+        if key in raw and not (_is_number(raw[key]) and 0.0 <= raw[key] <= 1.0):
+            errors.append(f"{key} must be a number between 0 and 1")
+    for key in BOOL_KEYS:
+        if key in raw and not isinstance(raw[key], bool):
+            errors.append(f"{key} must be true or false")
+    for key in REMAP_KEYS:
+        if key not in raw:
+            continue
+        value = raw[key]
+        if not isinstance(value, str):
+            errors.append(f"{key} must be a string")
+            continue
+        controller, _, field = value.rpartition(':')
+        if controller and controller not in REMAP_CONTROLLERS:
+            errors.append(f"{key}: unknown controller '{controller}'")
+        elif field not in ControllerState.__slots__:
+            errors.append(f"{key}: unknown input '{field}'")
+    if raw.get("HEADTRACKING_PREDICTION", PREDICTION_MODES[0]) not in PREDICTION_MODES:
+        errors.append(f"HEADTRACKING_PREDICTION must be one of {', '.join(PREDICTION_MODES)}")
+    for key in FILTER_KEYS.values():
+        if key in raw:
+            errors.extend(filter_spec_errors(key, raw[key]))
+    for prefix in STICK_PREFIXES:
+        if raw.get(f"{prefix}_DEADZONE_SHAPE", DEADZONE_SHAPES[0]) not in DEADZONE_SHAPES:
+            errors.append(f"{prefix}_DEADZONE_SHAPE must be one of {', '.join(DEADZONE_SHAPES)}")
+        if f"{prefix}_CURVE" in raw:
+            errors.extend(curve_spec_errors(f"{prefix}_CURVE", raw[f"{prefix}_CURVE"]))
+    errors.extend(mixer_config_errors(raw))
+    mappings = raw.get("MAPPINGS", {})
+    if not isinstance(mappings, dict):
+        errors.append("MAPPINGS must be an object")
+        mappings = {}
+    for controller_type, mapping_sets in mappings.items():
+        if not isinstance(mapping_sets, dict):
+            errors.append(f"MAPPINGS.{controller_type} must be an object")
+            continue
+        for set_name, controllers in mapping_sets.items():
+            if not isinstance(controllers, dict):
+                errors.append(f"MAPPINGS.{controller_type}.{set_name} must be an object")
+                continue
+            for controller, buttons in controllers.items():
+                if not isinstance(buttons, dict):
+                    errors.append(f"MAPPINGS.{controller_type}.{set_name}.{controller} must be an object")
+                    continue
+                for button, item in buttons.items():
+                    if not isinstance(item, dict) or not isinstance(item.get("target") or "", str):
+                        errors.append(f"MAPPINGS.{controller_type}.{set_name}.{controller}.{button} needs a string target")
+    return errors
+
+
+def _flatten(value, prefix=""):
+    if isinstance(value, dict):
+        items = {}
+        for key, child in value.items():
+            items.update(_flatten(child, f"{prefix}.{key}" if prefix else key))
+        return items
+    return {prefix: value}
+
+def describe_changes(old_raw, new_raw):
+    """
+    Lists the settings that differ between two parsed configs as 'KEY: old -> new' lines, with
+    nested MAPPINGS entries written as dotted paths.
+    """
+    old_items, new_items = _flatten(old_raw), _flatten(new_raw)
+    changes = []
+    for key in sorted(set(old_items) | set(new_items)):
+        if key.startswith("__comment"):
+            continue
+        old, new = old_items.get(key, "<unset>"), new_items.get(key, "<unset>")
+        if old != new:
+            changes.append(f"{key}: {old} -> {new}")
+    return changes
+
+
+# === Watcher ===
+class ConfigWatcher:
+    """
+    Watches a config file from a daemon thread.
+
+    build(raw) turns a parsed, validated config into whatever the bridge swaps in (it gets a deep
+    copy, so it may mutate it). take() returns the newest built config once, or None; it is a
+    single attribute check when nothing changed. log is the bridge's log_and_print.
+    """
+    def __init__(self, path, build, log, poll_s=DEFAULT_POLL_S):
+        self.path = path
+        self.build = build
+        self.log = log
+        self.poll_s = poll_s
+        self.lock = threading.Lock()
+        self.pending = None
+        self.applied = 0
+        self.rejected = 0
+        self.stamp = self._stamp()
+        self.raw = self._read()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._watch, name="ConfigWatcher", daemon=True)
+        self.thread.start()
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _watch(self):
+        while not self.stop_event.wait(self.poll_s):
+            stamp = self._stamp()
+            if stamp is None or stamp == self.stamp:
+                continue
+            self.stamp = stamp
+            self._reload()
+
+    def _reload(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+        except (OSError, ValueError) as e:
+            self._reject([f"could not be read: {e}"])
+            return
+        errors = validate_config(raw)
+        if errors:
+            self._reject(errors)
+            return
+        changes = describe_changes(self.raw, raw)
+        if not changes:
+            return
+        try:
+            built = self.build(copy.deepcopy(raw))
+        except Exception as e:
+            self._reject([f"could not be applied: {e}"])
+            return
+        with self.lock:
+            self.pending = (built, changes)
+        self.raw = raw
+        for key in RESTART_KEYS:
+            if any(change.startswith(key + ":") for change in changes):
+                self.log(f"{key} changed; restart the bridge for it to take effect.", level="warning")
+
+    def _reject(self, errors):
+        self.rejected += 1
+        self.log(f"Config reload rejected, keeping the current settings: {'; '.join(errors)}", level="error")
+
+    def take(self):
+        """
+        Returns (built config, change lines) for a reload that has not been applied yet, or None.
+        """
+        if self.pending is None:
+            return None
+        with self.lock:
+            pending, self.pending = self.pending, None
+        if pending is not None:
+            self.applied += 1
+        return pending
+
+    def close(self):
+        self.stop_event.set()
+        self.thread.join()
+
+    def summary(self):
+        return f"Config reload: {self.applied} applied, {self.rejected} rejected"
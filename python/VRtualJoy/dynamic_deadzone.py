@@ -0,0 +1,126 @@
+# dynamic_deadzone.py
+
+# Adaptive per-axis deadzones for DYNAMIC_DEADZONE_ENABLED. Each axis keeps a rolling window of
+# its last DYNAMIC_DEADZONE_WINDOW seconds of input with an O(1) running mean and variance. While
+# the window looks like an axis at rest (little spread, no further off-centre than the widest
+# deadzone), the deadzone moves towards |mean| + NOISE_SIGMAS * std: wider for a worn stick
+# resting off-centre or a jittery headset, narrower for a clean one. A moving axis spreads too
+# much to pass the rest test and leaves the deadzone alone; the slow ADAPT_RATE keeps brief pauses
+# near centre from moving it far.
+#
+# Axes are identified by their static deadzone key (LEFT_X_DEADZONE, HEADTRACKING_DEADZONE_X, ...),
+# whose configured value is the starting point.
+
+# === Standard library imports ===
+import math
+from array import array
+
+# === Constants ===
+DYNAMIC_DEADZONES = "DYNAMIC_DEADZONES"   # Config key the compiled deadzones are stored under
+MIN_WINDOW_SAMPLES = 8
+NOISE_SIGMAS = 3.0
+ADAPT_RATE = 0.02          # Fraction of the way to the new estimate the deadzone moves per rest tick
+
+# (rest std, rest |mean|, minimum, maximum) per kind of axis, in the axis' own units
+STICK_LIMITS = (0.03, 0.3, 0.02, 0.3)       # Normalized -1..1 trackpad / thumbstick values
+HEAD_LIMITS = (0.1, 1.0, 0.05, 2.0)         # Degrees from the calibrated centre
+
+
+# === Rolling statistics ===
+class RollingStats:
+    """
+    Mean and variance of the last size values. push() is O(1): the value leaving the window is
+    removed with the sliding form of Welford's update instead of re-summing the window.
+    """
+    __slots__ = ("values", "size", "count", "index", "mean", "m2")
+
+    def __init__(self, size):
+        self.values = array('d', bytes(8 * size))
+        self.size = size
+        self.count = 0
+        self.index = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, value):
+        if self.count < self.size:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (value - self.mean)
+        else:
+            old = self.values[self.index]
+            old_mean = self.mean
+            self.mean += (value - old) / self.size
+            self.m2 += (value - old) * (value - self.mean + old - old_mean)
+        self.values[self.index] = value
+        self.index += 1
+        if self.index == self.size:
+            self.index = 0
+
+    def variance(self):
+        # Rounding can leave m2 a hair below zero for a constant input
+        return max(0.0, self.m2 / self.count) if self.count else 0.0
+
+
+# === Deadzones ===
+class DynamicDeadzone:
+    __slots__ = ("stats", "threshold", "rest_std", "rest_mean", "minimum", "maximum")
+
+    def __init__(self, window, initial, limits):
+        self.stats = RollingStats(window)
+        self.rest_std, self.rest_mean, self.minimum, self.maximum = limits
+        self.threshold = min(max(initial, self.minimum), self.maximum)
+
+    def update(self, value):
+        stats = self.stats
+        stats.push(value)
+        if stats.count == stats.size:
+            std = math.sqrt(stats.variance())
+            offset = abs(stats.mean)
+            if std < self.rest_std and offset < self.rest_mean:
+                target = min(max(offset + NOISE_SIGMAS * std, self.minimum), self.maximum)
+                self.threshold += ADAPT_RATE * (target - self.threshold)
+        return self.threshold
+
+
+class DynamicDeadzones:
+    """
+    One DynamicDeadzone per static deadzone key, created on first use.
+    """
+    def __init__(self, config, window):
+        self.config = config
+        self.window = window
+        self.axes = {}
+
+    def apply(self, key, value, default):
+        axis = self.axes.get(key)
+        if axis is None:
+            limits = HEAD_LIMITS if key.startswith("HEADTRACKING_") else STICK_LIMITS
+            axis = self.axes[key] = DynamicDeadzone(self.window, self.config.get(key, default), limits)
+        return 0.0 if abs(value) < axis.update(value) else value
+
+    def describe(self):
+        thresholds = ", ".join(f"{key} {axis.threshold:.3f}" for key, axis in sorted(self.axes.items()))
+        return f"Dynamic deadzones ({self.window} samples): {thresholds or 'no axes yet'}"
+
+
+def create_dynamic_deadzones(config, hz):
+    """
+    Returns DynamicDeadzones for a config with DYNAMIC_DEADZONE_ENABLED, else None. Built with the
+    rest of the config, so a reload starts from the new static values.
+    """
+    if not config.get("DYNAMIC_DEADZONE_ENABLED", False):
+        return None
+    window = max(MIN_WINDOW_SAMPLES, round(config.get("DYNAMIC_DEADZONE_WINDOW", 0.15) * hz))
+    return DynamicDeadzones(config, window)
+
+
+def apply_axis_deadzone(config, key, value, default=0.1):
+    """
+    Zeroes value inside the axis' deadzone: the adaptive one when enabled, else config[key].
+    """
+    deadzones = config.get(DYNAMIC_DEADZONES)
+    if deadzones is None:
+        return 0.0 if abs(value) < config.get(key, default) else value
+    return deadzones.apply(key, value, default)
@@ -0,0 +1,170 @@
+# filter_eval.py
+
+# Offline comparison of the headtracking filters in head_filters.py on recorded HMD traces.
+#
+#   python filter_eval.py trace.csv
+#   python filter_eval.py --synthetic --noise-deg 0.1
+#   python filter_eval.py --synthetic --filter '{"type": "one_euro", "beta": 0.5}' kalman
+#
+# Traces come from the --record-head option of Xinput_main.py / DS4_main.py. Each filter setting
+# is fed the measured head angles with the trace's own timestamps, then scored per axis:
+#   lag     time shift (ms) that best aligns the output with the measured angle, as in
+#           prediction_eval.py; this is what the filter costs while the head moves
+#   jitter  RMS (deg) of the output around its own centred moving average while the head is at
+#           rest (angular speed under REST_SPEED_DEG_S for REST_SETTLE_S); this is the noise the
+#           filter lets through
+#   rms     RMS difference (deg) between output and measured angle at the same instant
+# The "raw" row is the unfiltered input, for reference. --noise-deg adds Gaussian noise to the
+# filter input only, to see how the settings hold up on a noisier headset.
+
+# === Standard library imports ===
+import argparse
+import json
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# === Local project imports ===
+from head_filters import FILTER_EMA, FILTER_KALMAN, FILTER_ONE_EURO, create_head_filter, filter_spec_errors
+from head_prediction import load_head_trace, predicted_yaw_pitch
+from prediction_eval import estimate_lag_ms, rms_degrees, synthetic_trace, unwrap_degrees
+
+# === Constants ===
+REST_SPEED_DEG_S = 5.0
+REST_SETTLE_S = 0.3       # Time after the head stops before samples count as at rest
+JITTER_WINDOW_S = 0.1
+DEFAULT_SETTINGS = (
+    {"type": FILTER_EMA, "alpha": 0.2},
+    {"type": FILTER_EMA, "alpha": 0.5},
+    {"type": FILTER_ONE_EURO},
+    {"type": FILTER_ONE_EURO, "min_cutoff": 1.0, "beta": 0.05},
+    {"type": FILTER_ONE_EURO, "min_cutoff": 0.3, "beta": 0.5},
+    {"type": FILTER_KALMAN},
+    {"type": FILTER_KALMAN, "process_noise": 500.0},
+)
+
+
+# === Scoring ===
+def moving_average(times, values, window_s):
+    # Centred mean over +-window_s / 2, with two pointers so it stays linear in the trace length
+    rtn = []
+    lo = hi = 0
+    total = 0.0
+    half = window_s / 2
+    for t in times:
+        while hi < len(times) and times[hi] <= t + half:
+            total += values[hi]
+            hi += 1
+        while times[lo] < t - half:
+            total -= values[lo]
+            lo += 1
+        rtn.append(total / (hi - lo))
+    return rtn
+
+def jitter_degrees(times, output, at_rest):
+    smooth = moving_average(times, output, JITTER_WINDOW_S)
+    residuals = [value - mean for value, mean, rest in zip(output, smooth, at_rest) if rest]
+    return math.sqrt(sum(r * r for r in residuals) / len(residuals)) if residuals else float("nan")
+
+def rest_mask(samples):
+    # At rest once the head has been still for REST_SETTLE_S and stays still through the jitter
+    # window, so the tail of a filter catching up with a stop does not count as jitter
+    still = [math.degrees(math.sqrt(sum(w * w for w in sample[3]))) < REST_SPEED_DEG_S for sample in samples]
+    times = [sample[0] for sample in samples]
+    rtn = []
+    last_moving = -math.inf
+    next_moving = [math.inf] * len(samples)
+    for i in range(len(samples) - 2, -1, -1):
+        next_moving[i] = times[i + 1] if not still[i + 1] else next_moving[i + 1]
+    for i, t in enumerate(times):
+        if not still[i]:
+            last_moving = t
+        rtn.append(still[i] and t - last_moving >= REST_SETTLE_S and next_moving[i] - t > JITTER_WINDOW_S / 2)
+    return rtn
+
+
+# === Evaluation ===
+def spec_label(spec):
+    parameters = ", ".join(f"{name} {value:g}" for name, value in spec.items() if name != "type")
+    return f"{spec['type']} ({parameters})" if parameters else spec["type"]
+
+def evaluate(samples, specs, noise_deg=0.0, seed=1):
+    """
+    Returns [(label, {"yaw": (lag_ms, jitter, rms), "pitch": ...})], the raw input first.
+    """
+    rng = random.Random(seed)
+    times = [sample[0] for sample in samples]
+    hz = (len(times) - 1) / (times[-1] - times[0])
+    measured = [predicted_yaw_pitch(sample, 0.0) for sample in samples]
+    at_rest = rest_mask(samples)
+    axes = {}
+    for axis, name in ((0, "yaw"), (1, "pitch")):
+        truth = unwrap_degrees([pose[axis] for pose in measured])
+        noisy = [value + rng.gauss(0.0, noise_deg) for value in truth] if noise_deg > 0 else truth
+        axes[name] = (truth, noisy)
+
+    def score(outputs):
+        return {name: (estimate_lag_ms(times, axes[name][0], output), jitter_degrees(times, output, at_rest),
+                       rms_degrees(axes[name][0], output))
+                for name, output in outputs.items()}
+
+    results = [("raw", score({name: noisy for name, (_truth, noisy) in axes.items()}))]
+    for spec in specs:
+        outputs = {}
+        for name, (truth, noisy) in axes.items():
+            config = {f"HEADTRACKING_FILTER_{name.upper()}": spec}
+            head_filter = create_head_filter(config, name, hz)
+            # Start settled on the first sample, as after a calibration
+            head_filter.last = noisy[0]
+            outputs[name] = [head_filter.smooth(value, t) for value, t in zip(noisy, times)]
+        results.append((spec_label(spec), score(outputs)))
+    return results
+
+
+def parse_spec(text):
+    spec = json.loads(text) if text.lstrip().startswith("{") else {"type": text}
+    errors = filter_spec_errors("--filter", spec)
+    if errors:
+        raise argparse.ArgumentTypeError("; ".join(errors))
+    spec.setdefault("type", FILTER_EMA)
+    return spec
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline headtracking filter comparison")
+    parser.add_argument("trace", nargs="?", help="CSV trace recorded with --record-head")
+    parser.add_argument("--synthetic", action="store_true", help="Evaluate on a generated trace instead")
+    parser.add_argument("--filter", type=parse_spec, nargs="+", dest="specs",
+                        help="Filter settings as a type name or a HEADTRACKING_FILTER_* JSON object")
+    parser.add_argument("--noise-deg", type=float, default=0.0, help="Extra input noise (deg, standard deviation)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        samples = synthetic_trace(seed=args.seed)
+    elif args.trace:
+        samples = load_head_trace(args.trace)
+    else:
+        parser.error("Pass a trace file or --synthetic")
+    if len(samples) < 2:
+        parser.error("Trace needs at least two samples")
+
+    specs = args.specs or DEFAULT_SETTINGS
+    rest = sum(rest_mask(samples))
+    print(f"{len(samples)} samples over {samples[-1][0] - samples[0][0]:.1f} s, {rest} at rest, "
+          f"extra noise {args.noise_deg:g} deg")
+    results = evaluate(samples, specs, args.noise_deg, args.seed)
+    width = max(len(label) for label, _scores in results)
+    print(f"{'filter':<{width}} | {'yaw lag':>8} {'jitter':>7} {'rms':>6} | {'pitch lag':>9} {'jitter':>7} {'rms':>6}")
+    for label, scores in results:
+        yaw, pitch = scores["yaw"], scores["pitch"]
+        print(f"{label:<{width}} | {yaw[0]:>6d}ms {yaw[1]:>7.3f} {yaw[2]:>6.2f} | "
+              f"{pitch[0]:>7d}ms {pitch[1]:>7.3f} {pitch[2]:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
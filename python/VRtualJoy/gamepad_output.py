@@ -0,0 +1,253 @@
+# gamepad_output.py
+
+# === Standard library imports ===
+import ctypes
+import threading
+import time
+
+
+# === Latest-value mailbox ===
+class LatestValueMailbox:
+    """
+    Single-slot handoff between the tick loop and the writer thread. Posting replaces any item
+    that has not been taken yet, so the writer always sees the newest report.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._item = None
+        self.dropped = 0
+
+    def post(self, item):
+        with self._lock:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+        self._event.set()
+
+    def take(self, timeout=None):
+        if not self._event.wait(timeout):
+            return None
+        with self._lock:
+            item = self._item
+            self._item = None
+            self._event.clear()
+        return item
+
+    def wake(self):
+        self._event.set()
+
+
+# === Writer thread ===
+class OutputWriter(threading.Thread):
+    """
+    Submits reports from a LatestValueMailbox on its own thread, so driver latency and
+    gamepad reinitialization never delay pose sampling in the tick loop.
+    """
+    def __init__(self, output):
+        super().__init__(name="GamepadOutputWriter", daemon=True)
+        self.output = output
+        self.mailbox = LatestValueMailbox()
+        self.running = True
+        self.error = None
+        self.latency_count = 0
+        self.latency_total_s = 0.0
+        self.latency_max_s = 0.0
+
+    def run(self):
+        while self.running:
+            item = self.mailbox.take(timeout=0.5)
+            if item is None:
+                continue
+            snapshot, posted_at = item
+            try:
+                self.output.write_target(snapshot)
+            except BaseException as e:
+                # initialize_gamepad may sys.exit(); surface it to the tick loop instead
+                self.error = e
+                self.running = False
+                return
+            latency = time.perf_counter() - posted_at
+            self.latency_count += 1
+            self.latency_total_s += latency
+            if latency > self.latency_max_s:
+                self.latency_max_s = latency
+
+    def stop(self):
+        self.running = False
+        self.mailbox.wake()
+
+    def summary(self):
+        mean_ms = 1000.0 * self.latency_total_s / self.latency_count if self.latency_count else 0.0
+        return (f"writer thread: submit latency mean {mean_ms:.3f} ms, max {1000.0 * self.latency_max_s:.3f} ms, "
+                f"{self.mailbox.dropped} report(s) replaced before submit")
+
+
+# === Dirty-tracked output ===
+class GamepadOutput:
+    """
+    Front end for a vgamepad target that only submits reports that changed.
+
+    The per-tick processing code writes through this object with the same method names as
+    vgamepad (press_button, left_joystick_float, ...). Writes go straight to the report fields.
+    submit() compares the report bytes with the last submitted ones and only calls
+    gamepad.update() (a ViGEm IOCTL or a burst of evdev events) when something changed, or when
+    the optional keepalive period has elapsed.
+
+    With threaded=True the tick loop writes into a private report and submit() only posts the
+    report bytes to an OutputWriter thread.
+    """
+    def __init__(self, gamepad, safe_update, keepalive_s=0.0, threaded=False):
+        self.safe_update = safe_update
+        self.keepalive_s = keepalive_s
+        self.submitted = 0
+        self.suppressed = 0
+        self.keepalives = 0
+        self.reinitialized = 0
+        self.gamepad = gamepad
+        if threaded:
+            self.report = type(gamepad.report)()
+            ctypes.memmove(ctypes.addressof(self.report), ctypes.addressof(gamepad.report), ctypes.sizeof(self.report))
+            self.writer = OutputWriter(self)
+            self.writer.start()
+        else:
+            self.report = gamepad.report
+            self.writer = None
+        self.last_submitted = None
+        self.next_keepalive = 0.0
+        self.resend = False     # Set when a reinitialized target did not take the last report
+
+    def press_button(self, button):
+        self.report.wButtons |= button
+
+    def release_button(self, button):
+        self.report.wButtons &= ~button
+
+    def sync_target(self, gamepad):
+        # Hook for state a backend keeps outside the report
+        pass
+
+    def write_target(self, snapshot):
+        """
+        Copies the report bytes to the gamepad and sends them. Runs on the writer thread when threaded.
+        """
+        gamepad = self.gamepad
+        self.resend = False
+        if self.writer is not None:
+            ctypes.memmove(ctypes.addressof(gamepad.report), snapshot, len(snapshot))
+        self.sync_target(gamepad)
+        updated = self.safe_update(gamepad)
+        if updated is not gamepad:
+            # The backend reinitialized the target; hand it the current report once. If that
+            # update fails too, the next submit sends it again (and may reinitialize again)
+            # rather than looping here.
+            if self.writer is None:
+                updated.report = self.report
+            else:
+                ctypes.memmove(ctypes.addressof(updated.report), snapshot, len(snapshot))
+            self.sync_target(updated)
+            self.gamepad = updated
+            self.reinitialized += 1
+            try:
+                updated.update()
+            except Exception:
+                self.resend = True
+
+    def submit(self):
+        """
+        Sends (or posts, when threaded) the report if it changed since the last submit.
+        Returns True if the report was handed on.
+        """
+        snapshot = bytes(self.report)
+        keepalive_due = False
+        if snapshot == self.last_submitted and not self.resend:
+            if self.keepalive_s <= 0 or time.perf_counter() < self.next_keepalive:
+                self.suppressed += 1
+                return False
+            keepalive_due = True
+
+        if self.writer is None:
+            self.write_target(snapshot)
+        elif self.writer.error is not None:
+            raise RuntimeError(f"Gamepad output writer stopped: {self.writer.error!r}")
+        else:
+            self.writer.mailbox.post((snapshot, time.perf_counter()))
+
+        self.last_submitted = snapshot
+        self.submitted += 1
+        if keepalive_due:
+            self.keepalives += 1
+        if self.keepalive_s > 0:
+            self.next_keepalive = time.perf_counter() + self.keepalive_s
+        return True
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.stop()
+            self.writer.join(timeout=2.0)
+
+    def summary(self):
+        total = self.submitted + self.suppressed
+        ratio = (100.0 * self.suppressed / total) if total else 0.0
+        text = (f"Gamepad output: {self.submitted} submitted, {self.suppressed} suppressed "
+                f"({ratio:.1f}%), {self.keepalives} keepalive(s), {self.reinitialized} reinit(s)")
+        if self.writer is not None:
+            text += ", " + self.writer.summary()
+        return text
+
+
+class XInputOutput(GamepadOutput):
+    def left_trigger(self, value):
+        self.report.bLeftTrigger = value
+
+    def right_trigger(self, value):
+        self.report.bRightTrigger = value
+
+    def left_trigger_float(self, value_float):
+        self.report.bLeftTrigger = round(value_float * 255)
+
+    def right_trigger_float(self, value_float):
+        self.report.bRightTrigger = round(value_float * 255)
+
+    def left_joystick_float(self, x_value_float, y_value_float):
+        report = self.report
+        report.sThumbLX = round(x_value_float * 32767)
+        report.sThumbLY = round(y_value_float * 32767)
+
+    def right_joystick_float(self, x_value_float, y_value_float):
+        report = self.report
+        report.sThumbRX = round(x_value_float * 32767)
+        report.sThumbRY = round(y_value_float * 32767)
+
+
+class DS4Output(GamepadOutput):
+    def left_trigger(self, value):
+        self.report.bTriggerL = value
+
+    def right_trigger(self, value):
+        self.report.bTriggerR = value
+
+    def left_trigger_float(self, value_float):
+        self.report.bTriggerL = round(value_float * 255)
+
+    def right_trigger_float(self, value_float):
+        self.report.bTriggerR = round(value_float * 255)
+
+    def left_joystick_float(self, x_value_float, y_value_float):
+        report = self.report
+        report.bThumbLX = 128 + round(x_value_float * 127)
+        report.bThumbLY = 128 + round(y_value_float * 127)
+
+    def right_joystick_float(self, x_value_float, y_value_float):
+        report = self.report
+        report.bThumbRX = 128 + round(x_value_float * 127)
+        report.bThumbRY = 128 + round(y_value_float * 127)
+
+    def directional_pad(self, direction):
+        # Same layout as vigem_commons.DS4_SET_DPAD: the hat lives in the low nibble of wButtons
+        report = self.report
+        report.wButtons = (report.wButtons & ~0xF) | direction
+
+    def sync_target(self, gamepad):
+        # The Linux backend keeps the hat outside the report
+        gamepad.directional_pad(gamepad.report.wButtons & 0xF)
@@ -0,0 +1,215 @@
+# head_filters.py
+
+# Smoothing filters for the headtracking yaw and pitch. Each axis picks its filter with
+# HEADTRACKING_FILTER_YAW / HEADTRACKING_FILTER_PITCH, either a type name or an object with the
+# type and its parameters:
+#
+#   "HEADTRACKING_FILTER_YAW": {"type": "one_euro", "min_cutoff": 0.5, "beta": 0.2}
+#
+#   ema       fixed-alpha exponential smoothing, the original Smoother; alpha defaults to
+#             HEADTRACKING_SMOOTHING_YAW / _PITCH
+#   one_euro  One Euro filter: an EMA whose cutoff rises with the speed of the signal, so the head
+#             at rest is smoothed hard and a fast turn passes with little lag
+#   kalman    constant-velocity Kalman filter; tracks the angle and its rate, so it follows steady
+#             turns without lag and the noise settings trade jitter against response to stops
+#
+# All filters share Smoother's interface: smooth(value) returns the filtered value and .last holds
+# it. The adaptive filters measure the time between calls, so they behave the same at any tick
+# rate; filter_eval.py compares settings on recorded or synthetic traces.
+
+# === Standard library imports ===
+import math
+import time
+
+# === Constants ===
+FILTER_EMA = "ema"
+FILTER_ONE_EURO = "one_euro"
+FILTER_KALMAN = "kalman"
+
+# Parameters each filter accepts and their defaults, in degrees and seconds
+FILTER_PARAMETERS = {
+    FILTER_EMA: {"alpha": 0.2},
+    FILTER_ONE_EURO: {"min_cutoff": 0.5, "beta": 0.2, "d_cutoff": 1.0},
+    FILTER_KALMAN: {"process_noise": 50.0, "measurement_noise": 0.01},
+}
+FILTER_TYPES = tuple(FILTER_PARAMETERS)
+FILTER_KEYS = {"yaw": "HEADTRACKING_FILTER_YAW", "pitch": "HEADTRACKING_FILTER_PITCH"}
+SMOOTHING_KEYS = {"yaw": "HEADTRACKING_SMOOTHING_YAW", "pitch": "HEADTRACKING_SMOOTHING_PITCH"}
+
+MAX_DT_S = 0.25    # Longer gaps (idle rate, headtracking toggled off) are treated as this long
+
+
+# === Filters ===
+class Smoother:
+    def __init__(self, alpha=0.2):
+        self.alpha = alpha
+        self.last = 0.0
+
+    def smooth(self, value, t=None):
+        self.last = (self.alpha * value) + ((1 - self.alpha) * self.last)
+        return self.last
+
+    def describe(self):
+        return f"{FILTER_EMA} (alpha {self.alpha:g})"
+
+
+class _TimedFilter:
+    """
+    Tracks the time between smooth() calls. t defaults to time.perf_counter(); the first call
+    after creation or a reset assumes one nominal tick.
+    """
+    def __init__(self, hz):
+        self.nominal_dt = 1.0 / hz
+        self.last_time = None
+        self.last = 0.0
+
+    def _dt(self, t):
+        if t is None:
+            t = time.perf_counter()
+        last_time, self.last_time = self.last_time, t
+        if last_time is None:
+            return self.nominal_dt
+        dt = t - last_time
+        return min(dt, MAX_DT_S) if dt > 0 else self.nominal_dt
+
+
+def _smoothing_factor(dt, cutoff):
+    r = 2 * math.pi * cutoff * dt
+    return r / (r + 1)
+
+
+class OneEuroFilter(_TimedFilter):
+    """
+    Casiez et al., CHI 2012. The speed estimate is itself smoothed at d_cutoff, and the cutoff
+    for the value is min_cutoff + beta * |speed|, with speed in degrees per second.
+    """
+    def __init__(self, min_cutoff=0.5, beta=0.2, d_cutoff=1.0, hz=90.0):
+        super().__init__(hz)
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.speed = 0.0
+
+    def smooth(self, value, t=None):
+        dt = self._dt(t)
+        a_d = _smoothing_factor(dt, self.d_cutoff)
+        self.speed += a_d * ((value - self.last) / dt - self.speed)
+        a = _smoothing_factor(dt, self.min_cutoff + self.beta * abs(self.speed))
+        self.last += a * (value - self.last)
+        return self.last
+
+    def reset(self, value):
+        self.last = value
+        self.speed = 0.0
+        self.last_time = None
+
+    def describe(self):
+        return f"{FILTER_ONE_EURO} (min_cutoff {self.min_cutoff:g} Hz, beta {self.beta:g}, d_cutoff {self.d_cutoff:g} Hz)"
+
+
+class KalmanFilter(_TimedFilter):
+    """
+    State is (angle, rate). process_noise is the spectral density of the unmodelled angular
+    acceleration (deg^2/s^3), measurement_noise the variance of one sample (deg^2).
+    """
+    def __init__(self, process_noise=50.0, measurement_noise=0.01, hz=90.0):
+        super().__init__(hz)
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.reset(0.0)
+
+    def smooth(self, value, t=None):
+        dt = self._dt(t)
+        q = self.process_noise
+        p00, p01, p11 = self.p00, self.p01, self.p11
+        # Predict: x += rate * dt, P = F P F' + Q for white-noise acceleration
+        x = self.last + self.rate * dt
+        p00 += dt * (2 * p01 + dt * p11) + q * dt * dt * dt / 3
+        p01 += dt * p11 + q * dt * dt / 2
+        p11 += q * dt
+        # Update with the measured angle
+        s = p00 + self.measurement_noise
+        k0, k1 = p00 / s, p01 / s
+        residual = value - x
+        self.last = x + k0 * residual
+        self.rate += k1 * residual
+        self.p00 = (1 - k0) * p00
+        self.p01 = (1 - k0) * p01
+        self.p11 = p11 - k1 * p01
+        return self.last
+
+    def reset(self, value):
+        self.last = value
+        self.rate = 0.0
+        self.last_time = None
+        # Unknown rate at the start; the angle is whatever we were given
+        self.p00, self.p01, self.p11 = self.measurement_noise, 0.0, 1e4
+
+    def describe(self):
+        return f"{FILTER_KALMAN} (process_noise {self.process_noise:g}, measurement_noise {self.measurement_noise:g})"
+
+
+# === Config ===
+def filter_spec(config, axis):
+    """
+    Returns (type, parameters) for axis ("yaw" or "pitch"), defaults filled in.
+    """
+    spec = config.get(FILTER_KEYS[axis], FILTER_EMA)
+    if isinstance(spec, str):
+        spec = {"type": spec}
+    filter_type = spec.get("type", FILTER_EMA)
+    if filter_type not in FILTER_PARAMETERS:
+        raise ValueError(f"Unknown headtracking filter: {filter_type}")
+    parameters = dict(FILTER_PARAMETERS[filter_type])
+    if filter_type == FILTER_EMA:
+        parameters["alpha"] = config.get(SMOOTHING_KEYS[axis], parameters["alpha"])
+    parameters.update((name, spec[name]) for name in FILTER_PARAMETERS[filter_type] if name in spec)
+    return filter_type, parameters
+
+
+def filter_spec_errors(key, spec):
+    """
+    Problems with one HEADTRACKING_FILTER_* value, for config validation.
+    """
+    if isinstance(spec, str):
+        spec = {"type": spec}
+    if not isinstance(spec, dict):
+        return [f"{key} must be a filter type or an object"]
+    filter_type = spec.get("type", FILTER_EMA)
+    if filter_type not in FILTER_PARAMETERS:
+        return [f"{key}.type must be one of {', '.join(FILTER_TYPES)}"]
+    errors = []
+    for name, value in spec.items():
+        if name == "type":
+            continue
+        if name not in FILTER_PARAMETERS[filter_type]:
+            errors.append(f"{key}: {filter_type} has no parameter '{name}'")
+        elif not (isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0):
+            errors.append(f"{key}.{name} must be a positive number")
+        elif name == "alpha" and value > 1:
+            errors.append(f"{key}.alpha must be between 0 and 1")
+    return errors
+
+
+def create_head_filter(config, axis, hz, previous=None):
+    """
+    Builds the filter configured for axis. With previous (the filter being replaced on a config
+    reload) the new one starts from its output, so switching filters does not jolt the stick.
+    """
+    filter_type, parameters = filter_spec(config, axis)
+    if filter_type == FILTER_ONE_EURO:
+        head_filter = OneEuroFilter(hz=hz, **parameters)
+    elif filter_type == FILTER_KALMAN:
+        head_filter = KalmanFilter(hz=hz, **parameters)
+    else:
+        head_filter = Smoother(**parameters)
+    if previous is not None:
+        if isinstance(head_filter, Smoother):
+            head_filter.last = previous.last
+        else:
+            head_filter.reset(previous.last)
+    return head_filter
+
+
+def describe_head_filters(yaw_filter, pitch_filter):
+    return f"Headtracking filters: yaw {yaw_filter.describe()}, pitch {pitch_filter.describe()}"
@@ -0,0 +1,108 @@
+# head_prediction.py
+
+# Latency compensation for headtracking. The pose snapshot is taken at the start of a tick, but
+# the resulting stick value reaches the game a tick (plus smoothing and driver delay) later.
+# HeadPredictor either asks the runtime for poses predicted to the output time, or extrapolates
+# the measured pose with its angular velocity, by a configurable look-ahead.
+
+# === Standard library imports ===
+import csv
+
+# === Third-party imports ===
+from triad_openvr import extrapolate_pose
+
+# === Local project imports ===
+from rotation import head_yaw_pitch
+
+# === Constants ===
+PREDICTION_OFF = "off"                  # Latest measured pose, as before
+PREDICTION_RUNTIME = "runtime"          # getDeviceToAbsoluteTrackingPose(predictedSecondsToPhotonsFromNow=look-ahead)
+PREDICTION_EXTRAPOLATE = "extrapolate"  # Rotate the measured pose forward by vAngularVelocity * look-ahead
+PREDICTION_MODES = (PREDICTION_OFF, PREDICTION_RUNTIME, PREDICTION_EXTRAPOLATE)
+
+TRACE_FIELDS = ["t"] + [f"m{i}{j}" for i in range(3) for j in range(4)] + ["vx", "vy", "vz", "wx", "wy", "wz"]
+
+
+# === Predictor ===
+class HeadPredictor:
+    """
+    Supplies the HMD pose matrix used by apply_headtracking_to_right_stick.
+
+    In runtime mode the shared pose frame is switched to predicted poses, so every device read in
+    the tick (including the calibration gesture) sees the same predicted instant. Extrapolate mode
+    leaves the frame alone and only moves the HMD pose forward.
+    """
+    def __init__(self, mode=PREDICTION_OFF, lookahead_ms=0.0, frame=None):
+        if mode not in PREDICTION_MODES:
+            raise ValueError(f"Unknown headtracking prediction mode: {mode}")
+        self.mode = mode
+        self.lookahead_s = max(0.0, lookahead_ms) / 1000.0
+        if frame is not None:
+            # Also resets the frame when a reloaded config turns runtime prediction off
+            frame.seconds_to_photons = self.lookahead_s if mode == PREDICTION_RUNTIME else 0.0
+
+    def pose_matrix(self, hmd):
+        if self.mode == PREDICTION_EXTRAPOLATE and self.lookahead_s > 0:
+            return hmd.get_pose_matrix_extrapolated(self.lookahead_s)
+        return hmd.get_pose_matrix()
+
+    def describe(self):
+        if self.mode == PREDICTION_OFF:
+            return "Headtracking prediction: off"
+        return f"Headtracking prediction: {self.mode}, {1000.0 * self.lookahead_s:.1f} ms look-ahead"
+
+
+def create_head_predictor(config, frame=None):
+    return HeadPredictor(config.get("HEADTRACKING_PREDICTION", PREDICTION_OFF),
+                         config.get("HEADTRACKING_LOOKAHEAD_MS", 0.0), frame)
+
+
+# === Trace recording ===
+class HeadTraceRecorder:
+    """
+    Appends one CSV row per tick with the measured HMD pose matrix, linear and angular velocity.
+    prediction_eval.py replays these traces offline.
+    """
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(TRACE_FIELDS)
+        self.rows = 0
+
+    def record(self, hmd, timestamp):
+        pose = hmd.current_pose()[hmd.index]
+        if not pose.bPoseIsValid:
+            return
+        m = pose.mDeviceToAbsoluteTracking
+        v = pose.vVelocity
+        w = pose.vAngularVelocity
+        self.writer.writerow([f"{timestamp:.6f}"] + [m[i][j] for i in range(3) for j in range(4)] +
+                             [v[0], v[1], v[2], w[0], w[1], w[2]])
+        self.rows += 1
+
+    def close(self):
+        self.file.close()
+
+    def summary(self):
+        return f"Head trace: {self.rows} sample(s) recorded to {self.file.name}"
+
+
+def load_head_trace(path):
+    """
+    Returns a list of (t, pose_mat, velocity, angular_velocity) tuples from a recorded trace.
+    """
+    samples = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            values = [float(row[name]) for name in TRACE_FIELDS]
+            pose_mat = [values[1:5], values[5:9], values[9:13]]
+            samples.append((values[0], pose_mat, values[13:16], values[16:19]))
+    return samples
+
+
+def predicted_yaw_pitch(sample, lookahead_s):
+    # Same yaw and pitch apply_headtracking_to_right_stick uses
+    _t, pose_mat, velocity, angular_velocity = sample
+    if lookahead_s > 0:
+        pose_mat = extrapolate_pose(pose_mat, velocity, angular_velocity, lookahead_s)
+    return head_yaw_pitch(pose_mat)
@@ -0,0 +1,147 @@
+# input_recording.py
+
+# Fixed-record binary recordings of the raw per-tick input: HMD and controller poses straight from
+# the shared pose array, plus each controller's state in VRControllerState_t layout. Every record
+# has the same size, so a recording can be memory-mapped and indexed without parsing.
+#
+# File layout: RecordHeader, then TickRecord * n.
+
+# === Standard library imports ===
+import ctypes
+import mmap
+import queue
+import threading
+
+# === Third-party imports ===
+import openvr
+
+# === Constants ===
+RECORDING_MAGIC = b"VRJREC01"
+RECORDING_VERSION = 1
+NO_DEVICE = -1
+POSE_SLOTS = 3           # hmd, left controller, right controller
+CONTROLLER_SLOTS = 2     # left, right
+FLUSH_RECORDS = 256      # Records per chunk handed to the writer thread
+
+
+# === Record layout ===
+class RecordHeader(ctypes.Structure):
+    _fields_ = [
+        ("magic", ctypes.c_char * 8),
+        ("version", ctypes.c_uint32),
+        ("record_size", ctypes.c_uint32),
+        ("hmd_index", ctypes.c_int32),
+        ("left_index", ctypes.c_int32),
+        ("right_index", ctypes.c_int32),
+        ("hz", ctypes.c_float),
+    ]
+
+
+class TickRecord(ctypes.Structure):
+    _fields_ = [
+        ("timestamp", ctypes.c_double),
+        ("poses", openvr.TrackedDevicePose_t * POSE_SLOTS),
+        ("controllers", openvr.VRControllerState_t * CONTROLLER_SLOTS),
+    ]
+
+
+def device_index(device):
+    return device.index if device is not None else NO_DEVICE
+
+
+# === Recorder ===
+class InputRecorder:
+    """
+    Appends one TickRecord per tick.
+
+    record() fills a preallocated TickRecord (pose structs are memmoved from the pose array) and
+    appends its bytes to an in-memory chunk. Full chunks go to a writer thread, so the tick loop
+    never waits on disk I/O.
+    """
+    def __init__(self, path, hmd, left_controller, right_controller, hz):
+        self.file = open(path, 'wb')
+        header = RecordHeader(RECORDING_MAGIC, RECORDING_VERSION, ctypes.sizeof(TickRecord),
+                              device_index(hmd), device_index(left_controller), device_index(right_controller), hz)
+        self.file.write(bytes(header))
+        self.indices = (header.hmd_index, header.left_index, header.right_index)
+        self.tick = TickRecord()
+        self.pose_size = ctypes.sizeof(openvr.TrackedDevicePose_t)
+        self.pose_addresses = [ctypes.addressof(self.tick.poses[slot]) for slot in range(POSE_SLOTS)]
+        # (state struct, trackpad axis, trigger axis) views per controller slot, built once
+        self.controller_views = [(c, c.rAxis[0], c.rAxis[1]) for c in self.tick.controllers]
+        self.chunk = bytearray()
+        self.chunk_limit = FLUSH_RECORDS * ctypes.sizeof(TickRecord)
+        self.records = 0
+        self.chunks = queue.Queue()
+        self.writer = threading.Thread(target=self._write_chunks, name="InputRecorderWriter", daemon=True)
+        self.writer.start()
+
+    def _write_chunks(self):
+        while True:
+            chunk = self.chunks.get()
+            if chunk is None:
+                return
+            self.file.write(chunk)
+
+    def record(self, frame, left_state, right_state):
+        tick = self.tick
+        tick.timestamp = frame.timestamp
+        poses = frame.poses
+        for slot, index in enumerate(self.indices):
+            if index != NO_DEVICE:
+                ctypes.memmove(self.pose_addresses[slot], ctypes.addressof(poses[index]), self.pose_size)
+        for (recorded, trackpad_axis, trigger_axis), state in zip(self.controller_views, (left_state, right_state)):
+            recorded.unPacketNum = state.unPacketNum
+            recorded.ulButtonPressed = state.ulButtonPressed
+            recorded.ulButtonTouched = state.ulButtonTouched
+            trackpad_axis.x = state.trackpad_x
+            trackpad_axis.y = state.trackpad_y
+            trigger_axis.x = state.trigger
+        self.chunk += bytes(tick)
+        self.records += 1
+        if len(self.chunk) >= self.chunk_limit:
+            self.chunks.put(self.chunk)
+            self.chunk = bytearray()
+
+    def close(self):
+        if self.chunk:
+            self.chunks.put(self.chunk)
+            self.chunk = bytearray()
+        self.chunks.put(None)
+        self.writer.join()
+        self.file.close()
+
+    def summary(self):
+        return f"Input recording: {self.records} tick(s) written to {self.file.name}"
+
+
+# === Reader ===
+class RecordFile:
+    """
+    Memory-mapped view of a recording. record(i) returns a TickRecord that points into the
+    mapping, so nothing is copied.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        self.header = RecordHeader.from_buffer_copy(self.mapping, 0)
+        if self.header.magic != RECORDING_MAGIC:
+            raise ValueError(f"{path} is not a VRtualJoy input recording")
+        if self.header.version != RECORDING_VERSION or self.header.record_size != ctypes.sizeof(TickRecord):
+            raise ValueError(f"{path} uses an unsupported recording layout "
+                             f"(version {self.header.version}, record size {self.header.record_size})")
+        self.offset = ctypes.sizeof(RecordHeader)
+        self.count = (len(self.mapping) - self.offset) // self.header.record_size
+
+    def __len__(self):
+        return self.count
+
+    def record(self, i):
+        return TickRecord.from_buffer(self.mapping, self.offset + i * self.header.record_size)
+
+    @property
+    def indices(self):
+        return (self.header.hmd_index, self.header.left_index, self.header.right_index)
+
+    def close(self):
+        self.mapping.close()
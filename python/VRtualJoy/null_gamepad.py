@@ -0,0 +1,164 @@
+# null_gamepad.py
+
+# Driverless stand-ins for vgamepad's VX360Gamepad / VDS4Gamepad. They keep the same report
+# structs and method names, so GamepadOutput and the bridge code run unchanged, but update() only
+# counts (and optionally records) the submitted reports instead of talking to ViGEm or uinput.
+
+# === Standard library imports ===
+import importlib
+import importlib.util
+import os
+import sys
+import time
+import types
+
+
+# === vigem_commons ===
+def load_vigem_commons():
+    """
+    Returns vgamepad.win.vigem_commons (report structs and button enums). It is plain ctypes, but
+    importing it through the package runs vgamepad/__init__, which needs ViGEm on Windows and
+    libevdev on Linux; in that case the file is loaded on its own.
+    """
+    try:
+        return importlib.import_module("vgamepad.win.vigem_commons")
+    except (ImportError, OSError):
+        pass
+    spec = importlib.util.find_spec("vgamepad")
+    if spec is None or not spec.submodule_search_locations:
+        raise ImportError("vgamepad package not found")
+    path = os.path.join(list(spec.submodule_search_locations)[0], "win", "vigem_commons.py")
+    commons_spec = importlib.util.spec_from_file_location("vgamepad.win.vigem_commons", path)
+    commons = importlib.util.module_from_spec(commons_spec)
+    commons_spec.loader.exec_module(commons)
+    return commons
+
+vcom = load_vigem_commons()
+
+
+# === Null targets ===
+class NullGamepad:
+    """
+    Base for the null targets. With record=True every update() appends
+    (perf_counter time, report bytes) to history.
+    """
+    def __init__(self, record=False):
+        self.report = self.get_default_report()
+        self.record = record
+        self.history = []
+        self.updates = 0
+
+    def reset(self):
+        self.report = self.get_default_report()
+
+    def press_button(self, button):
+        self.report.wButtons = self.report.wButtons | button
+
+    def release_button(self, button):
+        self.report.wButtons = self.report.wButtons & ~button
+
+    def left_trigger_float(self, value_float):
+        self.left_trigger(round(value_float * 255))
+
+    def right_trigger_float(self, value_float):
+        self.right_trigger(round(value_float * 255))
+
+    def update(self):
+        self.updates += 1
+        if self.record:
+            self.history.append((time.perf_counter(), bytes(self.report)))
+
+
+class NullVX360Gamepad(NullGamepad):
+    def get_default_report(self):
+        return vcom.XUSB_REPORT(wButtons=0, bLeftTrigger=0, bRightTrigger=0,
+                                sThumbLX=0, sThumbLY=0, sThumbRX=0, sThumbRY=0)
+
+    def left_trigger(self, value):
+        self.report.bLeftTrigger = value
+
+    def right_trigger(self, value):
+        self.report.bRightTrigger = value
+
+    def left_joystick(self, x_value, y_value):
+        self.report.sThumbLX = x_value
+        self.report.sThumbLY = y_value
+
+    def right_joystick(self, x_value, y_value):
+        self.report.sThumbRX = x_value
+        self.report.sThumbRY = y_value
+
+    def left_joystick_float(self, x_value_float, y_value_float):
+        self.left_joystick(round(x_value_float * 32767), round(y_value_float * 32767))
+
+    def right_joystick_float(self, x_value_float, y_value_float):
+        self.right_joystick(round(x_value_float * 32767), round(y_value_float * 32767))
+
+
+class NullVDS4Gamepad(NullGamepad):
+    def get_default_report(self):
+        report = vcom.DS4_REPORT(bThumbLX=0, bThumbLY=0, bThumbRX=0, bThumbRY=0,
+                                 wButtons=0, bSpecial=0, bTriggerL=0, bTriggerR=0)
+        vcom.DS4_REPORT_INIT(report)
+        return report
+
+    def press_special_button(self, special_button):
+        self.report.bSpecial = self.report.bSpecial | special_button
+
+    def release_special_button(self, special_button):
+        self.report.bSpecial = self.report.bSpecial & ~special_button
+
+    def left_trigger(self, value):
+        self.report.bTriggerL = value
+
+    def right_trigger(self, value):
+        self.report.bTriggerR = value
+
+    def left_joystick(self, x_value, y_value):
+        self.report.bThumbLX = x_value
+        self.report.bThumbLY = y_value
+
+    def right_joystick(self, x_value, y_value):
+        self.report.bThumbRX = x_value
+        self.report.bThumbRY = y_value
+
+    def left_joystick_float(self, x_value_float, y_value_float):
+        self.left_joystick(128 + round(x_value_float * 127), 128 + round(y_value_float * 127))
+
+    def right_joystick_float(self, x_value_float, y_value_float):
+        self.right_joystick(128 + round(x_value_float * 127), 128 + round(y_value_float * 127))
+
+    def directional_pad(self, direction):
+        vcom.DS4_SET_DPAD(self.report, direction)
+
+
+# === Module stand-in ===
+def install_null_vgamepad(record=False):
+    """
+    Registers a "vgamepad" module whose VX360Gamepad / VDS4Gamepad create null targets. Must run
+    before the bridge modules import vgamepad. Every target created is appended to the returned
+    module's created list.
+    """
+    module = types.ModuleType("vgamepad")
+    module.__path__ = []
+    for name in ("VIGEM_TARGET_TYPE", "XUSB_BUTTON", "DS4_BUTTONS", "DS4_SPECIAL_BUTTONS", "DS4_DPAD_DIRECTIONS"):
+        setattr(module, name, getattr(vcom, name))
+    module.created = []
+
+    def factory(target_type):
+        def create():
+            gamepad = target_type(record=record)
+            module.created.append(gamepad)
+            return gamepad
+        return create
+
+    module.VX360Gamepad = factory(NullVX360Gamepad)
+    module.VDS4Gamepad = factory(NullVDS4Gamepad)
+    win = types.ModuleType("vgamepad.win")
+    win.__path__ = []
+    win.vigem_commons = vcom
+    module.win = win
+    sys.modules["vgamepad"] = module
+    sys.modules["vgamepad.win"] = win
+    sys.modules["vgamepad.win.vigem_commons"] = vcom
+    return module
@@ -0,0 +1,182 @@
+# prediction_eval.py
+
+# Offline evaluation of headtracking prediction on recorded HMD traces.
+#
+#   python prediction_eval.py trace.csv --lookahead 0 10 20 30 40
+#   python prediction_eval.py --synthetic
+#
+# Traces come from the --record-head option of Xinput_main.py / DS4_main.py. For each look-ahead
+# the trace is replayed through extrapolation and the same EMA Smoother the bridge uses, then
+# compared against the measured head angles:
+#   lag       time shift (ms) that best aligns the output with the measured angle; lower is
+#             better, negative means the output leads the head
+#   rms       RMS difference (deg) between output and measured angle at the same instant
+#   overshoot how far (deg) the output swings past any angle the head actually reached within
+#             the preceding window; this is what extrapolation costs when the head stops
+
+# === Standard library imports ===
+import argparse
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# === Local project imports ===
+from head_prediction import load_head_trace, predicted_yaw_pitch
+from head_filters import Smoother
+
+# === Constants ===
+LAG_SEARCH_MS = (-60, 150)
+OVERSHOOT_WINDOW_S = 0.25
+
+
+# === Helpers ===
+def unwrap_degrees(values):
+    rtn = []
+    offset = 0.0
+    previous = None
+    for value in values:
+        if previous is not None:
+            step = value - previous
+            if step > 180.0:
+                offset -= 360.0
+            elif step < -180.0:
+                offset += 360.0
+        previous = value
+        rtn.append(value + offset)
+    return rtn
+
+def interpolate(times, values, t):
+    # Linear interpolation on a sorted time series; None outside the recorded range
+    if t < times[0] or t > times[-1]:
+        return None
+    lo, hi = 0, len(times) - 1
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if times[mid] <= t:
+            lo = mid
+        else:
+            hi = mid
+    span = times[hi] - times[lo]
+    if span <= 0:
+        return values[lo]
+    f = (t - times[lo]) / span
+    return values[lo] + f * (values[hi] - values[lo])
+
+def estimate_lag_ms(times, truth, output):
+    best_shift, best_error = 0, None
+    # Smallest shifts first, so a flat trace reports 0 rather than the edge of the search range
+    for shift_ms in sorted(range(LAG_SEARCH_MS[0], LAG_SEARCH_MS[1] + 1), key=abs):
+        shift = shift_ms / 1000.0
+        total, count = 0.0, 0
+        for t, value in zip(times, output):
+            reference = interpolate(times, truth, t - shift)
+            if reference is not None:
+                total += (value - reference) ** 2
+                count += 1
+        if count and (best_error is None or total / count < best_error):
+            best_shift, best_error = shift_ms, total / count
+    return best_shift
+
+def overshoot_degrees(times, truth, output):
+    worst = 0.0
+    start = 0
+    for i, t in enumerate(times):
+        while times[start] < t - OVERSHOOT_WINDOW_S:
+            start += 1
+        window = truth[start:i + 1]
+        worst = max(worst, output[i] - max(window), min(window) - output[i])
+    return worst
+
+def rms_degrees(truth, output):
+    return math.sqrt(sum((a - b) ** 2 for a, b in zip(truth, output)) / len(truth))
+
+
+# === Evaluation ===
+def evaluate(samples, lookahead_ms, alpha):
+    times = [sample[0] for sample in samples]
+    measured = [predicted_yaw_pitch(sample, 0.0) for sample in samples]
+    predicted = [predicted_yaw_pitch(sample, lookahead_ms / 1000.0) for sample in samples]
+    result = {}
+    for axis, name in ((0, "yaw"), (1, "pitch")):
+        truth = unwrap_degrees([pose[axis] for pose in measured])
+        raw = unwrap_degrees([pose[axis] for pose in predicted])
+        smoother = Smoother(alpha=alpha)
+        smoother.last = raw[0]
+        output = [smoother.smooth(value) for value in raw]
+        result[name] = (estimate_lag_ms(times, truth, output), rms_degrees(truth, output),
+                        overshoot_degrees(times, truth, output))
+    return result
+
+def synthetic_trace(seconds=20.0, hz=90.0, seed=1):
+    """
+    Head sweeps with smooth starts and abrupt stops, plus sensor noise on angles and rates.
+    """
+    rng = random.Random(seed)
+    samples = []
+    yaw = pitch = 0.0
+    yaw_rate = pitch_rate = 0.0
+    target_yaw_rate = target_pitch_rate = 0.0
+    next_change = 0.0
+    dt = 1.0 / hz
+    t = 0.0
+    while t < seconds:
+        if t >= next_change:
+            moving = rng.random() < 0.6
+            target_yaw_rate = rng.uniform(-2.5, 2.5) if moving else 0.0
+            target_pitch_rate = rng.uniform(-1.0, 1.0) if moving else 0.0
+            next_change = t + rng.uniform(0.3, 1.2)
+        # Accelerate smoothly, stop hard
+        blend = 0.15 if target_yaw_rate or target_pitch_rate else 0.6
+        yaw_rate += blend * (target_yaw_rate - yaw_rate)
+        pitch_rate += blend * (target_pitch_rate - pitch_rate)
+        yaw = yaw + yaw_rate * dt
+        pitch = max(-1.2, min(1.2, pitch + pitch_rate * dt))
+
+        noisy_yaw = yaw + rng.gauss(0.0, 0.0005)
+        noisy_pitch = pitch + rng.gauss(0.0, 0.0005)
+        cy, sy = math.cos(noisy_yaw), math.sin(noisy_yaw)
+        cp, sp = math.cos(noisy_pitch), math.sin(noisy_pitch)
+        # R = Ry(yaw) * Rx(pitch) in OpenVR's y-up tracking space
+        pose_mat = [[cy, sy * sp, sy * cp, 0.0],
+                    [0.0, cp, -sp, 1.7],
+                    [-sy, cy * sp, cy * cp, 0.0]]
+        # World angular velocity: yaw about +Y, pitch about the yawed X axis
+        wr = (rng.gauss(0.0, 0.02), rng.gauss(0.0, 0.02), rng.gauss(0.0, 0.02))
+        angular_velocity = [pitch_rate * cy + wr[0], yaw_rate + wr[1], -pitch_rate * sy + wr[2]]
+        samples.append((t, pose_mat, [0.0, 0.0, 0.0], angular_velocity))
+        t += dt
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline headtracking prediction evaluation")
+    parser.add_argument("trace", nargs="?", help="CSV trace recorded with --record-head")
+    parser.add_argument("--synthetic", action="store_true", help="Evaluate on a generated trace instead")
+    parser.add_argument("--lookahead", type=float, nargs="+", default=[0, 10, 20, 30, 40, 60], help="Look-ahead values (ms)")
+    parser.add_argument("--alpha", type=float, default=0.2, help="Smoother alpha, as HEADTRACKING_SMOOTHING_*")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        samples = synthetic_trace()
+    elif args.trace:
+        samples = load_head_trace(args.trace)
+    else:
+        parser.error("Pass a trace file or --synthetic")
+    if len(samples) < 2:
+        parser.error("Trace needs at least two samples")
+
+    print(f"{len(samples)} samples over {samples[-1][0] - samples[0][0]:.1f} s, smoother alpha {args.alpha}")
+    print(f"{'look-ahead':>10} | {'yaw lag':>8} {'rms':>6} {'over':>6} | {'pitch lag':>9} {'rms':>6} {'over':>6}")
+    for lookahead_ms in args.lookahead:
+        result = evaluate(samples, lookahead_ms, args.alpha)
+        yaw, pitch = result["yaw"], result["pitch"]
+        print(f"{lookahead_ms:>8.0f}ms | {yaw[0]:>6d}ms {yaw[1]:>6.2f} {yaw[2]:>6.2f} | "
+              f"{pitch[0]:>7d}ms {pitch[1]:>6.2f} {pitch[2]:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# replay.py
+
+# Feeds an input recording (--record-input) back through Xinput_main.main_loop or
+# DS4_main.main_loop without SteamVR or a virtual gamepad driver.
+#
+#   python replay.py recording.vrjrec --mode xinput
+#   python replay.py recording.vrjrec --mode ds4 --realtime -- --stage-timing
+#
+# Arguments after "--" are passed to the bridge's own parser (e.g. --stage-timing). Replay runs as
+# fast as the CPU allows unless --realtime is given, in which case it ticks at the recorded rate.
+
+# === Standard library imports ===
+import argparse
+import asyncio
+import ctypes
+import os
+import sys
+import time
+
+VRTUALJOY_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, VRTUALJOY_DIR)
+sys.path.insert(0, os.path.abspath(os.path.join(VRTUALJOY_DIR, "..")))
+
+# === Third-party imports ===
+import openvr
+import triad_openvr
+
+# === Local project imports ===
+from input_recording import RecordFile, NO_DEVICE
+from null_gamepad import NullVX360Gamepad, NullVDS4Gamepad, install_null_vgamepad
+
+
+class ReplayFinished(Exception):
+    pass
+
+
+# === Replayed runtime ===
+class ReplaySystem:
+    """
+    Stands in for IVRSystem. Each getDeviceToAbsoluteTrackingPose call advances to the next
+    record; controller states and poses come from that record.
+    """
+    def __init__(self, recording):
+        self.recording = recording
+        self.cursor = 0
+        self.current = recording.record(0)
+        self.pose_size = ctypes.sizeof(openvr.TrackedDevicePose_t)
+        hmd_index, left_index, right_index = recording.indices
+        self.pose_slots = [(slot, index) for slot, index in enumerate(recording.indices) if index != NO_DEVICE]
+        self.controller_slots = {index: slot for slot, index in enumerate((left_index, right_index)) if index != NO_DEVICE}
+        self.roles = {left_index: openvr.TrackedControllerRole_LeftHand, right_index: openvr.TrackedControllerRole_RightHand}
+        self.hmd_index = hmd_index
+
+    def rewind(self):
+        self.cursor = 0
+
+    def getDeviceToAbsoluteTrackingPose(self, origin, predicted_seconds, poses):
+        if self.cursor >= len(self.recording):
+            raise ReplayFinished()
+        self.current = record = self.recording.record(self.cursor)
+        self.cursor += 1
+        for slot, index in self.pose_slots:
+            ctypes.memmove(ctypes.addressof(poses[index]), ctypes.addressof(record.poses[slot]), self.pose_size)
+        return poses
+
+    def getControllerState(self, index):
+        slot = self.controller_slots.get(index)
+        if slot is None:
+            return False, openvr.VRControllerState_t()
+        return True, self.current.controllers[slot]
+
+    def getTrackedDeviceClass(self, index):
+        if index == self.hmd_index:
+            return openvr.TrackedDeviceClass_HMD
+        if index in self.controller_slots:
+            return openvr.TrackedDeviceClass_Controller
+        return openvr.TrackedDeviceClass_Invalid
+
+    def getControllerRoleForTrackedDeviceIndex(self, index):
+        return self.roles.get(index, openvr.TrackedControllerRole_Invalid)
+
+    def getStringTrackedDeviceProperty(self, index, prop):
+        return f"REPLAY-{index}"
+
+    def getFloatTrackedDeviceProperty(self, index, prop):
+        return self.recording.header.hz if prop == openvr.Prop_DisplayFrequency_Float else 0.0
+
+    def pollNextEvent(self, event):
+        return False
+
+    def triggerHapticPulse(self, index, axis_id, duration_micros):
+        pass
+
+
+class ReplayFrame(triad_openvr.pose_frame):
+    # Stamps each fetch with the recorded tick time, so time-based head filters see the recorded
+    # tick spacing however fast the replay runs
+    def update(self):
+        self.vr.getDeviceToAbsoluteTrackingPose(openvr.TrackingUniverseStanding, self.seconds_to_photons, self.poses)
+        self.fetch_count += 1
+        self.timestamp = self.vr.current.timestamp
+        for listener in self.listeners:
+            listener(self.poses, self.timestamp)
+        return self.poses
+
+
+class replay_openvr(triad_openvr.triad_openvr):
+    # Same device discovery as triad_openvr, driven by a ReplaySystem instead of openvr.init
+    def __init__(self, system):
+        self.vr = self.vrsystem = system
+        self.object_names = {"Tracking Reference":[],"HMD":[],"Controller":[],"Tracker":[]}
+        self.devices = {}
+        self.device_index_map = {}
+        self.event = openvr.VREvent_t()
+        self.frame = ReplayFrame(system)
+        poses = self.frame.update()
+        for i in range(openvr.k_unMaxTrackedDeviceCount):
+            if poses[i].bDeviceIsConnected:
+                self.add_tracked_device(i)
+        system.rewind()
+
+    def __del__(self):
+        pass
+
+
+# === Pacing ===
+class ReplayScheduler:
+    """
+    TickScheduler stand-in for as-fast-as-possible replay: wait() only yields to the event loop.
+    """
+    def __init__(self):
+        self.ticks = 0
+
+    def start(self):
+        pass
+
+    def report_due(self):
+        return False
+
+    async def wait(self):
+        self.ticks += 1
+        await asyncio.sleep(0)
+
+    def summary(self):
+        return f"Replay: {self.ticks} tick(s) unpaced"
+
+
+def find_devices(v):
+    left_controller = right_controller = hmd = None
+    for dev in v.devices.values():
+        if dev.device_class == "HMD":
+            hmd = dev
+        elif dev.device_class == "Controller":
+            role = v.vrsystem.getControllerRoleForTrackedDeviceIndex(dev.index)
+            if role == openvr.TrackedControllerRole_LeftHand:
+                left_controller = dev
+            elif role == openvr.TrackedControllerRole_RightHand:
+                right_controller = dev
+    return left_controller, right_controller, hmd
+
+
+async def replay(recording, mode, realtime):
+    # The bridge modules parse sys.argv at import, so they are imported only once it is set up
+    install_null_vgamepad()
+    if mode == "xinput":
+        import Xinput_main as bridge
+        from Xinput_motion_tracking import load_calibration
+        config = bridge.load_config()
+        output_type, gamepad = bridge.XInputOutput, NullVX360Gamepad()
+    else:
+        import DS4_main as bridge
+        from DS4_motion_tracking import load_calibration
+        config = bridge.load_config()
+        output_type, gamepad = bridge.DS4Output, NullVDS4Gamepad()
+    v = replay_openvr(ReplaySystem(recording))
+    left_controller, right_controller, hmd = find_devices(v)
+    if hmd is None:
+        raise RuntimeError("Recording has no HMD pose")
+    load_calibration(hmd.get_serial())
+    output = output_type(gamepad, bridge.safe_gamepad_update)
+    if realtime:
+        scheduler = bridge.TickScheduler(recording.header.hz, overrun_policy=bridge.OVERRUN_SKIP, spin_s=0.0005)
+    else:
+        scheduler = ReplayScheduler()
+
+    start = time.perf_counter()
+    try:
+        await bridge.main_loop(v, left_controller, right_controller, hmd, output, scheduler, config)
+    except ReplayFinished:
+        pass
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {len(recording)} tick(s) in {elapsed:.2f} s, {gamepad.updates} gamepad update(s)")
+    return gamepad
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a VRtualJoy input recording")
+    parser.add_argument("recording", help="File written with --record-input")
+    parser.add_argument("--mode", choices=["xinput", "ds4"], default="xinput", help="Bridge to replay through")
+    parser.add_argument("--realtime", action="store_true", help="Tick at the recorded rate instead of as fast as possible")
+    argv = sys.argv[1:]
+    split = argv.index("--") if "--" in argv else len(argv)
+    args = parser.parse_args(argv[:split])
+    bridge_args = argv[split + 1:]
+    recording = RecordFile(args.recording)
+    if not len(recording):
+        parser.error("Recording contains no ticks")
+    sys.argv = [sys.argv[0], "--hz", str(recording.header.hz)] + bridge_args
+    asyncio.run(replay(recording, args.mode, args.realtime))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# rotation.py
+
+# Head yaw and pitch straight from the 3x4 pose matrix, for headtracking.
+#
+# Yaw is the heading of the view direction about the tracking-space up axis (+Y) and pitch its
+# elevation (a yaw-pitch-roll decomposition), with the same signs the bridges used from
+# convert_to_euler (pose[4] and pose[5]). Unlike those euler angles, neither changes with head
+# roll and pitch does not flip when the head turns past 90 degrees. Looking straight up or down
+# the view direction has no heading, so it is taken from the head's up vector instead.
+#
+# HeadReference holds a calibration orientation. relative() rotates the heading into the
+# calibration frame before the single atan2, so the result is already wrapped to +-180 degrees.
+
+# === Standard library imports ===
+import math
+
+# === Third-party imports ===
+from triad_openvr import convert_to_quaternion
+
+# === Constants ===
+RAD_TO_DEG = 180.0 / math.pi
+GIMBAL_EPSILON = 1e-6   # cos(pitch) below this counts as looking straight up or down
+
+
+# === Absolute angles ===
+def _heading_and_pitch(m):
+    # Column 2 is the head's +Z (backwards) axis in tracking space; roll does not move it
+    m02, m22 = m[0][2], m[2][2]
+    sin_pitch = -m[1][2]
+    cos_pitch = math.sqrt(m02 * m02 + m22 * m22)
+    if cos_pitch < GIMBAL_EPSILON:
+        # Straight up or down: the up axis (column 1) is horizontal and points along the heading
+        return m[0][1] * sin_pitch, m[2][1] * sin_pitch, sin_pitch, cos_pitch
+    return m02, m22, sin_pitch, cos_pitch
+
+def head_yaw_pitch(m):
+    """
+    Returns (yaw, pitch) in degrees for a 3x4 pose matrix. Two atan2 and one sqrt.
+    """
+    heading_x, heading_z, sin_pitch, cos_pitch = _heading_and_pitch(m)
+    return (RAD_TO_DEG * math.atan2(-heading_x, heading_z),
+            RAD_TO_DEG * math.atan2(sin_pitch, cos_pitch))
+
+def head_roll(m):
+    """
+    Returns the roll in degrees about the view direction, positive with the right side raised.
+    Row 1 of the matrix is (cos(pitch) sin(roll), cos(pitch) cos(roll), ...) whatever the yaw.
+    """
+    return RAD_TO_DEG * math.atan2(m[1][0], m[1][1])
+
+
+# === Quaternions ===
+def matrix_to_quaternion(m):
+    """
+    Returns (w, x, y, z) with w >= 0 for the rotation part of a pose matrix.
+    """
+    _x, _y, _z, w, x, y, z = convert_to_quaternion(m)
+    return w, x, y, z
+
+def quaternion_to_matrix(q):
+    """
+    Returns the 3x3 rotation matrix (rows) of a unit quaternion (w, x, y, z).
+    """
+    w, x, y, z = q
+    return [[1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)],
+            [2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)],
+            [2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)]]
+
+
+# === Calibration-relative angles ===
+class HeadReference:
+    """
+    Calibrated zero orientation. relative(m) returns (yaw, pitch) in degrees of the pose matrix
+    m relative to it: yaw wrapped to (-180, 180], pitch as the difference of elevations.
+    """
+    __slots__ = ("yaw", "pitch", "quaternion", "_cos_yaw", "_sin_yaw")
+
+    def __init__(self, yaw=0.0, pitch=0.0, quaternion=None):
+        self.yaw = yaw
+        self.pitch = pitch
+        self.quaternion = quaternion
+        # The only trig on the reference happens here, once per calibration
+        self._cos_yaw = math.cos(yaw / RAD_TO_DEG)
+        self._sin_yaw = math.sin(yaw / RAD_TO_DEG)
+
+    @classmethod
+    def from_quaternion(cls, quaternion):
+        yaw, pitch = head_yaw_pitch(quaternion_to_matrix(quaternion))
+        return cls(yaw, pitch, tuple(quaternion))
+
+    @classmethod
+    def from_matrix(cls, m):
+        return cls.from_quaternion(matrix_to_quaternion(m))
+
+    def relative(self, m):
+        heading_x, heading_z, sin_pitch, cos_pitch = _heading_and_pitch(m)
+        # The heading as a complex number a + ib has angle yaw; multiplying by e^(-i * reference
+        # yaw) subtracts the reference without a separate wrap step
+        a, b = heading_z, -heading_x
+        cos_ref, sin_ref = self._cos_yaw, self._sin_yaw
+        return (RAD_TO_DEG * math.atan2(b * cos_ref - a * sin_ref, a * cos_ref + b * sin_ref),
+                RAD_TO_DEG * math.atan2(sin_pitch, cos_pitch) - self.pitch)
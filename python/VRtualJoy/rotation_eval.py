@@ -0,0 +1,207 @@
+# rotation_eval.py
+
+# Accuracy and speed check for rotation.py against a straightforward reference implementation.
+#
+#   python rotation_eval.py
+#   python rotation_eval.py --samples 100000 --calls 200000
+#
+# The reference builds each orientation as a quaternion from yaw, pitch and roll, rotates the
+# view direction (0, 0, -1) with it and reads the angles off that vector with atan2/asin.
+# Checks:
+#   absolute   head_yaw_pitch on random orientations, head roll included
+#   relative   HeadReference.relative against the reference difference, wrapped to +-180
+#   wrap       calibration and head on either side of the +-180 degree seam
+#   gimbal     looking straight up or down, and just short of it
+#   roll       head_roll on random orientations
+#   quaternion matrix -> quaternion -> matrix round trip, including rotations near 180 degrees
+# Exits with status 1 if any check exceeds its tolerance.
+
+# === Standard library imports ===
+import argparse
+import math
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# === Third-party imports ===
+from triad_openvr import convert_to_euler
+
+# === Local project imports ===
+from rotation import HeadReference, head_roll, head_yaw_pitch, matrix_to_quaternion, quaternion_to_matrix
+
+# === Constants ===
+ANGLE_TOLERANCE_DEG = 1e-6
+MATRIX_TOLERANCE = 1e-9
+MAX_TEST_PITCH_DEG = 89.9
+
+
+# === Reference implementation ===
+def quaternion_multiply(a, b):
+    aw, ax, ay, az = a
+    bw, bx, by, bz = b
+    return (aw * bw - ax * bx - ay * by - az * bz,
+            aw * bx + ax * bw + ay * bz - az * by,
+            aw * by - ax * bz + ay * bw + az * bx,
+            aw * bz + ax * by - ay * bx + az * bw)
+
+def axis_quaternion(axis, degrees):
+    half = math.radians(degrees) / 2
+    s = math.sin(half)
+    return (math.cos(half), axis[0] * s, axis[1] * s, axis[2] * s)
+
+def reference_quaternion(yaw, pitch, roll):
+    # Heading about +Y, then elevation about the head's X axis, then roll about its Z axis
+    q = quaternion_multiply(axis_quaternion((0, 1, 0), yaw), axis_quaternion((1, 0, 0), pitch))
+    return quaternion_multiply(q, axis_quaternion((0, 0, 1), roll))
+
+def rotate_vector(q, v):
+    w, x, y, z = q
+    p = quaternion_multiply(quaternion_multiply(q, (0.0, v[0], v[1], v[2])), (w, -x, -y, -z))
+    return p[1], p[2], p[3]
+
+def reference_yaw_pitch(q):
+    # Signs follow the bridges: yaw is pose[4] of convert_to_euler, pitch is up-positive
+    fx, fy, fz = rotate_vector(q, (0.0, 0.0, -1.0))
+    return math.degrees(math.atan2(fx, -fz)), math.degrees(math.asin(max(-1.0, min(1.0, fy))))
+
+def elementary_matrix(axis, degrees):
+    c, s = math.cos(math.radians(degrees)), math.sin(math.radians(degrees))
+    if axis == "x":
+        return [[1.0, 0.0, 0.0], [0.0, c, -s], [0.0, s, c]]
+    if axis == "y":
+        return [[c, 0.0, s], [0.0, 1.0, 0.0], [-s, 0.0, c]]
+    return [[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]]
+
+def matrix_multiply(a, b):
+    return [[sum(a[i][k] * b[k][j] for k in range(3)) for j in range(3)] for i in range(3)]
+
+def pose_matrix(yaw, pitch, roll):
+    # Built independently of the quaternion path, with a translation column like OpenVR's 3x4 poses
+    m = matrix_multiply(matrix_multiply(elementary_matrix("y", yaw), elementary_matrix("x", pitch)),
+                        elementary_matrix("z", roll))
+    return [m[0] + [0.1], m[1] + [1.7], m[2] + [-0.2]]
+
+def wrap_degrees(value):
+    return (value + 180.0) % 360.0 - 180.0
+
+def angle_error(a, b):
+    return abs(wrap_degrees(a - b))
+
+
+# === Checks ===
+def random_orientation(rng):
+    return (rng.uniform(-180.0, 180.0), rng.uniform(-MAX_TEST_PITCH_DEG, MAX_TEST_PITCH_DEG),
+            rng.uniform(-180.0, 180.0))
+
+def check_absolute(rng, samples):
+    worst = 0.0
+    for _ in range(samples):
+        yaw, pitch, roll = random_orientation(rng)
+        expected = reference_yaw_pitch(reference_quaternion(yaw, pitch, roll))
+        actual = head_yaw_pitch(pose_matrix(yaw, pitch, roll))
+        worst = max(worst, angle_error(actual[0], expected[0]), abs(actual[1] - expected[1]))
+    return worst
+
+def check_relative(rng, samples):
+    worst = 0.0
+    for _ in range(samples):
+        calibration = random_orientation(rng)
+        head = random_orientation(rng)
+        reference = HeadReference.from_matrix(pose_matrix(*calibration))
+        cal_yaw, cal_pitch = reference_yaw_pitch(reference_quaternion(*calibration))
+        head_yaw, head_pitch = reference_yaw_pitch(reference_quaternion(*head))
+        yaw, pitch = reference.relative(pose_matrix(*head))
+        # relative() must already be wrapped; no wrap_degrees on its output
+        worst = max(worst, abs(yaw - wrap_degrees(head_yaw - cal_yaw)) % 360.0,
+                    abs(pitch - (head_pitch - cal_pitch)))
+    return worst
+
+def check_wrap():
+    worst = 0.0
+    for cal_heading, head_heading in ((170.0, -170.0), (-170.0, 170.0), (179.9, -179.9), (180.0, -90.0)):
+        reference = HeadReference.from_matrix(pose_matrix(cal_heading, 0.0, 0.0))
+        yaw, _pitch = reference.relative(pose_matrix(head_heading, 0.0, 0.0))
+        # Bridge yaw is the negated heading
+        expected = wrap_degrees(cal_heading - head_heading)
+        worst = max(worst, angle_error(yaw, expected))
+        if not -180.0 <= yaw <= 180.0:
+            worst = max(worst, abs(yaw))
+    return worst
+
+def check_gimbal():
+    worst = 0.0
+    for pitch in (90.0, -90.0, 89.9999, -89.9999):
+        for heading in range(-180, 180, 15):
+            yaw, actual_pitch = head_yaw_pitch(pose_matrix(heading, pitch, 0.0))
+            # Without roll the heading stays recoverable, from the up vector at exactly +-90
+            worst = max(worst, angle_error(yaw, -heading), abs(actual_pitch - pitch))
+    return worst
+
+def check_roll(rng, samples):
+    worst = 0.0
+    for _ in range(samples):
+        yaw, pitch, roll = random_orientation(rng)
+        worst = max(worst, angle_error(head_roll(pose_matrix(yaw, pitch, roll)), roll))
+    return worst
+
+def check_quaternion(rng, samples):
+    worst = 0.0
+    orientations = [random_orientation(rng) for _ in range(samples)]
+    # Half turns about each axis, where w is close to zero
+    orientations += [(180.0, 0.0, 0.0), (0.0, 180.0, 0.0), (0.0, 0.0, 180.0), (179.999, 0.0, 0.001),
+                     (90.0, 180.0, 0.0), (180.0, 0.0, 180.0)]
+    for orientation in orientations:
+        m = pose_matrix(*orientation)
+        q = matrix_to_quaternion(m)
+        back = quaternion_to_matrix(q)
+        worst = max(worst, abs(math.sqrt(sum(c * c for c in q)) - 1.0),
+                    max(abs(back[i][j] - m[i][j]) for i in range(3) for j in range(3)))
+    return worst
+
+
+# === Speed ===
+def euler_relative(m, initial_yaw, initial_pitch):
+    # What the bridges did before rotation.py
+    pose = convert_to_euler(m)
+    return pose[4] - initial_yaw, pose[5] - initial_pitch
+
+def time_per_call_us(function, calls):
+    return 1e6 * min(timeit.repeat(function, number=calls, repeat=3)) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy and speed check for rotation.py")
+    parser.add_argument("--samples", type=int, default=20000, help="Random orientations per check")
+    parser.add_argument("--calls", type=int, default=100000, help="Calls per timing run")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    checks = (
+        ("absolute", check_absolute(rng, args.samples), ANGLE_TOLERANCE_DEG, "deg"),
+        ("relative", check_relative(rng, args.samples), ANGLE_TOLERANCE_DEG, "deg"),
+        ("wrap", check_wrap(), ANGLE_TOLERANCE_DEG, "deg"),
+        ("gimbal", check_gimbal(), ANGLE_TOLERANCE_DEG, "deg"),
+        ("roll", check_roll(rng, args.samples), ANGLE_TOLERANCE_DEG, "deg"),
+        ("quaternion", check_quaternion(rng, args.samples), MATRIX_TOLERANCE, ""),
+    )
+    failed = False
+    for name, worst, tolerance, unit in checks:
+        ok = worst <= tolerance
+        failed = failed or not ok
+        print(f"{name:<10} max error {worst:.3e} {unit:<3} {'ok' if ok else 'FAIL'} (tolerance {tolerance:g})")
+
+    m = pose_matrix(35.0, -12.0, 7.0)
+    reference = HeadReference(170.0, 5.0)
+    print(f"euler relative          {time_per_call_us(lambda: euler_relative(m, 170.0, 5.0), args.calls):.3f} us/call")
+    print(f"head_yaw_pitch          {time_per_call_us(lambda: head_yaw_pitch(m), args.calls):.3f} us/call")
+    print(f"HeadReference.relative  {time_per_call_us(lambda: reference.relative(m), args.calls):.3f} us/call")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+# shared_state.py
+
+# Publishes what the bridge sees and sends each tick into a named shared-memory region, so
+# overlays, loggers and tuning tools in other processes can follow along without their own OpenVR
+# session or scraping the log. Each tick holds the shared pose snapshot, the decoded controller
+# states and the final gamepad report bytes.
+#
+# Region layout: SharedStateHeader, then SharedStatePayload. header.sequence is a seqlock: the
+# writer makes it odd before touching the payload and even again afterwards, so a reader that sees
+# the same even value before and after copying the payload has a consistent tick.
+#
+#   python shared_state.py              # print the live state of a bridge run with --share-state
+
+# === Standard library imports ===
+import argparse
+import ctypes
+import os
+import sys
+import time
+from multiprocessing import shared_memory
+
+# === Third-party imports ===
+import openvr
+
+# === Local project imports ===
+from input_recording import CONTROLLER_SLOTS, NO_DEVICE, POSE_SLOTS, device_index
+
+# === Constants ===
+SHARED_STATE_NAME = "VRtualJoy.state"
+SHARED_STATE_MAGIC = b"VRJSHM01"
+SHARED_STATE_VERSION = 1
+MAX_REPORT_SIZE = 64      # Bytes; room for XUSB_REPORT, DS4_REPORT and extended reports
+READ_ATTEMPTS = 1000      # Torn reads retried before read() gives up on this tick
+
+
+# === Region layout ===
+class SharedStateHeader(ctypes.Structure):
+    _fields_ = [
+        ("magic", ctypes.c_char * 8),
+        ("version", ctypes.c_uint32),
+        ("payload_size", ctypes.c_uint32),
+        ("sequence", ctypes.c_uint64),
+    ]
+
+
+class SharedStatePayload(ctypes.Structure):
+    _fields_ = [
+        ("tick", ctypes.c_uint64),
+        ("timestamp", ctypes.c_double),    # Writer's time.perf_counter() at the pose fetch
+        ("wall_time", ctypes.c_double),    # time.time() at publish, comparable across processes
+        ("hmd_index", ctypes.c_int32),
+        ("left_index", ctypes.c_int32),
+        ("right_index", ctypes.c_int32),
+        ("output_type", ctypes.c_char * 8),   # b"xinput" or b"ds4"
+        ("report_size", ctypes.c_uint32),
+        ("poses", openvr.TrackedDevicePose_t * POSE_SLOTS),
+        ("controllers", openvr.VRControllerState_t * CONTROLLER_SLOTS),
+        ("report", ctypes.c_uint8 * MAX_REPORT_SIZE),
+    ]
+
+
+PAYLOAD_OFFSET = ctypes.sizeof(SharedStateHeader)
+REGION_SIZE = PAYLOAD_OFFSET + ctypes.sizeof(SharedStatePayload)
+
+
+# Regions this process created; their tracker registration belongs to the publisher
+_published_names = set()
+
+def attach_shared_memory(name):
+    try:
+        # Python 3.13+: attaching must not register the segment for unlinking at our exit
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        memory = shared_memory.SharedMemory(name)
+        if os.name == "posix" and name not in _published_names:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(memory._name, "shared_memory")
+        return memory
+
+
+# === Writer ===
+class SharedStatePublisher:
+    """
+    Owns the region and writes one tick into it per publish(). The payload fields are written in
+    place, so publishing costs a few memmoves and no allocation. Only the tick loop may publish.
+    """
+    def __init__(self, name, hmd, left_controller, right_controller, output_type):
+        try:
+            self.memory = shared_memory.SharedMemory(name, create=True, size=REGION_SIZE)
+            self.owner = True
+            _published_names.add(name)
+        except FileExistsError:
+            # Left behind by a bridge that did not shut down cleanly
+            self.memory = attach_shared_memory(name)
+            self.owner = False
+            if self.memory.size < REGION_SIZE:
+                self.memory.close()
+                raise RuntimeError(f"Shared memory {name} exists and is too small for this layout")
+        self.name = name
+        self.header = SharedStateHeader.from_buffer(self.memory.buf)
+        self.payload = SharedStatePayload.from_buffer(self.memory.buf, PAYLOAD_OFFSET)
+
+        self.header.sequence += 1
+        ctypes.memset(ctypes.addressof(self.payload), 0, ctypes.sizeof(SharedStatePayload))
+        payload = self.payload
+        payload.hmd_index = device_index(hmd)
+        payload.left_index = device_index(left_controller)
+        payload.right_index = device_index(right_controller)
+        payload.output_type = output_type.encode()
+        self.indices = (payload.hmd_index, payload.left_index, payload.right_index)
+        self.header.magic = SHARED_STATE_MAGIC
+        self.header.version = SHARED_STATE_VERSION
+        self.header.payload_size = ctypes.sizeof(SharedStatePayload)
+        self.header.sequence += 1
+
+        self.pose_size = ctypes.sizeof(openvr.TrackedDevicePose_t)
+        self.pose_addresses = [ctypes.addressof(payload.poses[slot]) for slot in range(POSE_SLOTS)]
+        self.controller_views = [(c, c.rAxis[0], c.rAxis[1]) for c in payload.controllers]
+        self.report_address = ctypes.addressof(payload.report)
+
+    def publish(self, frame, left_state, right_state, report):
+        header = self.header
+        payload = self.payload
+        # Odd while the payload is being written. CPython stores each field in program order and
+        # x86 does not reorder stores, so readers never see the even value before the data.
+        header.sequence += 1
+        payload.tick += 1
+        payload.timestamp = frame.timestamp
+        poses = frame.poses
+        for slot, index in enumerate(self.indices):
+            if index != NO_DEVICE:
+                ctypes.memmove(self.pose_addresses[slot], ctypes.addressof(poses[index]), self.pose_size)
+        for (shared, trackpad_axis, trigger_axis), state in zip(self.controller_views, (left_state, right_state)):
+            shared.unPacketNum = state.unPacketNum
+            shared.ulButtonPressed = state.ulButtonPressed
+            shared.ulButtonTouched = state.ulButtonTouched
+            trackpad_axis.x = state.trackpad_x
+            trackpad_axis.y = state.trackpad_y
+            trigger_axis.x = state.trigger
+        report_size = min(ctypes.sizeof(report), MAX_REPORT_SIZE)
+        ctypes.memmove(self.report_address, ctypes.addressof(report), report_size)
+        payload.report_size = report_size
+        payload.wall_time = time.time()
+        header.sequence += 1
+
+    def close(self):
+        # ctypes views must be released before the mapping can close
+        self.header = self.payload = None
+        self.controller_views = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+            _published_names.discard(self.name)
+
+    def summary(self):
+        return f"Shared state: {self.payload.tick if self.payload else 0} tick(s) published to {self.name}"
+
+
+# === Reader ===
+class SharedStateReader:
+    """
+    Attaches to a running bridge's region. read() copies one consistent tick into a reusable
+    SharedStatePayload; live() returns a zero-copy view whose consistency the caller checks with
+    sequence() before and after using it.
+    """
+    def __init__(self, name=SHARED_STATE_NAME):
+        self.memory = attach_shared_memory(name)
+        self.header = SharedStateHeader.from_buffer(self.memory.buf)
+        if self.header.magic != SHARED_STATE_MAGIC:
+            self.close()
+            raise ValueError(f"Shared memory {name} does not hold VRtualJoy state")
+        if self.header.version != SHARED_STATE_VERSION or self.header.payload_size != ctypes.sizeof(SharedStatePayload):
+            version, size = self.header.version, self.header.payload_size
+            self.close()
+            raise ValueError(f"Shared memory {name} uses an unsupported layout (version {version}, payload size {size})")
+        self.view = SharedStatePayload.from_buffer(self.memory.buf, PAYLOAD_OFFSET)
+        self.snapshot = SharedStatePayload()
+        self.retries = 0
+
+    def sequence(self):
+        return self.header.sequence
+
+    def live(self):
+        return self.view
+
+    def read(self, into=None):
+        """
+        Returns a consistent copy of the latest tick (in into, or a payload reused across calls),
+        or None if the writer kept it busy for READ_ATTEMPTS tries.
+        """
+        target = self.snapshot if into is None else into
+        header = self.header
+        for _ in range(READ_ATTEMPTS):
+            before = header.sequence
+            if before & 1 == 0:
+                ctypes.memmove(ctypes.addressof(target), ctypes.addressof(self.view), ctypes.sizeof(SharedStatePayload))
+                if header.sequence == before:
+                    return target
+            self.retries += 1
+        return None
+
+    def close(self):
+        self.header = self.view = None
+        self.memory.close()
+
+
+def report_bytes(payload):
+    return bytes(payload.report[:payload.report_size])
+
+
+# === Monitor ===
+def main():
+    parser = argparse.ArgumentParser(description="Print the state a VRtualJoy bridge publishes with --share-state")
+    parser.add_argument("--name", default=SHARED_STATE_NAME, help="Shared memory name the bridge publishes to")
+    parser.add_argument("--hz", type=float, default=10.0, help="Print rate")
+    args = parser.parse_args()
+
+    try:
+        reader = SharedStateReader(args.name)
+    except FileNotFoundError:
+        sys.exit(f"No bridge is publishing to {args.name}; start one with --share-state")
+    last_tick = None
+    try:
+        while True:
+            state = reader.read()
+            if state is not None and state.tick != last_tick:
+                hmd = state.poses[0].mDeviceToAbsoluteTracking
+                left, right = state.controllers
+                print(f"tick {state.tick:>8}  hmd ({hmd[0][3]:+.3f}, {hmd[1][3]:+.3f}, {hmd[2][3]:+.3f})  "
+                      f"buttons L {left.ulButtonPressed:#x} R {right.ulButtonPressed:#x}  "
+                      f"{state.output_type.decode()} report {report_bytes(state).hex()}")
+                last_tick = state.tick
+            time.sleep(1.0 / args.hz)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+
+
+if __name__ == "__main__":
+    main()
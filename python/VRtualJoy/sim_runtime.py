@@ -0,0 +1,445 @@
+# sim_runtime.py
+
+# In-process simulated OpenVR runtime. SimulatedVRSystem implements the IVRSystem methods the
+# project calls, driven by synthetic or scripted motion, and install_simulated_runtime() puts it
+# behind openvr.init / openvr.VRSystem. Together with null_gamepad this runs the full bridge on a
+# machine without SteamVR or a virtual gamepad driver:
+#
+#   python sim_runtime.py --mode xinput --seconds 30
+#   python sim_runtime.py --mode ds4 --script motion.json -- --stage-timing
+#
+# Arguments after "--" go to the bridge's own parser.
+#
+# A script is JSON: {"loop": true, "keyframes": [{"t": 0.0, "hmd": {"yaw": 0, "pitch": 0},
+#   "left": {"trigger": 0.0, "stick": [0, 0], "buttons": ["grip"], "raised": false}, "right": {...}}]}
+# Angles are degrees. Numeric values are interpolated linearly between keyframes; buttons,
+# "raised" (hands above the head, the calibration gesture) and "hmd": {"worn": false} (the
+# proximity sensor, reported as user interaction events) hold until the next keyframe.
+#
+# openvr.VRInput is routed to a SimulatedVRInput over the same motion, so --input-backend actions
+# and --bench-input run here too. Its digital actions follow the button the action is named
+# after (ButtonPressed_A reads "a", grip_button reads "grip"), as the default bindings do.
+
+# === Standard library imports ===
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+
+VRTUALJOY_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, VRTUALJOY_DIR)
+sys.path.insert(0, os.path.abspath(os.path.join(VRTUALJOY_DIR, "..")))
+
+# === Third-party imports ===
+import openvr
+
+# === Constants ===
+HMD_INDEX = 0
+LEFT_INDEX = 1
+RIGHT_INDEX = 2
+HMD_HEIGHT = 1.7
+
+# Script button names -> EVRButtonId, matching the bits the bridges read from ulButtonPressed
+BUTTON_IDS = {
+    "menu": openvr.k_EButton_ApplicationMenu,
+    "b": openvr.k_EButton_ApplicationMenu,
+    "y": openvr.k_EButton_ApplicationMenu,
+    "grip": openvr.k_EButton_Grip,
+    "a": openvr.k_EButton_A,
+    "x": openvr.k_EButton_A,
+    "touchpad": openvr.k_EButton_SteamVR_Touchpad,
+    "trigger": openvr.k_EButton_SteamVR_Trigger,
+}
+
+
+def button_mask(names):
+    mask = 0
+    for name in names:
+        mask |= 1 << BUTTON_IDS[name.lower()]
+    return mask
+
+
+# === Motion sources ===
+class HandSample:
+    __slots__ = ("trigger", "stick_x", "stick_y", "buttons", "raised")
+
+    def __init__(self, trigger=0.0, stick_x=0.0, stick_y=0.0, buttons=0, raised=False):
+        self.trigger = trigger
+        self.stick_x = stick_x
+        self.stick_y = stick_y
+        self.buttons = buttons
+        self.raised = raised
+
+
+class SyntheticMotion:
+    """
+    Sinusoidal head yaw/pitch, a circling left stick, a ramping right trigger and a button
+    pattern that taps A and B alternately every button_period_s.
+    """
+    def __init__(self, yaw_degrees=30.0, yaw_hz=0.2, pitch_degrees=10.0, pitch_hz=0.13,
+                 button_period_s=1.5, tap_s=0.1):
+        self.yaw_degrees = yaw_degrees
+        self.yaw_hz = yaw_hz
+        self.pitch_degrees = pitch_degrees
+        self.pitch_hz = pitch_hz
+        self.button_period_s = button_period_s
+        self.tap_s = tap_s
+
+    def head(self, t):
+        return (self.yaw_degrees * math.sin(2 * math.pi * self.yaw_hz * t),
+                self.pitch_degrees * math.sin(2 * math.pi * self.pitch_hz * t))
+
+    def hands(self, t):
+        phase = 2 * math.pi * 0.25 * t
+        left = HandSample(stick_x=0.8 * math.cos(phase), stick_y=0.8 * math.sin(phase))
+        right = HandSample(trigger=(t * 0.5) % 1.0)
+        cycle = int(t / self.button_period_s)
+        if t - cycle * self.button_period_s < self.tap_s:
+            right.buttons = button_mask(["a"] if cycle % 2 == 0 else ["b"])
+        return left, right
+
+    def worn(self, t):
+        return True
+
+
+class MotionScript:
+    """
+    Keyframed motion loaded from JSON; see the module header for the format.
+    """
+    def __init__(self, keyframes, loop=True):
+        if not keyframes:
+            raise ValueError("Motion script needs at least one keyframe")
+        self.keyframes = sorted(keyframes, key=lambda frame: frame["t"])
+        self.loop = loop
+        self.duration = self.keyframes[-1]["t"]
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            script = json.load(f)
+        return cls(script["keyframes"], script.get("loop", True))
+
+    def _span(self, t):
+        if self.loop and self.duration > 0:
+            t %= self.duration
+        frames = self.keyframes
+        for i in range(len(frames) - 1):
+            if frames[i + 1]["t"] > t:
+                start, end = frames[i], frames[i + 1]
+                return start, end, (t - start["t"]) / (end["t"] - start["t"])
+        return frames[-1], frames[-1], 0.0
+
+    def head(self, t):
+        start, end, f = self._span(t)
+        a, b = start.get("hmd", {}), end.get("hmd", {})
+        return (_lerp(a.get("yaw", 0.0), b.get("yaw", 0.0), f),
+                _lerp(a.get("pitch", 0.0), b.get("pitch", 0.0), f))
+
+    def worn(self, t):
+        start, _end, _f = self._span(t)
+        return start.get("hmd", {}).get("worn", True)
+
+    def hands(self, t):
+        start, end, f = self._span(t)
+        return tuple(_hand(start.get(side, {}), end.get(side, {}), f) for side in ("left", "right"))
+
+
+def _lerp(a, b, f):
+    return a + (b - a) * f
+
+
+def _hand(start, end, f):
+    a_stick, b_stick = start.get("stick", [0.0, 0.0]), end.get("stick", [0.0, 0.0])
+    return HandSample(_lerp(start.get("trigger", 0.0), end.get("trigger", 0.0), f),
+                      _lerp(a_stick[0], b_stick[0], f), _lerp(a_stick[1], b_stick[1], f),
+                      button_mask(start.get("buttons", [])), start.get("raised", False))
+
+
+# === Simulated IVRSystem ===
+class SimulatedVRSystem:
+    """
+    Implements the IVRSystem calls used by triad_openvr, the motion tracking modules and the tick
+    scheduler. Time runs on perf_counter from construction. Poses are sampled at tracking_hz and
+    controller state at controller_hz, so polling faster than those rates sees repeated values,
+    like the real runtime. Button changes between polls are reported through pollNextEvent.
+    """
+    def __init__(self, motion=None, tracking_hz=250.0, controller_hz=250.0, display_hz=90.0):
+        self.motion = motion or SyntheticMotion()
+        self.tracking_hz = tracking_hz
+        self.controller_hz = controller_hz
+        self.display_hz = display_hz
+        self.start = time.perf_counter()
+        self.controller_sample = 0
+        self.reported_buttons = {LEFT_INDEX: 0, RIGHT_INDEX: 0}
+        self.reported_worn = True
+        self.events = []
+        self.haptic_pulses = 0
+        self.pose_requests = 0
+        self.input = SimulatedVRInput(self)
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    # --- Tracking ---
+    def _fill_pose(self, pose, rotation, position, angular_velocity):
+        pose.bDeviceIsConnected = True
+        pose.bPoseIsValid = True
+        pose.eTrackingResult = openvr.TrackingResult_Running_OK
+        m = pose.mDeviceToAbsoluteTracking
+        for i in range(3):
+            row = m[i]
+            row[0], row[1], row[2] = rotation[i]
+            row[3] = position[i]
+        for i in range(3):
+            pose.vVelocity[i] = 0.0
+            pose.vAngularVelocity[i] = angular_velocity[i]
+
+    def _head_rotation(self, t):
+        yaw_degrees, pitch_degrees = self.motion.head(t)
+        yaw, pitch = math.radians(yaw_degrees), math.radians(pitch_degrees)
+        cy, sy, cp, sp = math.cos(yaw), math.sin(yaw), math.cos(pitch), math.sin(pitch)
+        # Ry(yaw) * Rx(pitch) in y-up tracking space
+        return ((cy, sy * sp, sy * cp), (0.0, cp, -sp), (-sy, cy * sp, cy * cp)), yaw, pitch
+
+    def getDeviceToAbsoluteTrackingPose(self, origin, predicted_seconds, poses):
+        if isinstance(poses, int):
+            poses = (openvr.TrackedDevicePose_t * poses)()
+        self.pose_requests += 1
+        t = math.floor(self.elapsed() * self.tracking_hz) / self.tracking_hz + predicted_seconds
+        rotation, yaw, pitch = self._head_rotation(t)
+        # Angular velocity from a finite difference of the motion source, in tracking space
+        dt = 1.0 / self.tracking_hz
+        _rotation, yaw_next, pitch_next = self._head_rotation(t + dt)
+        yaw_rate, pitch_rate = (yaw_next - yaw) / dt, (pitch_next - pitch) / dt
+        angular_velocity = (pitch_rate * math.cos(yaw), yaw_rate, -pitch_rate * math.sin(yaw))
+        self._fill_pose(poses[HMD_INDEX], rotation, (0.0, HMD_HEIGHT, 0.0), angular_velocity)
+
+        left, right = self.motion.hands(t)
+        identity = ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0))
+        for index, hand, x in ((LEFT_INDEX, left, -0.2), (RIGHT_INDEX, right, 0.2)):
+            height = HMD_HEIGHT + 0.3 if hand.raised else HMD_HEIGHT - 0.5
+            self._fill_pose(poses[index], identity, (x, height, -0.3), (0.0, 0.0, 0.0))
+        return poses
+
+    # --- Controllers ---
+    def _hand_at_sample(self, index, sample):
+        left, right = self.motion.hands(sample / self.controller_hz)
+        return left if index == LEFT_INDEX else right
+
+    def getControllerState(self, index):
+        state = openvr.VRControllerState_t()
+        if index not in self.reported_buttons:
+            return False, state
+        sample = math.floor(self.elapsed() * self.controller_hz)
+        hand = self._hand_at_sample(index, sample)
+        state.unPacketNum = sample
+        state.ulButtonPressed = hand.buttons
+        state.rAxis[0].x = hand.stick_x
+        state.rAxis[0].y = hand.stick_y
+        state.rAxis[1].x = hand.trigger
+        return True, state
+
+    def _collect_events(self):
+        # Walk every controller sample since the last poll so taps shorter than a tick still
+        # produce press/unpress events, stamped with their age like the runtime does
+        now = self.elapsed()
+        worn = self.motion.worn(now)
+        if worn != self.reported_worn:
+            event_type = (openvr.VREvent_TrackedDeviceUserInteractionStarted if worn
+                          else openvr.VREvent_TrackedDeviceUserInteractionEnded)
+            self.events.append((event_type, HMD_INDEX, 0, 0.0))
+            self.reported_worn = worn
+        latest = math.floor(now * self.controller_hz)
+        for sample in range(max(self.controller_sample + 1, latest - int(self.controller_hz)), latest + 1):
+            for index in (LEFT_INDEX, RIGHT_INDEX):
+                buttons = self._hand_at_sample(index, sample).buttons
+                changed = buttons ^ self.reported_buttons[index]
+                if not changed:
+                    continue
+                age = now - sample / self.controller_hz
+                for button in range(64):
+                    if changed >> button & 1:
+                        pressed = bool(buttons >> button & 1)
+                        event_type = openvr.VREvent_ButtonPress if pressed else openvr.VREvent_ButtonUnpress
+                        self.events.append((event_type, index, button, age))
+                self.reported_buttons[index] = buttons
+        self.controller_sample = latest
+
+    def pollNextEvent(self, event):
+        if not self.events:
+            self._collect_events()
+            if not self.events:
+                return False
+        event_type, index, button, age = self.events.pop(0)
+        event.eventType = event_type
+        event.trackedDeviceIndex = index
+        event.eventAgeSeconds = age
+        event.data.controller.button = button
+        return True
+
+    def triggerHapticPulse(self, index, axis_id, duration_micros):
+        self.haptic_pulses += 1
+
+    # --- Properties ---
+    def getTrackedDeviceClass(self, index):
+        if index == HMD_INDEX:
+            return openvr.TrackedDeviceClass_HMD
+        if index in (LEFT_INDEX, RIGHT_INDEX):
+            return openvr.TrackedDeviceClass_Controller
+        return openvr.TrackedDeviceClass_Invalid
+
+    def getControllerRoleForTrackedDeviceIndex(self, index):
+        if index == LEFT_INDEX:
+            return openvr.TrackedControllerRole_LeftHand
+        if index == RIGHT_INDEX:
+            return openvr.TrackedControllerRole_RightHand
+        return openvr.TrackedControllerRole_Invalid
+
+    def getStringTrackedDeviceProperty(self, index, prop):
+        return f"SIM-{index}"
+
+    def getFloatTrackedDeviceProperty(self, index, prop):
+        if prop == openvr.Prop_DisplayFrequency_Float:
+            return self.display_hz
+        if prop == openvr.Prop_DeviceBatteryPercentage_Float:
+            return 1.0
+        return 0.0
+
+    def getBoolTrackedDeviceProperty(self, index, prop):
+        return False
+
+    def getTimeSinceLastVsync(self):
+        elapsed = self.elapsed()
+        frames = math.floor(elapsed * self.display_hz)
+        return True, elapsed - frames / self.display_hz, frames
+
+    def summary(self):
+        return (f"Simulated runtime: {self.pose_requests} pose request(s), "
+                f"{self.haptic_pulses} haptic pulse(s), {self.input.updates} action update(s)")
+
+
+# === Simulated IVRInput ===
+class SimulatedVRInput:
+    """
+    The IVRInput calls action_input.ActionInput makes. Handles are assigned per action name from
+    the manifest path's actions; the function table reads the hands at the last
+    updateActionState, filling the structs passed by reference like the runtime does.
+    """
+    def __init__(self, system):
+        self.system = system
+        self.handles = {}
+        self.actions = [None]       # handle -> (hand index, input name); 0 is invalid
+        self.hands = (HandSample(), HandSample())
+        self.updates = 0
+        self.function_table = SimulatedInputFunctions(self)
+
+    def setActionManifestPath(self, path):
+        return 0
+
+    def getActionSetHandle(self, name):
+        return self._handle(name)
+
+    def getActionHandle(self, name):
+        return self._handle(name)
+
+    def _handle(self, name):
+        handle = self.handles.get(name)
+        if handle is None:
+            # /actions/<set>/in/<left|right>_controller_<input>
+            leaf = name.rsplit("/", 1)[-1]
+            side, _, input_name = leaf.partition("_controller_")
+            handle = self.handles[name] = len(self.actions)
+            self.actions.append((1 if side == "right" else 0, input_name))
+        return handle
+
+    def update(self):
+        system = self.system
+        self.hands = system.motion.hands(math.floor(system.elapsed() * system.controller_hz) / system.controller_hz)
+        self.updates += 1
+
+
+class SimulatedInputFunctions:
+    # Same call shape as the IVRInput function table: (handle, struct ref, size, restrict) -> error
+    def __init__(self, vr_input):
+        self.vr_input = vr_input
+
+    def updateActionState(self, active_sets_ref, size, count):
+        self.vr_input.update()
+        return 0
+
+    def getDigitalActionData(self, handle, data_ref, size, restrict):
+        side, input_name = self.vr_input.actions[handle]
+        button = "grip" if input_name == "grip_button" else input_name.rpartition("_")[2].lower()
+        data = data_ref._obj
+        data.bActive = True
+        data.bState = bool(button in BUTTON_IDS and self.vr_input.hands[side].buttons & button_mask([button]))
+        return 0
+
+    def getAnalogActionData(self, handle, data_ref, size, restrict):
+        side, input_name = self.vr_input.actions[handle]
+        hand = self.vr_input.hands[side]
+        data = data_ref._obj
+        data.bActive = True
+        if input_name == "stick":
+            data.x, data.y = hand.stick_x, hand.stick_y
+        else:
+            data.x, data.y = hand.trigger, 0.0
+        return 0
+
+
+def install_simulated_runtime(system):
+    """
+    Routes openvr.init / openvr.VRSystem / openvr.VRInput / openvr.shutdown to system. Returns
+    the functions it replaced so a caller can restore them.
+    """
+    replaced = (openvr.init, openvr.VRSystem, openvr.VRInput, openvr.shutdown)
+    openvr.init = lambda *args, **kwargs: system
+    openvr.VRSystem = lambda: system
+    openvr.VRInput = lambda: system.input
+    openvr.shutdown = lambda: None
+    return replaced
+
+
+# === Headless bridge run ===
+async def run_bridge(bridge, seconds):
+    task = asyncio.create_task(bridge.main())
+    done, _pending = await asyncio.wait({task}, timeout=seconds)
+    if not done:
+        task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a VRtualJoy bridge against the simulated runtime")
+    parser.add_argument("--mode", choices=["xinput", "ds4"], default="xinput", help="Bridge to run")
+    parser.add_argument("--script", help="Keyframed motion script (JSON); synthetic motion if omitted")
+    parser.add_argument("--seconds", type=float, default=10.0, help="How long to run")
+    parser.add_argument("--tracking-hz", type=float, default=250.0, help="Simulated pose sample rate")
+    parser.add_argument("--controller-hz", type=float, default=250.0, help="Simulated controller sample rate")
+    parser.add_argument("--display-hz", type=float, default=90.0, help="Simulated display refresh rate")
+    argv = sys.argv[1:]
+    split = argv.index("--") if "--" in argv else len(argv)
+    args = parser.parse_args(argv[:split])
+
+    from null_gamepad import install_null_vgamepad
+    vgamepad = install_null_vgamepad()
+    motion = MotionScript.load(args.script) if args.script else SyntheticMotion()
+    system = SimulatedVRSystem(motion, args.tracking_hz, args.controller_hz, args.display_hz)
+    install_simulated_runtime(system)
+
+    # The bridge modules parse sys.argv at import
+    sys.argv = [sys.argv[0]] + argv[split + 1:]
+    bridge = __import__("Xinput_main" if args.mode == "xinput" else "DS4_main")
+    asyncio.run(run_bridge(bridge, args.seconds))
+    updates = sum(gamepad.updates for gamepad in vgamepad.created)
+    print(system.summary() + f", {updates} gamepad update(s)")
+
+
+if __name__ == "__main__":
+    main()
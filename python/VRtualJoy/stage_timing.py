@@ -0,0 +1,107 @@
+# stage_timing.py
+
+# Per-stage timing for the main loop. Each stage boundary takes one perf_counter_ns stamp and
+# adds the elapsed nanoseconds to a preallocated log-linear (HDR-style) histogram, so recording
+# never allocates and the summary can report percentiles without keeping samples.
+
+# === Standard library imports ===
+from time import perf_counter_ns
+
+# === Constants ===
+SUB_BUCKET_BITS = 4                            # 16 linear sub-buckets per power of two (<= 6.25% error)
+MAX_SHIFT = 40                                 # Covers up to ~2^45 ns, far beyond any tick
+BUCKET_COUNT = ((MAX_SHIFT + 1) << SUB_BUCKET_BITS) + (1 << SUB_BUCKET_BITS)
+SUB_BUCKET_LIMIT = 1 << (SUB_BUCKET_BITS + 1)
+
+
+# === Histogram ===
+def bucket_index(value_ns):
+    shift = value_ns.bit_length() - (SUB_BUCKET_BITS + 1)
+    if shift <= 0:
+        return value_ns if value_ns > 0 else 0
+    if shift > MAX_SHIFT:
+        return BUCKET_COUNT - 1
+    return (shift << SUB_BUCKET_BITS) + (value_ns >> shift)
+
+def bucket_value(index):
+    # Midpoint of the bucket's value range
+    if index < SUB_BUCKET_LIMIT:
+        return index
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    top = index - (shift << SUB_BUCKET_BITS)
+    return (top << shift) + (1 << (shift - 1))
+
+
+class LogHistogram:
+    __slots__ = ("counts", "count", "max_ns", "total_ns")
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.max_ns = 0
+        self.total_ns = 0
+
+    def record(self, value_ns):
+        self.counts[bucket_index(value_ns)] += 1
+        self.count += 1
+        self.total_ns += value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+
+    def percentile(self, fraction):
+        if not self.count:
+            return 0
+        target = fraction * self.count
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            seen += bucket
+            if bucket and seen >= target:
+                return min(bucket_value(index), self.max_ns)
+        return self.max_ns
+
+
+# === Stage timings ===
+class StageTimings:
+    """
+    Times named stages of one tick plus the whole tick.
+
+    begin() stamps the start of a tick, lap(i) closes stage i (index into stage_names) and starts
+    the next, end() closes the tick. A tick longer than budget_s counts as an overrun.
+    """
+    def __init__(self, stage_names, budget_s):
+        self.stage_names = tuple(stage_names)
+        self.stages = [LogHistogram() for _ in self.stage_names]
+        self.tick = LogHistogram()
+        self.budget_ns = int(budget_s * 1e9)
+        self.overruns = 0
+        self.tick_start = 0
+        self.last = 0
+
+    def begin(self):
+        self.tick_start = self.last = perf_counter_ns()
+
+    def lap(self, stage):
+        now = perf_counter_ns()
+        self.stages[stage].record(now - self.last)
+        self.last = now
+
+    def end(self):
+        elapsed = perf_counter_ns() - self.tick_start
+        self.tick.record(elapsed)
+        if elapsed > self.budget_ns:
+            self.overruns += 1
+
+    def summary(self):
+        def describe(name, histogram):
+            return (f"{name} p50 {histogram.percentile(0.5) / 1000.0:.1f} us, "
+                    f"p99 {histogram.percentile(0.99) / 1000.0:.1f} us, max {histogram.max_ns / 1000.0:.1f} us")
+
+        parts = [describe(name, histogram) for name, histogram in zip(self.stage_names, self.stages)]
+        parts.append(describe("tick", self.tick) +
+                     f", {self.overruns}/{self.tick.count} over the {self.budget_ns / 1e6:.2f} ms budget")
+        return "Stage timings: " + "; ".join(parts)
+
+
+# Stages of one main loop tick, shared by the DS4 and XInput bridges
+MAIN_LOOP_STAGES = ("input", "calibration", "left_stick", "buttons", "headtracking", "submit")
+STAGE_INPUT, STAGE_CALIBRATION, STAGE_LEFT_STICK, STAGE_BUTTONS, STAGE_HEADTRACKING, STAGE_SUBMIT = range(len(MAIN_LOOP_STAGES))
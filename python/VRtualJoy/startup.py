@@ -0,0 +1,91 @@
+# startup.py
+
+# Startup helpers shared by the launcher and both bridges: a phase profile for --startup-profile,
+# concurrent initialization of OpenVR and the virtual gamepad, and a readiness check that
+# replaces the fixed sleeps after creating the ViGEm target.
+
+# === Standard library imports ===
+import asyncio
+import contextlib
+import ctypes
+import threading
+import time
+from time import perf_counter
+
+# === Constants ===
+READY_TIMEOUT_S = 2.0     # Give up waiting for XInput to enumerate the pad after this long
+READY_POLL_S = 0.005
+ANNOUNCE_HOLD_S = 0.05    # How long the wake-up button is held; a few frames for games polling at 60 Hz
+
+
+# === Profile ===
+class StartupProfile:
+    """
+    Collects named startup phases as (name, start, end) offsets from the profile's origin.
+    Phases may overlap and may be recorded from worker threads.
+    """
+    def __init__(self):
+        self.origin = perf_counter()
+        self.phases = []
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            end = perf_counter()
+            with self.lock:
+                self.phases.append((name, start - self.origin, end - self.origin))
+
+    def report(self):
+        with self.lock:
+            phases = sorted(self.phases, key=lambda phase: phase[1])
+        total = max((end for _name, _start, end in phases), default=0.0)
+        lines = [f"Startup profile: ready after {1000.0 * total:.1f} ms"]
+        for name, start, end in phases:
+            lines.append(f"  {name:<28} at {1000.0 * start:8.1f} ms  took {1000.0 * (end - start):8.1f} ms")
+        return "\n".join(lines)
+
+
+# Shared by the launcher and the bridge it imports, so import and init phases land in one report
+PROFILE = StartupProfile()
+
+
+async def run_in_parallel(*jobs):
+    """
+    Runs each (phase name, function) on a worker thread at the same time and returns their
+    results in order. Each job is recorded as a phase of PROFILE.
+    """
+    def timed(name, function):
+        with PROFILE.phase(name):
+            return function()
+
+    return await asyncio.gather(*(asyncio.to_thread(timed, name, function) for name, function in jobs))
+
+
+# === Gamepad readiness ===
+def wait_for_gamepad_ready(gamepad, timeout_s=READY_TIMEOUT_S):
+    """
+    Waits until Windows has enumerated a new ViGEm Xbox 360 target, which is when XInput has
+    assigned it a user index. Other targets (DS4, the Linux uinput backend, null gamepads) are
+    usable once constructed. Returns the seconds waited, or None on timeout.
+    """
+    devicep = getattr(gamepad, "_devicep", None)
+    if devicep is None:
+        return 0.0
+    from vgamepad.win import vigem_client as vcli
+    from vgamepad.win.vigem_commons import VIGEM_ERRORS, VIGEM_TARGET_TYPE
+    if gamepad.get_type() != VIGEM_TARGET_TYPE.Xbox360Wired:
+        return 0.0
+    user_index = ctypes.c_ulong()
+    start = perf_counter()
+    while True:
+        error = vcli.vigem_target_x360_get_user_index(gamepad._busp, devicep, ctypes.byref(user_index))
+        waited = perf_counter() - start
+        if error == VIGEM_ERRORS.VIGEM_ERROR_NONE:
+            return waited
+        if waited > timeout_s:
+            return None
+        time.sleep(READY_POLL_S)
@@ -0,0 +1,228 @@
+# stick_pipeline.py
+
+# Per-stick axis processing compiled once at config load. A StickPipeline reads both axes of a
+# stick from their pre-resolved sources (LEFT_X_REMAP, ...), applies the deadzone and response
+# curve and clamps to -1..1 in one call, instead of parsing the remap string and looking up
+# deadzone keys every tick.
+#
+# Per stick (LEFT_ / RIGHT_ prefix):
+#   <X|Y>_REMAP, <X|Y>_ENABLED     source and on/off per axis, as before
+#   DEADZONE_SHAPE                 "axial" (default): each axis zeroed inside its <X|Y>_DEADZONE,
+#                                  values outside pass unchanged, dynamic deadzones apply;
+#                                  "radial": the stick vector is zeroed inside RADIAL_DEADZONE
+#                                  and its length rescaled from the edge, so diagonals behave
+#                                  like the cardinal directions
+#   CURVE                          response curve on the axis value (axial) or the stick length
+#                                  (radial): "linear", or an object such as
+#                                  {"type": "exponent", "exponent": 2.0}
+#                                  {"type": "s_curve", "strength": 0.5}
+#                                  {"type": "points", "points": [[0, 0], [0.5, 0.2], [1, 1]]}
+# Curves are baked into a CURVE_LUT_SIZE-segment table and read with linear interpolation.
+
+# === Standard library imports ===
+import math
+
+# === Third-party imports ===
+from triad_openvr import ControllerState
+
+# === Constants ===
+LEFT_STICK_PIPELINE = "LEFT_STICK_PIPELINE"     # Config keys the compiled pipelines are stored under
+RIGHT_STICK_PIPELINE = "RIGHT_STICK_PIPELINE"
+STICK_PREFIXES = ("LEFT", "RIGHT")
+
+DEADZONE_AXIAL = "axial"
+DEADZONE_RADIAL = "radial"
+DEADZONE_SHAPES = (DEADZONE_AXIAL, DEADZONE_RADIAL)
+
+CURVE_LINEAR = "linear"
+CURVE_EXPONENT = "exponent"
+CURVE_S = "s_curve"
+CURVE_POINTS = "points"
+CURVE_TYPES = (CURVE_LINEAR, CURVE_EXPONENT, CURVE_S, CURVE_POINTS)
+CURVE_LUT_SIZE = 256
+
+SIDES = {"left_controller": 0, "right_controller": 1}
+
+
+# === Sources ===
+def resolve_source(remap_key, other_prefix_side=None):
+    """
+    Returns (side_index, field) for a remap string, or None for an input that does not exist.
+    An unprefixed field is read from the left controller. A prefix other than left_controller /
+    right_controller reads from other_prefix_side, or nothing when it is None.
+    """
+    controller, _, field = remap_key.rpartition(':')
+    if field not in ControllerState.__slots__:
+        return None
+    if not controller:
+        return (0, field)
+    side = SIDES.get(controller, other_prefix_side)
+    return (side, field) if side is not None else None
+
+
+# === Curves ===
+def curve_function(spec):
+    """
+    Returns the curve for a CURVE value as a function on 0..1, or None for linear.
+    """
+    if isinstance(spec, str):
+        spec = {"type": spec}
+    curve_type = spec.get("type", CURVE_LINEAR)
+    if curve_type == CURVE_EXPONENT:
+        exponent = spec.get("exponent", 2.0)
+        return lambda u: u ** exponent
+    if curve_type == CURVE_S:
+        # Blend of the identity and smoothstep: flatter at rest and near full deflection
+        strength = spec.get("strength", 0.5)
+        return lambda u: (1 - strength) * u + strength * u * u * (3 - 2 * u)
+    if curve_type == CURVE_POINTS:
+        xs, ys = zip(*sorted((float(x), float(y)) for x, y in spec["points"]))
+        def points(u):
+            if u <= xs[0]:
+                return ys[0]
+            for i in range(1, len(xs)):
+                if u <= xs[i]:
+                    span = xs[i] - xs[i - 1]
+                    return ys[i] if span <= 0 else ys[i - 1] + (u - xs[i - 1]) / span * (ys[i] - ys[i - 1])
+            return ys[-1]
+        return points
+    if curve_type == CURVE_LINEAR:
+        return None
+    raise ValueError(f"Unknown response curve: {curve_type}")
+
+
+def bake_curve(spec):
+    function = curve_function(spec)
+    if function is None:
+        return None
+    return tuple(min(max(function(i / CURVE_LUT_SIZE), 0.0), 1.0) for i in range(CURVE_LUT_SIZE + 1))
+
+
+def curve_lookup(lut, value):
+    # value in 0..1; linear interpolation between table entries
+    position = value * CURVE_LUT_SIZE
+    i = int(position)
+    if i >= CURVE_LUT_SIZE:
+        return lut[CURVE_LUT_SIZE]
+    low = lut[i]
+    return low + (position - i) * (lut[i + 1] - low)
+
+
+def curve_spec_errors(key, spec):
+    """
+    Problems with one <stick>_CURVE value, for config validation.
+    """
+    if isinstance(spec, str):
+        spec = {"type": spec}
+    if not isinstance(spec, dict):
+        return [f"{key} must be a curve type or an object"]
+    curve_type = spec.get("type", CURVE_LINEAR)
+    if curve_type not in CURVE_TYPES:
+        return [f"{key}.type must be one of {', '.join(CURVE_TYPES)}"]
+    for name in ("exponent", "strength"):
+        value = spec.get(name)
+        if value is not None and not (isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0):
+            return [f"{key}.{name} must be a positive number"]
+    if spec.get("strength", 0) > 1:
+        return [f"{key}.strength must be between 0 and 1"]
+    if curve_type == CURVE_POINTS:
+        points = spec.get("points")
+        if not isinstance(points, list) or len(points) < 2 or not all(
+                isinstance(p, list) and len(p) == 2 and all(isinstance(c, (int, float)) and 0 <= c <= 1 for c in p)
+                for p in points):
+            return [f"{key}.points must be a list of at least two [input, output] pairs between 0 and 1"]
+    return []
+
+
+# === Pipeline ===
+class StickPipeline:
+    """
+    evaluate(left_state, right_state) -> (x, y) for one stick, both axes in one call. last holds
+    the most recent result, for readers later in the same tick.
+    """
+    __slots__ = ("name", "x_source", "y_source", "radial", "x_threshold", "y_threshold", "x_key", "y_key",
+                 "deadzones", "radius", "lut", "last")
+
+    def __init__(self, name, x_source, y_source, radial, x_threshold, y_threshold, radius, lut, deadzones=None):
+        self.name = name
+        self.x_source = x_source
+        self.y_source = y_source
+        self.radial = radial
+        self.x_threshold = x_threshold
+        self.y_threshold = y_threshold
+        self.x_key = f"{name}_X_DEADZONE"
+        self.y_key = f"{name}_Y_DEADZONE"
+        self.radius = radius
+        self.lut = lut
+        # Adaptive per-axis thresholds (dynamic_deadzone.DynamicDeadzones); axial shape only
+        self.deadzones = deadzones if not radial else None
+        self.last = (0.0, 0.0)
+
+    def evaluate(self, left_state, right_state):
+        self.last = result = self._evaluate(left_state, right_state)
+        return result
+
+    def _evaluate(self, left_state, right_state):
+        source = self.x_source
+        x = float(getattr(right_state if source[0] else left_state, source[1])) if source else 0.0
+        source = self.y_source
+        y = float(getattr(right_state if source[0] else left_state, source[1])) if source else 0.0
+
+        if self.radial:
+            length = math.hypot(x, y)
+            radius = self.radius
+            if length <= radius:
+                return 0.0, 0.0
+            scaled = min((length - radius) / (1.0 - radius), 1.0) if radius < 1.0 else 1.0
+            if self.lut is not None:
+                scaled = curve_lookup(self.lut, scaled)
+            scale = scaled / length
+            return x * scale, y * scale
+
+        deadzones = self.deadzones
+        if deadzones is not None:
+            x = deadzones.apply(self.x_key, x, self.x_threshold)
+            y = deadzones.apply(self.y_key, y, self.y_threshold)
+        else:
+            if -self.x_threshold < x < self.x_threshold:
+                x = 0.0
+            if -self.y_threshold < y < self.y_threshold:
+                y = 0.0
+        x = 1.0 if x > 1.0 else -1.0 if x < -1.0 else x
+        y = 1.0 if y > 1.0 else -1.0 if y < -1.0 else y
+        lut = self.lut
+        if lut is not None:
+            x = math.copysign(curve_lookup(lut, abs(x)), x)
+            y = math.copysign(curve_lookup(lut, abs(y)), y)
+        return x, y
+
+    def describe(self):
+        shape = f"radial {self.radius:g}" if self.radial else f"axial {self.x_threshold:g}/{self.y_threshold:g}"
+        return f"{self.name} stick: {shape} deadzone, {'curve table' if self.lut else 'linear'}"
+
+
+def compile_stick_pipeline(config, name, default_source_side, deadzones=None, other_prefix_side=None):
+    """
+    Builds the StickPipeline for the LEFT or RIGHT stick. Disabled axes and remaps to inputs that
+    do not exist read as a constant 0; other_prefix_side is passed on to resolve_source.
+    """
+    sources = []
+    for axis, field in (("X", "trackpad_x"), ("Y", "trackpad_y")):
+        remap = config.get(f"{name}_{axis}_REMAP", f"{default_source_side}:{field}")
+        sources.append(resolve_source(remap, other_prefix_side) if config.get(f"{name}_{axis}_ENABLED", True) else None)
+    x_threshold = config.get(f"{name}_X_DEADZONE", 0.1)
+    y_threshold = config.get(f"{name}_Y_DEADZONE", 0.1)
+    radial = config.get(f"{name}_DEADZONE_SHAPE", DEADZONE_AXIAL) == DEADZONE_RADIAL
+    radius = config.get(f"{name}_RADIAL_DEADZONE", max(x_threshold, y_threshold))
+    return StickPipeline(name, sources[0], sources[1], radial, x_threshold, y_threshold, radius,
+                         bake_curve(config.get(f"{name}_CURVE", CURVE_LINEAR)), deadzones)
+
+
+def compile_stick_pipelines(config, deadzones=None, other_prefix_side=None):
+    """
+    Returns {LEFT_STICK_PIPELINE: ..., RIGHT_STICK_PIPELINE: ...}, to merge into the bridge config.
+    """
+    return {
+        LEFT_STICK_PIPELINE: compile_stick_pipeline(config, "LEFT", "left_controller", deadzones, other_prefix_side),
+        RIGHT_STICK_PIPELINE: compile_stick_pipeline(config, "RIGHT", "right_controller", deadzones, other_prefix_side),
+    }
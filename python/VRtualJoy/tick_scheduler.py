@@ -0,0 +1,172 @@
+# tick_scheduler.py
+
+# === Standard library imports ===
+import asyncio
+import math
+import time
+
+# === Third-party imports ===
+import openvr
+
+# === Constants ===
+OVERRUN_SKIP = "skip"    # Drop missed ticks and re-align to the next future deadline
+OVERRUN_BURST = "burst"  # Run missed ticks back-to-back until caught up (bounded by max_burst)
+
+# Upper edges (ms) of the wake-lateness histogram buckets; the last bucket catches everything above
+JITTER_BUCKETS_MS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0)
+
+
+# === Vsync source ===
+class VsyncSource:
+    """
+    Reads the compositor frame cadence from IVRSystem so ticks can be aligned to vsync.
+    """
+    def __init__(self, vr_system):
+        self.vr = vr_system
+        self.display_hz = vr_system.getFloatTrackedDeviceProperty(
+            openvr.k_unTrackedDeviceIndex_Hmd, openvr.Prop_DisplayFrequency_Float
+        ) or 0.0
+
+    def last_vsync(self, now):
+        # Returns the perf_counter time of the most recent vsync, or None when unavailable
+        ok, seconds_since, _frame = self.vr.getTimeSinceLastVsync()
+        if not ok:
+            return None
+        return now - seconds_since
+
+
+# === Scheduler ===
+class TickScheduler:
+    """
+    Deadline-based tick pacing for the main loops.
+
+    Deadlines are kept as absolute perf_counter times (start + n * interval), so work time and
+    wakeup error never accumulate into drift. The last spin_s seconds before a deadline are
+    busy-waited to get below asyncio.sleep's wakeup granularity.
+    """
+    def __init__(self, hz, overrun_policy=OVERRUN_SKIP, spin_s=0.0, max_burst=3, vsync=None, report_period_s=60.0):
+        if hz <= 0:
+            raise ValueError(f"Tick rate must be positive, got {hz}")
+        if overrun_policy not in (OVERRUN_SKIP, OVERRUN_BURST):
+            raise ValueError(f"Unknown overrun policy: {overrun_policy}")
+        self.hz = hz
+        self.interval = 1.0 / hz
+        self.overrun_policy = overrun_policy
+        self.spin_s = max(0.0, spin_s)
+        self.max_burst = max_burst
+        self.vsync = vsync
+        if vsync is not None and vsync.display_hz > 0:
+            # Tick on every Nth vsync, N chosen so the tick rate stays as close to hz as possible
+            self.vsync_divisor = max(1, round(vsync.display_hz / hz))
+            self.interval = self.vsync_divisor / vsync.display_hz
+        else:
+            self.vsync = None
+            self.vsync_divisor = 0
+        self.report_period_s = report_period_s
+        self.next_deadline = None
+        self.next_report = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.jitter_counts = [0] * (len(JITTER_BUCKETS_MS) + 1)
+        self.jitter_max_ms = 0.0
+        self.stats_start = time.perf_counter()
+
+    def start(self):
+        now = time.perf_counter()
+        self.next_deadline = now + self.interval
+        self.next_report = now + self.report_period_s
+        self.reset_stats()
+
+    def set_rate(self, hz):
+        """
+        Changes the tick rate from the next tick on. A faster rate also pulls in the pending
+        deadline, so speeding up never waits out the rest of a long idle interval.
+        """
+        if hz <= 0:
+            raise ValueError(f"Tick rate must be positive, got {hz}")
+        self.hz = hz
+        if self.vsync is not None:
+            self.vsync_divisor = max(1, round(self.vsync.display_hz / hz))
+            self.interval = self.vsync_divisor / self.vsync.display_hz
+        else:
+            self.interval = 1.0 / hz
+        if self.next_deadline is not None:
+            self.next_deadline = min(self.next_deadline, time.perf_counter() + self.interval)
+
+    def report_due(self):
+        # True once per report period; the main loops use it to log summary() periodically
+        if self.next_report is None or self.next_deadline is None or self.next_deadline < self.next_report:
+            return False
+        self.next_report += self.report_period_s
+        return True
+
+    def _align_to_vsync(self, deadline, now):
+        vsync_time = self.vsync.last_vsync(now)
+        if vsync_time is None:
+            return deadline
+        frames = max(1, math.ceil((deadline - vsync_time) / self.interval - 0.5))
+        return vsync_time + frames * self.interval
+
+    def _record_lateness(self, lateness_s):
+        lateness_ms = lateness_s * 1000.0
+        if lateness_ms > self.jitter_max_ms:
+            self.jitter_max_ms = lateness_ms
+        for i, edge in enumerate(JITTER_BUCKETS_MS):
+            if lateness_ms < edge:
+                self.jitter_counts[i] += 1
+                return
+        self.jitter_counts[-1] += 1
+
+    async def wait(self):
+        """
+        Sleeps until the next tick deadline, then advances it according to the overrun policy.
+        """
+        if self.next_deadline is None:
+            self.start()
+        deadline = self.next_deadline
+        if self.vsync is not None:
+            deadline = self._align_to_vsync(deadline, time.perf_counter())
+
+        now = time.perf_counter()
+        remaining = deadline - now
+        if remaining > 0:
+            coarse = remaining - self.spin_s
+            if coarse > 0:
+                await asyncio.sleep(coarse)
+            while time.perf_counter() < deadline:
+                pass
+            now = time.perf_counter()
+            self._record_lateness(now - deadline)
+        else:
+            self.overruns += 1
+            self._record_lateness(-remaining)
+
+        self.ticks += 1
+        next_deadline = deadline + self.interval
+        if next_deadline <= now:
+            missed = int((now - next_deadline) / self.interval) + 1
+            if self.overrun_policy == OVERRUN_SKIP or missed > self.max_burst:
+                self.skipped += missed
+                next_deadline += missed * self.interval
+            else:
+                # Burst: yield once so other tasks run, then catch up on the missed deadlines
+                await asyncio.sleep(0)
+        self.next_deadline = next_deadline
+
+    def achieved_hz(self):
+        elapsed = time.perf_counter() - self.stats_start
+        return self.ticks / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        edges = ["<%gms" % edge for edge in JITTER_BUCKETS_MS] + [">=%gms" % JITTER_BUCKETS_MS[-1]]
+        histogram = " ".join(f"{edge}:{count}" for edge, count in zip(edges, self.jitter_counts) if count)
+        mode = f"vsync/{self.vsync_divisor}" if self.vsync is not None else self.overrun_policy
+        return (
+            f"Tick stats: target {1.0 / self.interval:.2f} Hz, achieved {self.achieved_hz():.2f} Hz "
+            f"over {self.ticks} ticks ({mode}), overruns {self.overruns}, skipped {self.skipped}, "
+            f"max lateness {self.jitter_max_ms:.3f} ms, lateness histogram [{histogram}]"
+        )
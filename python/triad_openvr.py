@@ -1,9 +1,15 @@
 import time
 import sys
+import asyncio
+import queue
+import threading
 import openvr
 import math
 import json
+import ctypes
+import struct
 
+from array import array
 from functools import lru_cache
 
 # Function to print out text but instead of starting a new line it will overwrite the existing line
@@ -23,57 +29,392 @@ def convert_to_euler(pose_mat):
 
 #Convert the standard 3x4 position/rotation matrix to a x,y,z location and the appropriate Quaternion
 def convert_to_quaternion(pose_mat):
-    # Per issue #2, adding a abs() so that sqrt only results in real numbers
-    r_w = math.sqrt(abs(1+pose_mat[0][0]+pose_mat[1][1]+pose_mat[2][2]))/2
-    r_x = (pose_mat[2][1]-pose_mat[1][2])/(4*r_w)
-    r_y = (pose_mat[0][2]-pose_mat[2][0])/(4*r_w)
-    r_z = (pose_mat[1][0]-pose_mat[0][1])/(4*r_w)
+    m00, m11, m22 = pose_mat[0][0], pose_mat[1][1], pose_mat[2][2]
+    trace = m00 + m11 + m22
+    # Divide by the largest of 4w, 4x, 4y, 4z (Shepperd's method) so rotations near 180 degrees,
+    # where w is close to zero, stay accurate. Per issue #2, abs() keeps sqrt real.
+    if trace >= max(m00, m11, m22):
+        r_w = math.sqrt(abs(1+trace))/2
+        r_x = (pose_mat[2][1]-pose_mat[1][2])/(4*r_w)
+        r_y = (pose_mat[0][2]-pose_mat[2][0])/(4*r_w)
+        r_z = (pose_mat[1][0]-pose_mat[0][1])/(4*r_w)
+    elif m00 >= m11 and m00 >= m22:
+        r_x = math.sqrt(abs(1+m00-m11-m22))/2
+        r_w = (pose_mat[2][1]-pose_mat[1][2])/(4*r_x)
+        r_y = (pose_mat[0][1]+pose_mat[1][0])/(4*r_x)
+        r_z = (pose_mat[0][2]+pose_mat[2][0])/(4*r_x)
+    elif m11 >= m22:
+        r_y = math.sqrt(abs(1+m11-m00-m22))/2
+        r_w = (pose_mat[0][2]-pose_mat[2][0])/(4*r_y)
+        r_x = (pose_mat[0][1]+pose_mat[1][0])/(4*r_y)
+        r_z = (pose_mat[1][2]+pose_mat[2][1])/(4*r_y)
+    else:
+        r_z = math.sqrt(abs(1+m22-m00-m11))/2
+        r_w = (pose_mat[1][0]-pose_mat[0][1])/(4*r_z)
+        r_x = (pose_mat[0][2]+pose_mat[2][0])/(4*r_z)
+        r_y = (pose_mat[1][2]+pose_mat[2][1])/(4*r_z)
+    if r_w < 0:
+        # Same hemisphere as the original formula, which always returned w >= 0
+        r_w, r_x, r_y, r_z = -r_w, -r_x, -r_y, -r_z
 
     x = pose_mat[0][3]
     y = pose_mat[1][3]
     z = pose_mat[2][3]
     return [x,y,z,r_w,r_x,r_y,r_z]
 
-#Define a class to make it easy to append pose matricies and convert to both Euler and Quaternion for plotting
+#Extrapolate a 3x4 pose matrix dt seconds ahead using the pose's linear and angular velocity (tracking space, rad/s).
+#Returns a plain 3x4 list that convert_to_euler / convert_to_quaternion accept.
+def extrapolate_pose(pose_mat, velocity, angular_velocity, dt):
+    wx, wy, wz = angular_velocity[0] * dt, angular_velocity[1] * dt, angular_velocity[2] * dt
+    angle = math.sqrt(wx * wx + wy * wy + wz * wz)
+    if angle > 1e-9:
+        # Rodrigues rotation about the angular velocity axis, applied in tracking space
+        kx, ky, kz = wx / angle, wy / angle, wz / angle
+        s, c = math.sin(angle), math.cos(angle)
+        t = 1 - c
+        delta = ((t*kx*kx + c, t*kx*ky - s*kz, t*kx*kz + s*ky),
+                 (t*kx*ky + s*kz, t*ky*ky + c, t*ky*kz - s*kx),
+                 (t*kx*kz - s*ky, t*ky*kz + s*kx, t*kz*kz + c))
+    else:
+        delta = ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0))
+    rtn = []
+    for i in range(3):
+        d0, d1, d2 = delta[i]
+        row = [d0 * pose_mat[0][j] + d1 * pose_mat[1][j] + d2 * pose_mat[2][j] for j in range(3)]
+        row.append(pose_mat[i][3] + velocity[i] * dt)
+        rtn.append(row)
+    return rtn
+
+#Fixed-capacity history of raw 3x4 pose matrices and timestamps in one preallocated array.
+#append() only copies 13 floats; Euler angles and quaternions are computed in bulk when asked for.
+#Each sample is stored twice, capacity slots apart, so the most recent n samples are always one
+#contiguous run and window() can hand out a memoryview instead of a copy.
+POSE_SAMPLE_FIELDS = 13   #m00..m23 row by row, then the timestamp
+POSE_SAMPLE = struct.Struct('13d')
+
+#The fields pose_sample_buffer.append() used to store per sample, with its original formulas
+def legacy_pose_fields(pose_mat):
+    yaw = 180 / math.pi * math.atan(pose_mat[1][0] /pose_mat[0][0])
+    pitch = 180 / math.pi * math.atan(-1 * pose_mat[2][0] / math.sqrt(pow(pose_mat[2][1], 2) + math.pow(pose_mat[2][2], 2)))
+    roll = 180 / math.pi * math.atan(pose_mat[2][1] /pose_mat[2][2])
+    r_w = math.sqrt(abs(1+pose_mat[0][0]+pose_mat[1][1]+pose_mat[2][2]))/2
+    r_x = (pose_mat[2][1]-pose_mat[1][2])/(4*r_w)
+    r_y = (pose_mat[0][2]-pose_mat[2][0])/(4*r_w)
+    r_z = (pose_mat[1][0]-pose_mat[0][1])/(4*r_w)
+    return (pose_mat[0][3], pose_mat[1][3], pose_mat[2][3], yaw, pitch, roll, r_w, r_x, r_y, r_z)
+
 class pose_sample_buffer():
-    def __init__(self):
-        self.i = 0
-        self.index = []
-        self.time = []
-        self.x = []
-        self.y = []
-        self.z = []
-        self.yaw = []
-        self.pitch = []
-        self.roll = []
-        self.r_w = []
-        self.r_x = []
-        self.r_y = []
-        self.r_z = []
+    def __init__(self, capacity=4096):
+        if capacity < 1:
+            raise ValueError("pose_sample_buffer capacity must be at least 1")
+        self.capacity = capacity
+        self.data = array('d', bytes(POSE_SAMPLE.size * 2 * capacity))
+        self.view = memoryview(self.data)
+        self.count = 0   #Samples appended in total, including overwritten ones
+        self._columns = None
+        self._columns_count = -1
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def clear(self):
+        self.count = 0
 
     def append(self,pose_mat,t):
-        self.time.append(t)
-        self.x.append(pose_mat[0][3])
-        self.y.append(pose_mat[1][3])
-        self.z.append(pose_mat[2][3])
-        self.yaw.append(180 / math.pi * math.atan(pose_mat[1][0] /pose_mat[0][0]))
-        self.pitch.append(180 / math.pi * math.atan(-1 * pose_mat[2][0] / math.sqrt(pow(pose_mat[2][1], 2) + math.pow(pose_mat[2][2], 2))))
-        self.roll.append(180 / math.pi * math.atan(pose_mat[2][1] /pose_mat[2][2]))
-        r_w = math.sqrt(abs(1+pose_mat[0][0]+pose_mat[1][1]+pose_mat[2][2]))/2
-        self.r_w.append(r_w)
-        self.r_x.append((pose_mat[2][1]-pose_mat[1][2])/(4*r_w))
-        self.r_y.append((pose_mat[0][2]-pose_mat[2][0])/(4*r_w))
-        self.r_z.append((pose_mat[1][0]-pose_mat[0][1])/(4*r_w))
+        m0, m1, m2 = pose_mat[0], pose_mat[1], pose_mat[2]
+        offset = (self.count % self.capacity) * POSE_SAMPLE.size
+        for byte_offset in (offset, offset + self.capacity * POSE_SAMPLE.size):
+            POSE_SAMPLE.pack_into(self.data, byte_offset,
+                                  m0[0], m0[1], m0[2], m0[3], m1[0], m1[1], m1[2], m1[3],
+                                  m2[0], m2[1], m2[2], m2[3], t)
+        self.count += 1
+
+    def window(self, n=None):
+        #Zero-copy view of the last n samples (all retained ones by default), oldest first,
+        #POSE_SAMPLE_FIELDS doubles per sample. Only valid until the next append overwrites it.
+        size = len(self) if n is None else max(0, min(n, len(self)))
+        end = self.capacity + self.count % self.capacity
+        return self.view[(end - size) * POSE_SAMPLE_FIELDS:end * POSE_SAMPLE_FIELDS]
+
+    def times(self, n=None):
+        return self.window(n)[12::POSE_SAMPLE_FIELDS]
+
+    def matrix(self, i=-1, n=None):
+        #Sample i of window(n) as a 3x4 nested list, for convert_to_euler and friends
+        w = self.window(n)
+        size = len(w) // POSE_SAMPLE_FIELDS
+        if not -size <= i < size:
+            raise IndexError("pose_sample_buffer index out of range")
+        o = (i % size) * POSE_SAMPLE_FIELDS
+        return [list(w[o:o+4]), list(w[o+4:o+8]), list(w[o+8:o+12])]
+
+    def _matrices(self, n):
+        w = self.window(n)
+        for o in range(0, len(w), POSE_SAMPLE_FIELDS):
+            yield ((w[o], w[o+1], w[o+2], w[o+3]), (w[o+4], w[o+5], w[o+6], w[o+7]),
+                   (w[o+8], w[o+9], w[o+10], w[o+11]))
+
+    def euler(self, n=None):
+        return [convert_to_euler(m) for m in self._matrices(n)]
+
+    def quaternion(self, n=None):
+        return [convert_to_quaternion(m) for m in self._matrices(n)]
+
+    #The per-field lists the buffer used to grow on every append, now built on first access.
+    #They keep the formulas append() used to apply, so existing consumers see the same numbers;
+    #euler() and quaternion() give the convert_to_* values instead.
+    def columns(self):
+        if self._columns_count != self.count:
+            names = ('x','y','z','yaw','pitch','roll','r_w','r_x','r_y','r_z')
+            rows = [legacy_pose_fields(m) for m in self._matrices(None)]
+            columns = {'time': list(self.times())}
+            for k, name in enumerate(names):
+                columns[name] = [row[k] for row in rows]
+            self._columns = columns
+            self._columns_count = self.count
+        return self._columns
+
+    time = property(lambda self: self.columns()['time'])
+    x = property(lambda self: self.columns()['x'])
+    y = property(lambda self: self.columns()['y'])
+    z = property(lambda self: self.columns()['z'])
+    yaw = property(lambda self: self.columns()['yaw'])
+    pitch = property(lambda self: self.columns()['pitch'])
+    roll = property(lambda self: self.columns()['roll'])
+    r_w = property(lambda self: self.columns()['r_w'])
+    r_x = property(lambda self: self.columns()['r_x'])
+    r_y = property(lambda self: self.columns()['r_y'])
+    r_z = property(lambda self: self.columns()['r_z'])
 
 def get_pose(vr_obj):
     return vr_obj.getDeviceToAbsoluteTrackingPose(openvr.TrackingUniverseStanding, 0, openvr.k_unMaxTrackedDeviceCount)
 
+#Holds a single getDeviceToAbsoluteTrackingPose snapshot that every device reads from during one tick.
+#The pose array is allocated once and refilled in place, so HMD and controllers are always sampled at the same instant.
+class pose_frame():
+    def __init__(self,vr_obj):
+        self.vr = vr_obj
+        self.poses = (openvr.TrackedDevicePose_t * openvr.k_unMaxTrackedDeviceCount)()
+        self.fetch_count = 0
+        self.timestamp = None
+        #Passed as predictedSecondsToPhotonsFromNow; 0 returns the latest measured poses
+        self.seconds_to_photons = 0.0
+        #Called as listener(poses, timestamp) after every fetch, on the fetching thread
+        self.listeners = []
+
+    def update(self):
+        self.vr.getDeviceToAbsoluteTrackingPose(openvr.TrackingUniverseStanding, self.seconds_to_photons, self.poses)
+        self.fetch_count += 1
+        self.timestamp = time.perf_counter()
+        for listener in self.listeners:
+            listener(self.poses, self.timestamp)
+        return self.poses
+
+    def get(self):
+        # Lazily fetch on first use so devices still work before the first tick
+        if self.timestamp is None:
+            return self.update()
+        return self.poses
+
+
+def copy_pose_matrix(pose_mat):
+    return [[pose_mat[i][j] for j in range(4)] for i in range(3)]
+
+#Streams the poses of several devices at a fixed rate from a background thread, in batches of
+#(timestamp, [3x4 matrix or None per device]) samples. Each sample comes from a single pose fetch
+#for all devices. While something else keeps the shared pose_frame fresh (the bridge loop calling
+#update_frame), samples are taken from those fetches instead, so OpenVR is not called twice as
+#often; the thread only fetches itself when the frame goes stale.
+class pose_sampler():
+    def __init__(self, vr_obj, frame, device_indices, rate, batch_size=1, max_batches=64):
+        if rate <= 0 or batch_size < 1 or max_batches < 1:
+            raise ValueError("pose_sampler needs a positive rate, batch_size and max_batches")
+        self.vr = vr_obj
+        self.frame = frame
+        self.indices = list(device_indices)
+        self.interval = 1.0 / rate
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=max_batches)
+        self.poses = (openvr.TrackedDevicePose_t * openvr.k_unMaxTrackedDeviceCount)()
+        self.lock = threading.Lock()
+        self.batch = []
+        self.next_due = 0.0
+        self.stopping = threading.Event()
+        self.thread = None
+        self.fetches = 0   #getDeviceToAbsoluteTrackingPose calls made by the sampler itself
+        self.shared = 0    #Samples taken from the shared frame's fetches
+        self.late = 0      #Times the schedule fell more than an interval behind and was reset
+        self.dropped = 0   #Batches dropped because the queue was full when the frame produced them
+
+    def start(self):
+        self.next_due = time.perf_counter()
+        self.frame.listeners.append(self._on_frame)
+        self.thread = threading.Thread(target=self._run, name="PoseSampler", daemon=True)
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.stopping.set()
+        if self._on_frame in self.frame.listeners:
+            self.frame.listeners.remove(self._on_frame)
+        if self.thread is not None:
+            self.thread.join()
+
+    def _record(self, poses, t):
+        # Called with self.lock held; returns a full batch to queue, or None
+        self.batch.append((t, [copy_pose_matrix(poses[i].mDeviceToAbsoluteTracking) if poses[i].bPoseIsValid else None
+                               for i in self.indices]))
+        # Advance by whole intervals so the rate does not drift with wake-up jitter
+        self.next_due += self.interval
+        if self.next_due <= t:
+            self.late += 1
+            self.next_due = t + self.interval
+        if len(self.batch) < self.batch_size:
+            return None
+        batch, self.batch = self.batch, []
+        return batch
+
+    def _on_frame(self, poses, t):
+        with self.lock:
+            if t < self.next_due:
+                return
+            self.shared += 1
+            batch = self._record(poses, t)
+        if batch is not None:
+            # Never block the loop that owns the frame; a slow consumer loses batches instead
+            try:
+                self.queue.put_nowait(batch)
+            except queue.Full:
+                self.dropped += 1
+
+    def _run(self):
+        while not self.stopping.is_set():
+            batch = None
+            with self.lock:
+                now = time.perf_counter()
+                frame_fresh = self.frame.timestamp is not None and now - self.frame.timestamp < self.interval
+                if now >= self.next_due and not frame_fresh:
+                    self.vr.getDeviceToAbsoluteTrackingPose(openvr.TrackingUniverseStanding, self.frame.seconds_to_photons, self.poses)
+                    self.fetches += 1
+                    batch = self._record(self.poses, now)
+                wait = self.next_due - now
+            if batch is not None:
+                # Backpressure: stop sampling until the consumer makes room
+                while not self.stopping.is_set():
+                    try:
+                        self.queue.put(batch, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+            # With a fresh frame the due sample is left to _on_frame; check back an interval later
+            self.stopping.wait(wait if wait > 0 else self.interval)
+
+    def get(self, timeout=None):
+        """
+        Returns the next batch, or None after timeout seconds or once the sampler is closed and drained.
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            try:
+                return self.queue.get(timeout=0.1)
+            except queue.Empty:
+                if self.stopping.is_set() or (deadline is not None and time.perf_counter() >= deadline):
+                    return None
+
+    def __iter__(self):
+        while True:
+            batch = self.get()
+            if batch is None:
+                return
+            yield batch
+
+    async def stream(self):
+        """
+        Async generator over batches for asyncio code; waits on a worker thread, not the event loop.
+        """
+        while True:
+            batch = await asyncio.to_thread(self.get)
+            if batch is None:
+                return
+            yield batch
+
+
+#Typed, reusable view of VRControllerState_t with the same fields as controller_state_to_dict.
+#Instances are refilled in place every tick instead of building a new dict per controller.
+class ControllerState():
+    __slots__ = ('unPacketNum','trigger','trackpad_x','trackpad_y','ulButtonPressed','ulButtonTouched',
+                 'menu_button','trackpad_pressed','trackpad_touched','grip_button')
+
+    def __init__(self):
+        self.unPacketNum = 0
+        self.trigger = 0.0
+        self.trackpad_x = 0.0
+        self.trackpad_y = 0.0
+        self.ulButtonPressed = 0
+        self.ulButtonTouched = 0
+        self.menu_button = False
+        self.trackpad_pressed = False
+        self.trackpad_touched = False
+        self.grip_button = False
+
+    def load(self, pControllerState, trackpad_axis=None, trigger_axis=None):
+        # trackpad_axis/trigger_axis can be cached rAxis[0]/rAxis[1] views of the same struct
+        if trackpad_axis is None:
+            trackpad_axis = pControllerState.rAxis[0]
+            trigger_axis = pControllerState.rAxis[1]
+        pressed = pControllerState.ulButtonPressed
+        touched = pControllerState.ulButtonTouched
+        self.unPacketNum = pControllerState.unPacketNum
+        self.trigger = trigger_axis.x
+        self.trackpad_x = trackpad_axis.x
+        self.trackpad_y = trackpad_axis.y
+        self.ulButtonPressed = pressed
+        self.ulButtonTouched = touched
+        self.menu_button = bool(pressed >> 1 & 1)
+        self.trackpad_pressed = bool(pressed >> 32 & 1)
+        self.trackpad_touched = bool(touched >> 32 & 1)
+        self.grip_button = bool(pressed >> 2 & 1)
+        return self
+
+    def set_buttons_pressed(self, pressed):
+        # Rewrites ulButtonPressed and the flags derived from it
+        self.ulButtonPressed = pressed
+        self.menu_button = bool(pressed >> 1 & 1)
+        self.trackpad_pressed = bool(pressed >> 32 & 1)
+        self.grip_button = bool(pressed >> 2 & 1)
+
+    def get(self, key, default=None):
+        # Keeps code written against the dict API working
+        return getattr(self, key, default)
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+#Shared all-zero state used when a controller is missing. Never written to.
+EMPTY_CONTROLLER_STATE = ControllerState()
+
 
 class vr_tracked_device():
-    def __init__(self,vr_obj,index,device_class):
+    def __init__(self,vr_obj,index,device_class,frame=None):
         self.device_class = device_class
         self.index = index
         self.vr = vr_obj
+        self.frame = frame
+        # Preallocated state struct and double-buffered ControllerState for read_controller_state()
+        self._state_struct = openvr.VRControllerState_t()
+        self._state_ref = ctypes.byref(self._state_struct)
+        self._state_size = ctypes.sizeof(openvr.VRControllerState_t)
+        self._trackpad_axis = self._state_struct.rAxis[0]
+        self._trigger_axis = self._state_struct.rAxis[1]
+        function_table = getattr(vr_obj, 'function_table', None)
+        self._get_controller_state = function_table.getControllerState if function_table is not None else None
+        self.controller_state = ControllerState()
+        self.previous_controller_state = ControllerState()
+
+    def current_pose(self):
+        if self.frame is not None:
+            return self.frame.get()
+        return get_pose(self.vr)
 
     @lru_cache(maxsize=None)
     def get_serial(self):
@@ -91,7 +432,7 @@ class vr_tracked_device():
 
     def sample(self,num_samples,sample_rate):
         interval = 1/sample_rate
-        rtn = pose_sample_buffer()
+        rtn = pose_sample_buffer(max(1, num_samples))
         sample_start = time.time()
         for i in range(num_samples):
             start = time.time()
@@ -103,40 +444,53 @@ class vr_tracked_device():
         return rtn
 
     def get_pose_euler(self, pose=None):
-        if pose == None:
-            pose = get_pose(self.vr)
+        if pose is None:
+            pose = self.current_pose()
         if pose[self.index].bPoseIsValid:
             return convert_to_euler(pose[self.index].mDeviceToAbsoluteTracking)
         else:
             return None
 
+    def get_pose_euler_extrapolated(self, dt, pose=None):
+        pose_mat = self.get_pose_matrix_extrapolated(dt, pose)
+        return convert_to_euler(pose_mat) if pose_mat is not None else None
+
+    def get_pose_matrix_extrapolated(self, dt, pose=None):
+        if pose is None:
+            pose = self.current_pose()
+        if pose[self.index].bPoseIsValid:
+            p = pose[self.index]
+            return extrapolate_pose(p.mDeviceToAbsoluteTracking, p.vVelocity, p.vAngularVelocity, dt)
+        else:
+            return None
+
     def get_pose_matrix(self, pose=None):
-        if pose == None:
-            pose = get_pose(self.vr)
+        if pose is None:
+            pose = self.current_pose()
         if pose[self.index].bPoseIsValid:
             return pose[self.index].mDeviceToAbsoluteTracking
         else:
             return None
 
     def get_velocity(self, pose=None):
-        if pose == None:
-            pose = get_pose(self.vr)
+        if pose is None:
+            pose = self.current_pose()
         if pose[self.index].bPoseIsValid:
             return pose[self.index].vVelocity
         else:
             return None
 
     def get_angular_velocity(self, pose=None):
-        if pose == None:
-            pose = get_pose(self.vr)
+        if pose is None:
+            pose = self.current_pose()
         if pose[self.index].bPoseIsValid:
             return pose[self.index].vAngularVelocity
         else:
             return None
 
     def get_pose_quaternion(self, pose=None):
-        if pose == None:
-            pose = get_pose(self.vr)
+        if pose is None:
+            pose = self.current_pose()
         if pose[self.index].bPoseIsValid:
             return convert_to_quaternion(pose[self.index].mDeviceToAbsoluteTracking)
         else:
@@ -175,6 +529,21 @@ class vr_tracked_device():
         result, state = self.vr.getControllerState(self.index)
         return self.controller_state_to_dict(state)
 
+    def read_controller_state(self):
+        """
+        Allocation-free alternative to get_controller_inputs(). Fills the device's preallocated
+        VRControllerState_t and returns a ControllerState. The previous tick's state stays available
+        as previous_controller_state until the next call swaps the two buffers.
+        """
+        current = self.previous_controller_state
+        self.previous_controller_state = self.controller_state
+        self.controller_state = current
+        if self._get_controller_state is not None:
+            self._get_controller_state(self.index, self._state_ref, self._state_size)
+            return current.load(self._state_struct, self._trackpad_axis, self._trigger_axis)
+        result, state = self.vr.getControllerState(self.index)
+        return current.load(state)
+
     def trigger_haptic_pulse(self, duration_micros=1000, axis_id=0):
         """
         Causes devices with haptic feedback to vibrate for a short time.
@@ -197,8 +566,9 @@ class triad_openvr():
         self.object_names = {"Tracking Reference":[],"HMD":[],"Controller":[],"Tracker":[]}
         self.devices = {}
         self.device_index_map = {}
-        poses = self.vr.getDeviceToAbsoluteTrackingPose(openvr.TrackingUniverseStanding, 0,
-                                                               openvr.k_unMaxTrackedDeviceCount)
+        self.event = openvr.VREvent_t()
+        self.frame = pose_frame(self.vr)
+        poses = self.frame.update()
 
         # Loading config file
         if configfile_path:
@@ -217,7 +587,7 @@ class triad_openvr():
                         if device_serial == device['serial']:
                             device_name = device['name']
                             self.object_names[device['type']].append(device_name)
-                            self.devices[device_name] = vr_tracked_device(self.vr,i,device['type'])
+                            self.devices[device_name] = vr_tracked_device(self.vr,i,device['type'],self.frame)
         else:
             # Iterate through the pose list to find the active devices and determine their type
             for i in range(openvr.k_unMaxTrackedDeviceCount):
@@ -230,15 +600,53 @@ class triad_openvr():
     def get_pose(self):
         return get_pose(self.vr)
 
-    def poll_vr_events(self):
+    def update_frame(self):
+        """
+        Fetches every device pose once into the shared frame. Call this once per tick; all
+        device accessors (get_pose_euler, get_pose_quaternion, ...) read from the result.
+        """
+        return self.frame.update()
+
+    def sampler(self, device_names=None, rate=250.0, batch_size=1, max_batches=64):
+        """
+        Starts and returns a pose_sampler over the named devices (all current devices by default).
+        Iterate it, or use its async stream(), and close() it when done.
+        """
+        if device_names is None:
+            device_names = list(self.devices)
+        indices = [self.devices[name].index for name in device_names]
+        return pose_sampler(self.vr, self.frame, indices, rate, batch_size, max_batches).start()
+
+    @property
+    def pose_fetch_count(self):
+        """
+        Number of getDeviceToAbsoluteTrackingPose calls made through the shared frame.
+        """
+        return self.frame.fetch_count
+
+    def poll_vr_events(self, button_edges=None, interaction_events=None):
         """
         Used to poll VR events and find any new tracked devices or ones that are no longer tracked.
+        If button_edges is a list, every VREvent_ButtonPress / VREvent_ButtonUnpress is appended to it
+        as a (device_index, button_mask, pressed, timestamp) tuple, with the timestamp on the
+        time.perf_counter() clock. button_mask uses the same bit layout as ulButtonPressed.
+        If interaction_events is a list, VREvent_TrackedDeviceUserInteractionStarted / Ended (the HMD
+        proximity sensor) are appended to it as (device_index, started) tuples.
         """
-        event = openvr.VREvent_t()
+        event = self.event
+        now = time.perf_counter()
         while self.vrsystem.pollNextEvent(event):
-            if event.eventType == openvr.VREvent_TrackedDeviceActivated:
+            event_type = event.eventType
+            if event_type == openvr.VREvent_ButtonPress or event_type == openvr.VREvent_ButtonUnpress:
+                if button_edges is not None:
+                    button_edges.append((event.trackedDeviceIndex, 1 << event.data.controller.button,
+                                         event_type == openvr.VREvent_ButtonPress, now - event.eventAgeSeconds))
+            elif event_type == openvr.VREvent_TrackedDeviceUserInteractionStarted or event_type == openvr.VREvent_TrackedDeviceUserInteractionEnded:
+                if interaction_events is not None:
+                    interaction_events.append((event.trackedDeviceIndex, event_type == openvr.VREvent_TrackedDeviceUserInteractionStarted))
+            elif event_type == openvr.VREvent_TrackedDeviceActivated:
                 self.add_tracked_device(event.trackedDeviceIndex)
-            elif event.eventType == openvr.VREvent_TrackedDeviceDeactivated:
+            elif event_type == openvr.VREvent_TrackedDeviceDeactivated:
                 #If we were already tracking this device, quit tracking it.
                 if event.trackedDeviceIndex in self.device_index_map:
                     self.remove_tracked_device(event.trackedDeviceIndex)
@@ -249,22 +657,22 @@ class triad_openvr():
         if (device_class == openvr.TrackedDeviceClass_Controller):
             device_name = "controller_"+str(len(self.object_names["Controller"])+1)
             self.object_names["Controller"].append(device_name)
-            self.devices[device_name] = vr_tracked_device(self.vr,i,"Controller")
+            self.devices[device_name] = vr_tracked_device(self.vr,i,"Controller",self.frame)
             self.device_index_map[i] = device_name
         elif (device_class == openvr.TrackedDeviceClass_HMD):
             device_name = "hmd_"+str(len(self.object_names["HMD"])+1)
             self.object_names["HMD"].append(device_name)
-            self.devices[device_name] = vr_tracked_device(self.vr,i,"HMD")
+            self.devices[device_name] = vr_tracked_device(self.vr,i,"HMD",self.frame)
             self.device_index_map[i] = device_name
         elif (device_class == openvr.TrackedDeviceClass_GenericTracker):
             device_name = "tracker_"+str(len(self.object_names["Tracker"])+1)
             self.object_names["Tracker"].append(device_name)
-            self.devices[device_name] = vr_tracked_device(self.vr,i,"Tracker")
+            self.devices[device_name] = vr_tracked_device(self.vr,i,"Tracker",self.frame)
             self.device_index_map[i] = device_name
         elif (device_class == openvr.TrackedDeviceClass_TrackingReference):
             device_name = "tracking_reference_"+str(len(self.object_names["Tracking Reference"])+1)
             self.object_names["Tracking Reference"].append(device_name)
-            self.devices[device_name] = vr_tracking_reference(self.vr,i,"Tracking Reference")
+            self.devices[device_name] = vr_tracking_reference(self.vr,i,"Tracking Reference",self.frame)
             self.device_index_map[i] = device_name
 
     def remove_tracked_device(self, tracked_device_index):